@@ -15,7 +15,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 
 # Import routes
-from app.routes import task, health
+from app.routes import task, health, buildings, jobs, timeseries, tiles, metrics
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -42,6 +42,12 @@ templates = Jinja2Templates(directory="templates")
 # Include API routes
 app.include_router(health.router, prefix="/api", tags=["health"])
 app.include_router(task.router, prefix="/api", tags=["tasking"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+app.include_router(buildings.router, prefix="/api", tags=["buildings"])
+app.include_router(timeseries.router, prefix="/api", tags=["timeseries"])
+app.include_router(tiles.router, prefix="/api", tags=["tiles"])
+# Prometheus scrapes /metrics at the root
+app.include_router(metrics.router, tags=["metrics"])
 
 # Root route - serves main map interface
 @app.get("/")
@@ -0,0 +1,90 @@
+"""
+Building Routes - Footprint export endpoints.
+
+Streams detected building footprints for a tile as:
+- Chunked GeoJSON (application/geo+json)
+- FlatGeobuf with a packed Hilbert R-tree index (application/x-flatgeobuf)
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from satintel.export import iter_flatgeobuf, iter_geojson, select_bbox
+from satintel.pipeline import TileNotFoundError
+from app.services import get_pipeline
+from typing import List, Optional
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "geojson": "application/geo+json",
+    "fgb": "application/x-flatgeobuf",
+}
+
+
+def parse_bbox(bbox: str) -> List[float]:
+    """
+    Parse a 'lon_min,lat_min,lon_max,lat_max' query value.
+
+    Raises:
+        HTTPException: If the value is malformed
+    """
+    try:
+        values = [float(v) for v in bbox.split(",")]
+    except ValueError:
+        values = []
+    if len(values) != 4 or values[0] > values[2] or values[1] > values[3]:
+        raise HTTPException(status_code=400, detail="bbox must be lon_min,lat_min,lon_max,lat_max")
+    return values
+
+
+@router.get("/buildings/{area_id}/{date}")
+def get_buildings(
+    area_id: str,
+    date: str,
+    format: str = Query("geojson", pattern="^(geojson|fgb)$", description="geojson or fgb"),
+    bbox: Optional[str] = Query(None, description="lon_min,lat_min,lon_max,lat_max")
+):
+    """
+    Stream building footprints for an area and date.
+
+    Footprints come from the pipeline's cached mask and polygon stages and
+    are encoded chunk by chunk while the response is sent.
+
+    Args:
+        area_id: Area identifier
+        date: Date string (YYYY-MM-DD)
+        format: Output format ('geojson' or 'fgb')
+        bbox: Only return buildings intersecting this lon/lat box (optional)
+
+    Returns:
+        Streaming GeoJSON FeatureCollection or FlatGeobuf file
+
+    Raises:
+        HTTPException: If the tile does not exist or the bbox is malformed
+    """
+    query = parse_bbox(bbox) if bbox is not None else None
+    pipeline = get_pipeline()
+    try:
+        transform = pipeline.transform(area_id, date)
+        table = pipeline.footprints(area_id, date)
+    except (TileNotFoundError, FileNotFoundError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if query is not None:
+        table = select_bbox(table, transform, query)
+
+    pixel_area_m2 = pipeline.analyzer.pixel_resolution ** 2
+    if format == "fgb":
+        body = iter_flatgeobuf(table, transform, pixel_area_m2, layer_name=f"{area_id}_{date}")
+    else:
+        body = iter_geojson(table, transform, pixel_area_m2)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{area_id}_{date}.{format}"',
+            "X-Feature-Count": str(len(table)),
+        }
+    )
@@ -4,27 +4,40 @@ Health Check Routes - Service health and status endpoints.
 
 from fastapi import APIRouter
 from app.schemas import HealthResponse
+from app.services import get_detector, get_imagery_manager, get_job_manager, get_pipeline, get_stage_cache
 
 router = APIRouter()
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+def health_check():
     """
     Check service health and availability.
     
+    Plain def so FastAPI runs it in the threadpool: on a cold process the
+    first call builds the detector and pipeline, which must not block the
+    event loop.
+    
     Returns:
         Service status and metadata
     """
-    # TODO: Implement health check logic
-    # - Check if data directories exist
-    # - Count available areas
-    # - Verify model availability
-    
+    batcher = get_detector().batcher
+    # API requests for an in-flight tile attach to its job and never reach
+    # the pipeline's single-flight, so both layers are counted
+    coalescing = get_pipeline().flights.stats()
+    deduplicated = get_job_manager().stats()["deduplicated"]
+    requests = coalescing["calls"] + deduplicated
+    coalescing.update(
+        jobs_deduplicated=deduplicated,
+        total_coalescing_ratio=(coalescing["coalesced"] + deduplicated) / requests if requests else 0.0
+    )
     return {
         "status": "healthy",
         "version": "0.1.0",
-        "areas_available": 0
+        "areas_available": len(get_imagery_manager().index.areas()),
+        "cache": get_stage_cache().stats(),
+        "inference": batcher.stats() if batcher is not None else None,
+        "coalescing": coalescing
     }
 
 
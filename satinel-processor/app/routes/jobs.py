@@ -0,0 +1,109 @@
+"""
+Job Routes - Status and progress of background tasking jobs.
+
+Endpoints for:
+- Polling a job's status and result
+- Streaming per-stage progress as server-sent events
+"""
+
+import json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from app.schemas import JobResponse
+from app.services import get_job_manager
+from satintel.jobs import Job
+
+router = APIRouter()
+
+# Seconds between SSE keep-alive comments while a stage is running
+KEEPALIVE_SECONDS = 15.0
+
+
+def job_response(job: Job, deduplicated: bool = False) -> dict:
+    """
+    Serialize a job for JobResponse.
+
+    Args:
+        job: Job to describe
+        deduplicated: Whether the request attached to an in-flight job
+
+    Returns:
+        Dict matching app.schemas.JobResponse
+    """
+    data = job.to_dict()
+    area_id, date = job.key
+    return {
+        "job_id": data["job_id"],
+        "status": data["status"],
+        "stage": data["stage"],
+        "area_id": area_id,
+        "date": date,
+        "deduplicated": deduplicated,
+        "error": data["error"],
+        "result": data["result"],
+    }
+
+
+def _get_job(job_id: str) -> Job:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    Get the status of a tasking job.
+
+    Args:
+        job_id: Identifier returned by POST /api/task
+
+    Returns:
+        Job status, with the TaskResponse once done
+
+    Raises:
+        HTTPException: If the job is unknown or has expired
+    """
+    return job_response(_get_job(job_id))
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Stream a job's progress as server-sent events.
+
+    Each status or stage change is sent as a `progress` event; the final
+    event is `done` or `failed` and carries the full job status.
+
+    Args:
+        job_id: Identifier returned by POST /api/task
+
+    Returns:
+        text/event-stream response
+
+    Raises:
+        HTTPException: If the job is unknown or has expired
+    """
+    job = _get_job(job_id)
+
+    async def events():
+        seen = 0
+        while True:
+            # Suspends on the event loop; no thread is held per open stream
+            new = await job.wait_async(seen, KEEPALIVE_SECONDS)
+            if not new and not job.is_finished:
+                yield ": keep-alive\n\n"
+                continue
+            for event in new:
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+            seen += len(new)
+            if job.is_finished and seen >= len(job.events):
+                yield f"event: {job.status}\ndata: {json.dumps(job_response(job))}\n\n"
+                return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
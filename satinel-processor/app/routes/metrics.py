@@ -0,0 +1,41 @@
+"""
+Metrics Routes - Prometheus scrape endpoint.
+
+Exposes stage latency histograms, decoded bytes, cache hit/miss counters and
+model batch sizes recorded by satintel.metrics, plus point-in-time gauges of
+the stage cache, job queue and inference batcher.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services import get_detector, get_job_manager, get_stage_cache
+from satintel import metrics
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics.REGISTRY.gauge("satintel_stage_cache_bytes", "Estimated bytes held by the stage cache")
+metrics.REGISTRY.gauge("satintel_stage_cache_entries", "Entries in the stage cache")
+metrics.REGISTRY.gauge("satintel_jobs", "Tasking jobs by status")
+metrics.REGISTRY.gauge("satintel_inference_queue_depth", "Windows waiting for a batched forward pass")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Render all metrics in the Prometheus text format.
+
+    Returns:
+        text/plain exposition (version 0.0.4)
+    """
+    cache = get_stage_cache().stats()
+    metrics.REGISTRY.set("satintel_stage_cache_bytes", cache["bytes"])
+    metrics.REGISTRY.set("satintel_stage_cache_entries", cache["entries"])
+    for status, count in get_job_manager().stats().items():
+        if status not in ("submitted", "deduplicated"):
+            metrics.REGISTRY.set("satintel_jobs", count, status=status)
+    batcher = get_detector().batcher
+    if batcher is not None:
+        metrics.REGISTRY.set("satintel_inference_queue_depth", batcher.stats()["queue_depth"])
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
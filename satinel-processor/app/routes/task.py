@@ -2,56 +2,135 @@
 Task Routes - Satellite tasking and analysis endpoints.
 
 Main API endpoints for:
-- Submitting analysis tasks
+- Submitting analysis tasks (as background jobs)
+- Analyzing many coordinates in one streamed request
 - Retrieving results
 - Accessing imagery and overlays
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from app.schemas import TaskRequest, TaskResponse
+import json
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from config.settings import settings
+from app.routes.jobs import job_response
+from app.schemas import BatchTaskRequest, JobResponse, TaskRequest, TaskResponse
+from app.services import get_imagery_manager, get_job_manager, get_pipeline
+from satintel.overlay import FORMAT_OF_SUFFIX, MEDIA_TYPES
+from satintel.pipeline import TileNotFoundError
 from typing import Optional
 
 router = APIRouter()
 
 
-@router.post("/task", response_model=TaskResponse)
-async def submit_task(request: TaskRequest, background_tasks: BackgroundTasks):
+@router.post("/task", response_model=JobResponse, status_code=202)
+def submit_task(
+    request: TaskRequest,
+    profile: bool = Query(False, description="Profile this request (debug only)"),
+    x_profile: Optional[str] = Header(None)
+):
     """
     Submit a satellite imagery analysis task.
     
-    Process:
-    1. Snap lat/lon to nearest available tile
-    2. Load satellite imagery for requested date (or latest)
-    3. Run building detection (or load precomputed mask)
-    4. Calculate statistics
-    5. Generate overlay visualization
-    6. (Optional) Run change detection if previous date available
+    The coordinate is snapped to a tile immediately; the rest of the
+    pipeline runs as a background job:
+    1. Look up a stored result for the tile
+    2. Run building detection (or load precomputed mask)
+    3. Calculate statistics
+    4. Generate overlay visualization
+    
+    Requests that snap to a tile already being processed attach to the
+    in-flight job instead of starting another computation.
+    
+    With ?profile=1 (or an X-Profile: 1 header) and DEBUG on, the job runs
+    under cProfile and a sampling profiler; collapsed stacks and stats are
+    written to PROFILE_DIR and named in the result's `profile` field.
+    Profiled requests always get their own job and recompute every stage
+    (no stored result, stage cache or shared in-flight computation).
     
     Args:
-        request: Task request with coordinates and optional date
-        background_tasks: FastAPI background tasks
+        request: Task request with coordinates and optional area
+        profile: Profile this request
+        x_profile: Header alternative to the profile flag
     
     Returns:
-        Complete analysis results with images and statistics
+        Job status; poll /api/jobs/{job_id} or stream /api/jobs/{job_id}/events
     
     Raises:
-        HTTPException: If coordinates out of range or no imagery available
+        HTTPException: If no imagery is available near the coordinates, or
+            profiling is requested while DEBUG is off
     """
-    # TODO: Implement task processing pipeline
-    # 1. Validate coordinates
-    # 2. Snap to tile using ImageryManager
-    # 3. Load image
-    # 4. Run/load building detection
-    # 5. Calculate stats using BuildingAnalyzer
-    # 6. Generate overlay
-    # 7. Run change detection if applicable
-    # 8. Return results
+    profiled = profile or x_profile in ("1", "true")
+    if profiled and not settings.debug:
+        raise HTTPException(status_code=403, detail="Profiling requires DEBUG=true")
+    
+    pipeline = get_pipeline()
+    try:
+        tile = pipeline.snap(request.lat, request.lon, request.area_id)
+    except TileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    work = lambda progress: pipeline.process(tile, progress, fresh=profiled)
+    if profiled:
+        work = _profiled(work, f"{tile['area_id']}_{tile['date']}")
+    job, deduplicated = get_job_manager().submit(
+        (tile["area_id"], tile["date"]), work, deduplicate=not profiled
+    )
+    return job_response(job, deduplicated)
+
+
+def _profiled(work, label: str):
+    """Wrap job work so it runs under the profilers and reports its profile files."""
+    from satintel.profiling import profile_call
     
-    pass
+    def run(progress):
+        result, files = profile_call(
+            lambda: work(progress), settings.profile_dir, label,
+            interval_ms=settings.profile_sample_interval_ms, keep=settings.profile_keep
+        )
+        return {**result, "profile": files}
+    
+    return run
 
 
-@router.get("/task/{area_id}/{date}")
-async def get_task_result(area_id: str, date: str):
+@router.post("/task/batch")
+def submit_batch(request: BatchTaskRequest):
+    """
+    Analyze many coordinates in one request.
+    
+    Points are grouped by the tile they snap to; each tile is loaded and
+    analyzed once and all of its points are answered together. Results
+    stream back as NDJSON (one app.schemas.BatchPointResult per line) in the
+    order tiles finish, so callers match lines to points by `index`.
+    
+    Args:
+        request: Points, optional area and optional neighbourhood radius
+    
+    Returns:
+        application/x-ndjson stream
+    
+    Raises:
+        HTTPException: If more than BATCH_MAX_POINTS points are submitted
+    """
+    if len(request.points) > settings.batch_max_points:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.batch_max_points} points per batch (got {len(request.points)})"
+        )
+    
+    rows = get_pipeline().analyze_points(
+        [point.model_dump() for point in request.points],
+        radius_m=request.radius_m,
+        area_id=request.area_id,
+        max_workers=settings.batch_tile_workers
+    )
+    return StreamingResponse(
+        (json.dumps(row) + "\n" for row in rows),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get("/task/{area_id}/{date}", response_model=TaskResponse)
+def get_task_result(area_id: str, date: str):
     """
     Retrieve cached results for a specific area and date.
     
@@ -65,8 +144,35 @@ async def get_task_result(area_id: str, date: str):
     Raises:
         HTTPException: If no cached results found
     """
-    # TODO: Implement result caching and retrieval
-    pass
+    result = get_pipeline().cached_result(area_id, date)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No cached result for {area_id} on {date}")
+    return result
+
+
+@router.get("/task/{area_id}/{date}/overlay.{ext}")
+def get_task_overlay(area_id: str, date: str, ext: str):
+    """
+    Serve the cached overlay image for a specific area and date.
+    
+    The overlay is stored under its real suffix (png, jpg or webp, depending
+    on OVERLAY_FORMAT); the result's overlay_url names it.
+    
+    Args:
+        area_id: Area identifier
+        date: Date string (YYYY-MM-DD)
+        ext: Image suffix of the stored overlay
+    
+    Returns:
+        Overlay image file
+    
+    Raises:
+        HTTPException: If no cached overlay with that suffix is found
+    """
+    path = get_pipeline().cached_overlay(area_id, date)
+    if path is None or path.suffix != f".{ext}":
+        raise HTTPException(status_code=404, detail=f"No cached overlay.{ext} for {area_id} on {date}")
+    return FileResponse(path, media_type=MEDIA_TYPES[FORMAT_OF_SUFFIX[path.suffix]])
 
 
 @router.get("/dates/{area_id}")
@@ -79,6 +185,32 @@ async def get_available_dates(area_id: str):
     
     Returns:
         List of available date strings
+    
+    Raises:
+        HTTPException: If the area has no imagery
+    """
+    dates = get_imagery_manager().get_available_dates(area_id)
+    if not dates:
+        raise HTTPException(status_code=404, detail=f"No imagery for area '{area_id}'")
+    return dates
+
+
+@router.get("/imagery/{area_id}/{date}")
+async def get_imagery(area_id: str, date: str):
+    """
+    Serve the source satellite image for an area and date.
+    
+    Args:
+        area_id: Area identifier
+        date: Date string (YYYY-MM-DD)
+    
+    Returns:
+        Image file
+    
+    Raises:
+        HTTPException: If the image does not exist
     """
-    # TODO: Implement date listing for area
-    pass
+    path = get_imagery_manager().get_image_path(area_id, date)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No imagery for {area_id} on {date}")
+    return FileResponse(path)
@@ -0,0 +1,58 @@
+"""
+Map Tile Routes - XYZ tiles for the Leaflet map.
+
+Serves 256x256 PNG tiles of base imagery and building overlays rendered
+from the stored rasters, with ETag revalidation and browser caching.
+"""
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from config.settings import settings
+from app.services import get_map_tiles
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.get("/tiles/{layer}/{z}/{x}/{y}.png")
+def get_map_tile(
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    date: Optional[str] = Query(
+        None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="Acquisition date (latest if omitted)"
+    ),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Render or serve a cached XYZ map tile.
+
+    Args:
+        layer: 'imagery' or 'buildings'
+        z: Zoom level
+        x: Tile column
+        y: Tile row
+        date: Acquisition date (YYYY-MM-DD), latest per source tile if omitted
+        if_none_match: ETag the client already holds
+
+    Returns:
+        PNG tile (transparent where there is no imagery), or 304 if unchanged
+
+    Raises:
+        HTTPException: If the layer, tile coordinates or date are invalid
+            (404; 422 for a malformed date)
+    """
+    try:
+        data, etag = get_map_tiles().tile(layer, z, x, y, date)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": f"public, max-age={settings.map_tile_max_age_seconds}",
+    }
+    if if_none_match is not None and headers["ETag"] in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type="image/png", headers=headers)
@@ -0,0 +1,34 @@
+"""
+Time Series Routes - Building analytics across every date of an area.
+"""
+
+from fastapi import APIRouter, HTTPException
+from app.schemas import TimeSeriesResponse
+from app.services import get_timeseries
+
+router = APIRouter()
+
+
+@router.get("/timeseries/{area_id}", response_model=TimeSeriesResponse, response_model_by_alias=True)
+def get_timeseries_for_area(area_id: str):
+    """
+    Building stats per date and change between consecutive dates.
+    
+    Results are stored per date and per date pair, so only newly landed
+    acquisitions are analyzed.
+    
+    Args:
+        area_id: Area identifier
+    
+    Returns:
+        Columnar time series
+    
+    Raises:
+        HTTPException: If the area has no imagery
+    """
+    try:
+        return get_timeseries().series(area_id)
+    except (LookupError, FileNotFoundError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
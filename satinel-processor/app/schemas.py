@@ -21,6 +21,24 @@ class TaskRequest(BaseModel):
     area_id: Optional[str] = Field(None, description="Specific area ID if known")
 
 
+class BatchPoint(BaseModel):
+    """One coordinate of a batch request."""
+    
+    lat: float = Field(..., description="Latitude", ge=-90, le=90)
+    lon: float = Field(..., description="Longitude", ge=-180, le=180)
+    id: Optional[str] = Field(None, description="Caller's identifier, echoed in the result")
+
+
+class BatchTaskRequest(BaseModel):
+    """Request model for analyzing many coordinates at once."""
+    
+    points: List[BatchPoint] = Field(..., description="Coordinates to analyze", min_length=1)
+    area_id: Optional[str] = Field(None, description="Specific area ID if known")
+    radius_m: Optional[float] = Field(
+        None, description="Also summarize the square window of this half-width around each point", gt=0, le=10000
+    )
+
+
 class BuildingStats(BaseModel):
     """Building statistics model."""
     
@@ -31,6 +49,24 @@ class BuildingStats(BaseModel):
     largest_building_m2: Optional[float] = Field(None, description="Largest building size")
 
 
+class ChangeStats(BaseModel):
+    """Change relative to the tile's previous acquisition date."""
+    
+    compared_to: str = Field(..., description="Earlier date compared against")
+    buildings_before: int = Field(..., description="Buildings on the earlier date")
+    buildings_after: int = Field(..., description="Buildings on this date")
+    new_buildings: int = Field(..., description="Buildings without a match on the earlier date")
+    removed_buildings: int = Field(..., description="Earlier buildings without a match on this date")
+    unchanged_buildings: int = Field(..., description="Buildings matched across dates")
+    percent_change: float = Field(..., description="Change in building count (%)")
+    new_built_area_km2: float = Field(..., description="Newly built area in km²")
+    demolished_area_km2: float = Field(..., description="Demolished area in km²")
+    net_built_area_change_km2: float = Field(..., description="Net change in built area in km²")
+    mean_match_iou: Optional[float] = Field(None, description="Mean IoU of matched buildings")
+    activity_score: float = Field(..., description="Share of the built footprint that changed (0-100)")
+    overlay_url: Optional[str] = Field(None, description="URL to change overlay image")
+
+
 class TaskResponse(BaseModel):
     """Response model for completed task analysis - current state only."""
     
@@ -45,11 +81,81 @@ class TaskResponse(BaseModel):
     
     # Analysis results
     stats: BuildingStats = Field(..., description="Building statistics")
+    change: Optional[ChangeStats] = Field(None, description="Change since the previous date")
     
     # Metadata
     tile_size_km: float = Field(..., description="Tile coverage in km²")
     resolution_m: float = Field(..., description="Image resolution in meters per pixel")
     processing_time_ms: Optional[int] = Field(None, description="Processing time in milliseconds")
+    stages_ms: Optional[Dict[str, float]] = Field(
+        None, description="Milliseconds spent per pipeline stage (when TASK_STAGE_TIMINGS is on)"
+    )
+    profile: Optional[Dict[str, str]] = Field(
+        None, description="Profile file names under PROFILE_DIR (profiled requests only)"
+    )
+
+
+class LocalStats(BaseModel):
+    """Statistics of the window around one point of a batch request."""
+    
+    building_count: int = Field(..., description="Buildings whose centroid lies in the window")
+    built_area_km2: float = Field(..., description="Built area inside the window in km²")
+    window_area_km2: float = Field(..., description="Window area (clipped to the tile) in km²")
+    density_per_km2: float = Field(..., description="Building density per km²")
+    on_building: bool = Field(..., description="Whether the point itself is on a building")
+
+
+class BatchPointResult(BaseModel):
+    """One NDJSON line of a /api/task/batch response."""
+    
+    index: int = Field(..., description="Position of the point in the request")
+    id: Optional[str] = Field(None, description="Caller's identifier")
+    lat: float = Field(..., description="Requested latitude")
+    lon: float = Field(..., description="Requested longitude")
+    area_id: Optional[str] = Field(None, description="Tile area the point snapped to")
+    date: Optional[str] = Field(None, description="Tile date the point snapped to")
+    distance_km: Optional[float] = Field(None, description="Distance to the tile (0 inside it)")
+    stats: Optional[BuildingStats] = Field(None, description="Statistics of the whole tile")
+    local: Optional[LocalStats] = Field(None, description="Statistics around the point (with radius_m)")
+    error: Optional[str] = Field(None, description="Why this point has no result")
+
+
+class JobResponse(BaseModel):
+    """Status of a background tasking job."""
+    
+    job_id: str = Field(..., description="Job identifier")
+    status: str = Field(..., description="queued, running, done or failed")
+    stage: Optional[str] = Field(None, description="Pipeline stage currently running")
+    area_id: Optional[str] = Field(None, description="Tile area the request snapped to")
+    date: Optional[str] = Field(None, description="Tile date the request snapped to")
+    deduplicated: bool = Field(False, description="Attached to an identical in-flight job")
+    error: Optional[str] = Field(None, description="Failure message")
+    result: Optional[TaskResponse] = Field(None, description="Result once done")
+
+
+class ChangeSeries(BaseModel):
+    """Columnar change between consecutive dates (one entry per pair)."""
+    
+    from_: List[str] = Field(..., alias="from", description="Earlier date of each pair")
+    to: List[str] = Field(..., description="Later date of each pair")
+    new_buildings: List[int]
+    removed_buildings: List[int]
+    unchanged_buildings: List[int]
+    percent_change: List[float]
+    net_built_area_change_km2: List[float]
+    activity_score: List[float]
+
+
+class TimeSeriesResponse(BaseModel):
+    """Columnar building statistics over every date of an area."""
+    
+    area_id: str = Field(..., description="Area identifier")
+    dates: List[str] = Field(..., description="Acquisition dates, ascending")
+    building_count: List[int]
+    built_area_km2: List[float]
+    density_per_km2: List[float]
+    avg_building_size_m2: List[Optional[float]]
+    change: ChangeSeries = Field(..., description="Change between consecutive dates")
 
 
 class AreaInfo(BaseModel):
@@ -62,9 +168,52 @@ class AreaInfo(BaseModel):
     tile_count: int = Field(..., description="Number of available tiles")
 
 
+class CacheStats(BaseModel):
+    """In-process cache counters."""
+    
+    entries: int = Field(..., description="Number of cached stage results")
+    bytes: int = Field(..., description="Estimated bytes held")
+    max_bytes: int = Field(..., description="Configured byte budget")
+    hits: int = Field(..., description="Cache hits since startup")
+    misses: int = Field(..., description="Cache misses since startup")
+    evictions: int = Field(..., description="LRU evictions since startup")
+    coalesced: int = Field(0, description="Misses that waited on another request's computation")
+
+
+class CoalescingStats(BaseModel):
+    """Tile request coalescing: pipeline single-flight plus job deduplication."""
+    
+    calls: int = Field(..., description="Tile computations requested of the pipeline single-flight")
+    executions: int = Field(..., description="Computations actually run")
+    coalesced: int = Field(..., description="Single-flight calls that shared another call's computation")
+    in_flight: int = Field(..., description="Computations currently running")
+    coalescing_ratio: float = Field(..., description="Single-flight only: coalesced / calls")
+    jobs_deduplicated: int = Field(
+        0, description="API requests attached to an in-flight job (never reach the single-flight)"
+    )
+    total_coalescing_ratio: float = Field(
+        0.0, description="(coalesced + jobs_deduplicated) / (calls + jobs_deduplicated)"
+    )
+
+
+class InferenceStats(BaseModel):
+    """Dynamic batching counters and histograms."""
+    
+    queue_depth: int = Field(..., description="Windows currently waiting")
+    batches: int = Field(..., description="Forward passes run")
+    items: int = Field(..., description="Windows inferred")
+    batch_size_histogram: Dict[int, int] = Field(..., description="Batch size -> count")
+    queue_depth_histogram: Dict[int, int] = Field(
+        ..., description="Queue depth bucket (next power of two) -> count"
+    )
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
     
     status: str = Field(..., description="Service status")
     version: str = Field(..., description="API version")
     areas_available: int = Field(..., description="Number of areas with imagery")
+    cache: Optional[CacheStats] = Field(None, description="Stage cache counters")
+    inference: Optional[InferenceStats] = Field(None, description="Dynamic batching counters")
+    coalescing: Optional[CoalescingStats] = Field(None, description="Tile request single-flight counters")
@@ -0,0 +1,155 @@
+"""
+Service Container - Shared satintel components used by the API routes.
+
+Components are created lazily on first use and reused across requests.
+"""
+
+from functools import lru_cache
+
+from config.areas import AREAS, get_area_bbox
+from config.settings import settings
+from satintel.analysis import BuildingAnalyzer
+from satintel.cache import LRUCache
+from satintel.change import ChangeDetector
+from satintel.cog import CogStore
+from satintel.executor import StageExecutor
+from satintel.imagery import ImageryManager
+from satintel.jobs import JobManager
+from satintel.maptiles import MapTileCache, MapTileRenderer
+from satintel.models import BuildingDetector, PrecomputedMaskLoader
+from satintel.pipeline import TaskPipeline
+from satintel.result_store import ResultStore
+from satintel.tile_index import TileIndex
+from satintel.timeseries import TimeSeriesAnalyzer
+from satintel.tile_store import DecodedTileStore
+
+
+@lru_cache(maxsize=None)
+def get_imagery_manager() -> ImageryManager:
+    """Get the shared ImageryManager backed by the persistent tile index."""
+    index = TileIndex(
+        settings.metadata_dir / "tile_index.json",
+        cell_size_deg=settings.tile_index_cell_deg
+    )
+    tile_store = None
+    if settings.use_decoded_tile_store:
+        tile_store = DecodedTileStore(
+            settings.cache_dir / "tiles",
+            verify_hash=settings.tile_store_verify_hash,
+            max_open=settings.tile_store_max_open
+        )
+    cog_store = None
+    if settings.use_cog_store:
+        cog_store = CogStore(
+            settings.cog_dir,
+            blocksize=settings.cog_blocksize,
+            compress=settings.cog_compress
+        )
+    return ImageryManager(
+        settings.data_dir,
+        area_bboxes={area_id: get_area_bbox(area_id) for area_id in AREAS},
+        index=index,
+        refresh_interval=settings.tile_index_refresh_seconds,
+        max_snap_distance_km=settings.snap_max_distance_km,
+        tile_store=tile_store,
+        cog_store=cog_store
+    )
+
+
+@lru_cache(maxsize=None)
+def get_stage_cache() -> LRUCache:
+    """Get the in-process cache shared by every request."""
+    return LRUCache(settings.memory_cache_bytes)
+
+
+@lru_cache(maxsize=None)
+def get_stage_executor() -> StageExecutor:
+    """Get the shared thread/process pools that pipeline stages run on."""
+    return StageExecutor(
+        thread_workers=settings.executor_thread_workers,
+        process_workers=settings.executor_process_workers,
+        placement=settings.stage_placement
+    )
+
+
+@lru_cache(maxsize=None)
+def get_detector() -> BuildingDetector:
+    """Get the shared BuildingDetector, loading weights if configured."""
+    detector = BuildingDetector(
+        settings.model_path,
+        min_building_size=settings.min_building_size_pixels,
+        tile_size=settings.inference_tile_size,
+        tile_overlap=settings.inference_tile_overlap,
+        batch_size=settings.inference_batch_size
+    )
+    if settings.model_path is not None and settings.model_path.exists():
+        detector.load_model(
+            settings.model_artifact,
+            settings.inference_intra_op_threads,
+            settings.inference_inter_op_threads
+        )
+        if settings.inference_dynamic_batching:
+            detector.enable_batching(settings.inference_max_batch_size, settings.inference_max_wait_ms)
+    return detector
+
+
+@lru_cache(maxsize=None)
+def get_pipeline() -> TaskPipeline:
+    """Get the shared tasking pipeline."""
+    return TaskPipeline(
+        imagery=get_imagery_manager(),
+        detector=get_detector(),
+        mask_loader=PrecomputedMaskLoader(settings.masks_dir),
+        analyzer=BuildingAnalyzer(
+            settings.pixel_resolution,
+            overlay_mode=settings.overlay_mode,
+            outline_thickness=settings.overlay_outline_thickness,
+            overlay_format=settings.overlay_format,
+            overlay_level=settings.overlay_level,
+            overlay_max_bytes=settings.overlay_max_bytes
+        ),
+        cache=get_stage_cache(),
+        executor=get_stage_executor(),
+        change_detector=ChangeDetector(
+            settings.pixel_resolution,
+            iou_threshold=settings.change_iou_threshold,
+            min_building_size=settings.min_building_size_pixels
+        ) if settings.enable_change_detection else None,
+        result_store=ResultStore(
+            settings.cache_dir / "results",
+            max_bytes=settings.result_cache_max_bytes,
+            max_age_seconds=settings.result_cache_max_age_seconds
+        ),
+        use_precomputed_masks=settings.use_precomputed_masks,
+        max_tile_size=settings.max_tile_size,
+        overlay_alpha=settings.default_overlay_alpha,
+        stage_timings=settings.task_stage_timings,
+        persist_masks=settings.persist_detected_masks
+    )
+
+
+@lru_cache(maxsize=None)
+def get_job_manager() -> JobManager:
+    """Get the shared background job queue."""
+    return JobManager(max_workers=settings.job_workers, max_finished=settings.job_retention)
+
+
+@lru_cache(maxsize=None)
+def get_timeseries() -> TimeSeriesAnalyzer:
+    """Get the shared time-series analyzer (entries persisted under cache_dir/timeseries)."""
+    return TimeSeriesAnalyzer(get_pipeline(), settings.cache_dir / "timeseries")
+
+
+@lru_cache(maxsize=None)
+def get_map_tiles() -> MapTileRenderer:
+    """Get the shared XYZ tile renderer (rendered tiles cached under cache_dir/maptiles)."""
+    return MapTileRenderer(
+        get_pipeline(),
+        MapTileCache(
+            settings.cache_dir / "maptiles",
+            max_bytes=settings.map_tile_cache_bytes,
+            memory_bytes=settings.map_tile_memory_bytes
+        ),
+        building_alpha=settings.default_overlay_alpha,
+        png_compress_level=settings.map_tile_png_compress_level
+    )
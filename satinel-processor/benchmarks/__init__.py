@@ -0,0 +1 @@
+"""Performance benchmarks for the satintel pipeline (see benchmarks/run.py)."""
@@ -0,0 +1,264 @@
+"""
+Pipeline Benchmark Suite - Per-stage and end-to-end timings with baseline comparison.
+
+Times each tasking stage on a synthetic tile of configurable size and
+building density, plus the full POST /api/task -> job -> result path through
+a local client, and writes machine-readable JSON. With a baseline file the
+run fails (exit code 1) when any benchmark's median regresses beyond the
+tolerance.
+
+Usage (from the project root):
+    python -m benchmarks.run [--size 1024] [--density 0.25] [--repeat 7]
+                             [--output bench.json] [--baseline benchmarks/baseline.json]
+                             [--tolerance 0.2] [--save-baseline]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.synthetic import BENCH_AREA, BENCH_BBOX, stand_in_model, write_dataset
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+SCHEMA_VERSION = 1
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    """
+    Time a callable after one warm-up run.
+
+    Args:
+        fn: Operation to time
+        repeat: Timed runs
+        setup: Untimed call before every run (e.g. to clear caches)
+
+    Returns:
+        Dict with median_ms, p95_ms, min_ms and runs
+    """
+    if setup is not None:
+        setup()
+    fn()
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return {
+        "median_ms": statistics.median(times),
+        "p95_ms": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+        "min_ms": times[0],
+        "runs": repeat,
+    }
+
+
+def run_suite(size: int, density: float, repeat: int, extra_areas: int = 200) -> Dict:
+    """
+    Run every benchmark on a fresh synthetic data directory.
+
+    Args:
+        size: Tile edge in pixels
+        density: Building pixel fraction
+        repeat: Timed runs per benchmark
+        extra_areas: Additional indexed areas for tile lookups
+
+    Returns:
+        Report dict with meta and results (name -> timing stats)
+    """
+    from satintel.analysis import BuildingAnalyzer
+    from satintel.imagery import ImageryManager
+    from satintel.models import BuildingDetector, PrecomputedMaskLoader
+    from satintel.tile_store import DecodedTileStore
+
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="satintel-bench-") as tmp:
+        data_dir = Path(tmp)
+        bboxes = write_dataset(data_dir, size, density, extra_areas=extra_areas)
+        lat = (BENCH_BBOX[1] + BENCH_BBOX[3]) / 2
+        lon = (BENCH_BBOX[0] + BENCH_BBOX[2]) / 2
+        date = "2023-06-01"
+
+        imagery = ImageryManager(data_dir, area_bboxes=bboxes, refresh_interval=3600)
+        stored = ImageryManager(
+            data_dir, area_bboxes=bboxes, refresh_interval=3600,
+            tile_store=DecodedTileStore(data_dir / "cache" / "tiles")
+        )
+        detector = BuildingDetector(tile_size=512, tile_overlap=64, batch_size=4)
+        detector.model = stand_in_model
+        analyzer = BuildingAnalyzer(overlay_format="png")
+        mask = PrecomputedMaskLoader(data_dir / "masks").load_mask(BENCH_AREA, date)
+        image = imagery.load_image(BENCH_AREA, date)
+        table = detector.mask_to_polygons(mask)
+
+        results["snap_to_tile"] = measure(lambda: imagery.snap_to_tile(lat, lon), repeat)
+        results["load_image/decode"] = measure(lambda: imagery.load_image(BENCH_AREA, date), repeat)
+        results["load_image/memmap"] = measure(lambda: np.asarray(stored.load_image(BENCH_AREA, date)).sum(), repeat)
+        results["preprocess_image"] = measure(lambda: imagery.preprocess_image(image, 1024), repeat)
+        results["detect_buildings"] = measure(lambda: detector.detect_buildings(image), repeat)
+        results["mask_to_polygons"] = measure(lambda: detector.mask_to_polygons(mask), repeat)
+        results["summarize_buildings"] = measure(lambda: analyzer.summarize_buildings(mask, table), repeat)
+        results["create_overlay"] = measure(lambda: analyzer.create_overlay(image, mask), repeat)
+        results.update(_api_task(data_dir, bboxes, lat, lon, repeat))
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "size": size,
+            "density": density,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def _api_task(data_dir: Path, bboxes: Dict, lat: float, lon: float, repeat: int) -> Dict[str, Dict]:
+    """POST /api/task and follow the job to completion, with cold and warm caches."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.routes import jobs, task
+    from satintel.analysis import BuildingAnalyzer
+    from satintel.cache import LRUCache
+    from satintel.imagery import ImageryManager
+    from satintel.jobs import JobManager
+    from satintel.models import BuildingDetector, PrecomputedMaskLoader
+    from satintel.pipeline import TaskPipeline
+
+    def make_pipeline():
+        return TaskPipeline(
+            ImageryManager(data_dir, area_bboxes=bboxes, refresh_interval=3600),
+            BuildingDetector(),
+            PrecomputedMaskLoader(data_dir / "masks"),
+            BuildingAnalyzer(overlay_format="png"),
+            cache=LRUCache(1 << 30),
+            overlay_dir=data_dir / "overlays"
+        )
+
+    manager = JobManager(max_workers=2)
+    state = {"pipeline": make_pipeline()}
+    originals = (task.get_pipeline, task.get_job_manager, jobs.get_job_manager)
+    task.get_pipeline = lambda: state["pipeline"]
+    task.get_job_manager = jobs.get_job_manager = lambda: manager
+    client = TestClient(app)
+
+    def request():
+        job_id = client.post("/api/task", json={"lat": lat, "lon": lon}).json()["job_id"]
+        # The event stream ends when the job finishes, like the frontend's EventSource
+        client.get(f"/api/jobs/{job_id}/events")
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] != "done":
+            raise RuntimeError(f"Task failed: {job['error']}")
+
+    def reset():
+        state["pipeline"] = make_pipeline()
+
+    try:
+        return {
+            "api_task/cold": measure(request, repeat, setup=reset),
+            "api_task/warm": measure(request, repeat),
+        }
+    finally:
+        task.get_pipeline, task.get_job_manager, jobs.get_job_manager = originals
+        manager.shutdown()
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """
+    Benchmarks whose median got slower than the baseline allows.
+
+    Args:
+        report: Current run
+        baseline: Stored run with the same size and density
+        tolerance: Allowed slowdown as a fraction (0.2 = 20%)
+
+    Returns:
+        Rows of {'name', 'baseline_ms', 'current_ms', 'ratio'} for regressions
+    """
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = current["median_ms"] / max(previous["median_ms"], 1e-9)
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "name": name,
+                "baseline_ms": previous["median_ms"],
+                "current_ms": current["median_ms"],
+                "ratio": ratio,
+            })
+    return regressions
+
+
+def main(argv=None) -> int:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Benchmark the tasking pipeline")
+    parser.add_argument('--size', type=int, default=1024, help="Tile edge in pixels (default: 1024)")
+    parser.add_argument('--density', type=float, default=0.25, help="Building pixel fraction (default: 0.25)")
+    parser.add_argument('--repeat', type=int, default=7, help="Timed runs per benchmark (default: 7)")
+    parser.add_argument('--output', type=Path, help="Write the JSON report here")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown (default: 0.2 = 20%%)")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the baseline")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.size, args.density, args.repeat)
+
+    baseline = None
+    if args.baseline.exists() and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        same_workload = all(baseline["meta"].get(k) == report["meta"][k] for k in ("size", "density"))
+        if not same_workload:
+            print(f"⚠️  Baseline {args.baseline} used a different size/density; not comparing")
+            baseline = None
+
+    print(f"{'benchmark':24s} {'median ms':>10s} {'p95 ms':>10s} {'baseline':>10s}")
+    print("-" * 58)
+    for name, stats in report["results"].items():
+        previous = baseline["results"].get(name) if baseline else None
+        reference = f"{previous['median_ms']:10.2f}" if previous else f"{'':>10s}"
+        print(f"{name:24s} {stats['median_ms']:10.2f} {stats['p95_ms']:10.2f} {reference}")
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        report["regressions"] = regressions
+        if args.output is not None:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for row in regressions:
+                print(f"  {row['name']}: {row['baseline_ms']:.2f} -> {row['current_ms']:.2f} ms ({row['ratio']:.2f}x)")
+            return 1
+        print(f"\n✓ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
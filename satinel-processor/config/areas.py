@@ -42,18 +42,42 @@ def get_all_areas():
     return AREAS
 
 
-def find_nearest_area(lat: float, lon: float):
-    """Find nearest area to given coordinates."""
+def get_area_bbox(area_id: str):
+    """
+    Approximate bbox [lon_min, lat_min, lon_max, lat_max] for an area,
+    derived from its center and tile_coverage_km.
+    """
     import math
+
+    config = AREAS.get(area_id)
+    if config is None:
+        return None
+
+    half_km = config['tile_coverage_km'] / 2
+    dlat = half_km / 111.195
+    dlon = half_km / (111.195 * max(math.cos(math.radians(config['center_lat'])), 1e-6))
+    return [
+        config['center_lon'] - dlon,
+        config['center_lat'] - dlat,
+        config['center_lon'] + dlon,
+        config['center_lat'] + dlat,
+    ]
+
+
+def find_nearest_area(lat: float, lon: float):
+    """
+    Find nearest configured area to given coordinates (haversine distance).
+
+    Only scans the handful of configured AREAS; tile-level lookups go through
+    satintel.tile_index.TileIndex instead.
+    """
+    from satintel.tile_index import haversine_km
     
     nearest = None
     min_distance = float('inf')
     
     for area_id, config in AREAS.items():
-        # Calculate approximate distance
-        dlat = lat - config['center_lat']
-        dlon = lon - config['center_lon']
-        distance = math.sqrt(dlat**2 + dlon**2)
+        distance = haversine_km(lat, lon, config['center_lat'], config['center_lon'])
         
         if distance < min_distance:
             min_distance = distance
@@ -5,7 +5,7 @@ Loads environment variables and application settings
 
 from pathlib import Path
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -30,14 +30,95 @@ class Settings(BaseSettings):
     
     # Model settings
     model_path: Optional[Path] = None
+    model_artifact: str = "auto"  # auto | pytorch | torchscript | onnx | onnx-int8-dynamic | onnx-int8-static
+    inference_intra_op_threads: Optional[int] = None
+    inference_inter_op_threads: Optional[int] = None
     use_precomputed_masks: bool = True
+    persist_detected_masks: bool = True  # save model masks under masks_dir for reuse
     pixel_resolution: float = 10.0
     
     # Processing
     max_tile_size: int = 1024
+    inference_tile_size: Optional[int] = 512  # None = whole-image inference
+    inference_tile_overlap: int = 64
+    inference_batch_size: int = 4
     min_building_size_pixels: int = 10
     default_overlay_alpha: float = 0.5
     
+    # Dynamic batching of forward passes across concurrent requests
+    inference_dynamic_batching: bool = True
+    inference_max_batch_size: int = 8
+    inference_max_wait_ms: float = 5.0
+    
+    # Overlay rendering and encoding
+    overlay_mode: str = "fill"  # fill | outline
+    overlay_outline_thickness: int = 1
+    overlay_format: str = "png"  # png | jpeg | webp | auto (lossy formats are opt-in)
+    overlay_level: Optional[int] = None  # PNG zlib level or JPEG/WebP quality
+    overlay_max_bytes: Optional[int] = 2 * 1024 * 1024  # size budget for auto
+    
+    # Change detection against the previous date of a tile
+    enable_change_detection: bool = True
+    change_iou_threshold: float = 0.3
+    
+    # Tile index
+    tile_index_cell_deg: float = 0.25
+    tile_index_refresh_seconds: float = 30.0
+    snap_max_distance_km: float = 50.0
+    
+    # Decoded tile store (memory-mapped .npy sidecars under cache_dir/tiles)
+    use_decoded_tile_store: bool = True
+    tile_store_verify_hash: bool = False
+    tile_store_max_open: int = 256  # memory-mapped tiles kept open (LRU)
+    
+    # Cloud-Optimized GeoTIFFs (windowed reads at any overview level)
+    use_cog_store: bool = True
+    cog_dir: Path = Path("data/cog")
+    cog_blocksize: int = 256
+    cog_compress: str = "deflate"  # deflate | zstd | lzw
+    
+    # In-process stage cache (images, masks, polygons, stats)
+    memory_cache_bytes: int = 512 * 1024 * 1024
+    
+    # Persistent result store (cache_dir/results)
+    result_cache_max_bytes: int = 1024 * 1024 * 1024
+    result_cache_max_age_seconds: Optional[float] = 7 * 24 * 3600
+    
+    # Stage execution: thread pool for GIL-releasing NumPy/OpenCV/ONNX work,
+    # process pool for pure-Python stages (arrays move via shared memory)
+    executor_thread_workers: Optional[int] = None  # None = CPU count
+    executor_process_workers: Optional[int] = None  # None = CPU count, 0 = threads only
+    stage_placement: Dict[str, str] = {
+        "decode": "thread",
+        "detect": "thread",  # inline | thread
+        "label": "thread",
+        "trace": "process",
+        "overlay": "thread",
+    }
+    
+    # XYZ map tiles (/api/tiles, disk cache under cache_dir/maptiles)
+    map_tile_cache_bytes: int = 512 * 1024 * 1024
+    map_tile_memory_bytes: int = 64 * 1024 * 1024
+    map_tile_max_age_seconds: int = 3600
+    map_tile_png_compress_level: int = 1  # 0-9, higher is smaller and slower
+    
+    # Instrumentation (/metrics; per-stage breakdown in task results)
+    task_stage_timings: bool = True
+    
+    # On-demand profiling of single /api/task requests (?profile=1 or
+    # X-Profile: 1; only honoured when debug is on)
+    profile_dir: Path = Path("data/cache/profiles")
+    profile_sample_interval_ms: float = 1.0
+    profile_keep: int = 50
+    
+    # POST /api/task/batch
+    batch_max_points: int = 10000
+    batch_tile_workers: int = 4
+    
+    # Background jobs for POST /api/task
+    job_workers: int = 2
+    job_retention: int = 1000  # finished jobs kept for polling
+    
     # Logging
     log_level: str = "INFO"
     log_file: Path = Path("logs/asip.log")
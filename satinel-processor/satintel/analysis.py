@@ -5,38 +5,68 @@ Responsibilities:
 - Count buildings from masks/polygons
 - Calculate built-up area, density metrics
 - Generate summary statistics
-- Create overlay visualizations
+- Neighbourhood statistics for many points on a tile in one pass
+- Create overlay visualizations (filled or outlined) and encode them
+- Record summary, blend and encode latencies (satintel.metrics)
 """
 
+import os
+import threading
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from pathlib import Path
 
+from satintel import metrics
+from satintel.overlay import DEFAULT_CANDIDATES, SUFFIXES, blend, encode, encode_within, outline_mask
+from satintel.table import BuildingTable
+
+Buildings = Union[BuildingTable, List[Dict]]
+
 
 class BuildingAnalyzer:
     """Analyzes building detection results and computes metrics."""
     
-    def __init__(self, pixel_resolution: float = 10.0):
+    def __init__(
+        self,
+        pixel_resolution: float = 10.0,
+        overlay_mode: str = "fill",
+        outline_thickness: int = 1,
+        overlay_format: str = "png",
+        overlay_level: Optional[int] = None,
+        overlay_max_bytes: Optional[int] = 2 * 1024 * 1024,
+        overlay_candidates: Sequence[Tuple[str, int]] = DEFAULT_CANDIDATES
+    ):
         """
         Initialize analyzer.
         
         Args:
             pixel_resolution: Meters per pixel (default 10m for Sentinel-2)
+            overlay_mode: 'fill' highlights whole buildings, 'outline' their edges
+            outline_thickness: Outline width in pixels
+            overlay_format: 'png' (lossless, default), 'jpeg', 'webp' or 'auto'
+            overlay_level: PNG zlib level or JPEG/WebP quality for a fixed format
+            overlay_max_bytes: Size budget for 'auto' (None takes the first candidate)
+            overlay_candidates: (format, level) pairs 'auto' tries in order
         """
         self.pixel_resolution = pixel_resolution
+        self.overlay_mode = overlay_mode
+        self.outline_thickness = outline_thickness
+        self.overlay_format = overlay_format
+        self.overlay_level = overlay_level
+        self.overlay_max_bytes = overlay_max_bytes
+        self.overlay_candidates = tuple(tuple(c) for c in overlay_candidates)
     
-    def count_buildings(self, polygons: List[Dict]) -> int:
+    def count_buildings(self, polygons: Buildings) -> int:
         """
         Count number of detected buildings.
         
         Args:
-            polygons: List of building polygons
+            polygons: BuildingTable (or legacy list of polygon dicts)
         
         Returns:
             Total building count
         """
-        # TODO: Implement building counting
-        pass
+        return len(polygons)
     
     def calculate_built_area(self, mask: np.ndarray) -> float:
         """
@@ -48,8 +78,7 @@ class BuildingAnalyzer:
         Returns:
             Built area in km²
         """
-        # TODO: Implement area calculation
-        pass
+        return float(np.count_nonzero(mask)) * self.pixel_resolution ** 2 / 1e6
     
     def calculate_density(self, building_count: int, total_area_km2: float) -> float:
         """
@@ -62,16 +91,18 @@ class BuildingAnalyzer:
         Returns:
             Density value
         """
-        # TODO: Implement density calculation
-        pass
+        if total_area_km2 <= 0:
+            return 0.0
+        return building_count / total_area_km2
     
-    def summarize_buildings(self, mask: np.ndarray, polygons: List[Dict]) -> Dict:
+    @metrics.timed("summarize")
+    def summarize_buildings(self, mask: np.ndarray, polygons: Buildings) -> Dict:
         """
         Generate comprehensive building statistics.
         
         Args:
             mask: Binary building mask
-            polygons: Building polygons
+            polygons: BuildingTable (or legacy list of polygon dicts)
         
         Returns:
             Dict containing:
@@ -81,28 +112,119 @@ class BuildingAnalyzer:
                 - avg_building_size_m2: float
                 - largest_building_m2: float
         """
-        # TODO: Implement statistics summary
-        pass
+        pixel_area_m2 = self.pixel_resolution ** 2
+        tile_area_km2 = mask.shape[0] * mask.shape[1] * pixel_area_m2 / 1e6
+        building_count = self.count_buildings(polygons)
+        if not isinstance(polygons, BuildingTable):
+            polygons = BuildingTable.from_polygons(polygons)
+        area_px = polygons.area_px
+        
+        return {
+            "building_count": building_count,
+            "built_area_km2": self.calculate_built_area(mask),
+            "density_per_km2": self.calculate_density(building_count, tile_area_km2),
+            "avg_building_size_m2": float(area_px.mean() * pixel_area_m2) if building_count else None,
+            "largest_building_m2": float(area_px.max() * pixel_area_m2) if building_count else None,
+        }
     
+    @metrics.timed("summarize_points")
+    def summarize_points(
+        self,
+        mask: np.ndarray,
+        polygons: Buildings,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        radius_px: float
+    ) -> Dict[str, np.ndarray]:
+        """
+        Statistics of the square neighbourhood around many points at once.
+        
+        Built pixels and building centroids are each turned into one
+        integral image, so every point costs four lookups regardless of the
+        radius or the number of points.
+        
+        Args:
+            mask: Binary building mask (H, W)
+            polygons: BuildingTable (or legacy list of polygon dicts)
+            rows: (N,) pixel rows of the points (clipped to the tile)
+            cols: (N,) pixel columns of the points (clipped to the tile)
+            radius_px: Half-width of each window in pixels
+        
+        Returns:
+            Columns of length N:
+                - building_count: buildings whose centroid lies in the window
+                - built_area_km2: built area inside the window
+                - window_area_km2: window area after clipping to the tile
+                - density_per_km2: building_count / window_area_km2
+                - on_building: whether the point itself is on a built pixel
+        """
+        if not isinstance(polygons, BuildingTable):
+            polygons = BuildingTable.from_polygons(polygons)
+        height, width = mask.shape[:2]
+        rows = np.clip(np.asarray(rows, dtype=np.int64), 0, height - 1)
+        cols = np.clip(np.asarray(cols, dtype=np.int64), 0, width - 1)
+        radius = int(round(radius_px))
+        
+        # Windows [r0, r1) x [c0, c1) in integral-image coordinates
+        r0, r1 = np.maximum(rows - radius, 0), np.minimum(rows + radius + 1, height)
+        c0, c1 = np.maximum(cols - radius, 0), np.minimum(cols + radius + 1, width)
+        
+        built = _integral(mask > 0)
+        centroids = np.zeros((height, width), dtype=np.int32)
+        if len(polygons):
+            cx = np.clip(polygons.centroid[:, 0].astype(np.int64), 0, width - 1)
+            cy = np.clip(polygons.centroid[:, 1].astype(np.int64), 0, height - 1)
+            np.add.at(centroids, (cy, cx), 1)
+        counts = _integral(centroids)
+        
+        def window_sum(table: np.ndarray) -> np.ndarray:
+            return table[r1, c1] - table[r0, c1] - table[r1, c0] + table[r0, c0]
+        
+        pixel_area_km2 = self.pixel_resolution ** 2 / 1e6
+        building_count = window_sum(counts)
+        window_area_km2 = (r1 - r0) * (c1 - c0) * pixel_area_km2
+        return {
+            "building_count": building_count,
+            "built_area_km2": window_sum(built) * pixel_area_km2,
+            "window_area_km2": window_area_km2,
+            "density_per_km2": building_count / window_area_km2,
+            "on_building": mask[rows, cols] > 0,
+        }
+    
+    @metrics.timed("blend")
     def create_overlay(
         self, 
         base_image: np.ndarray, 
         mask: np.ndarray,
-        alpha: float = 0.5
+        alpha: float = 0.5,
+        color: Tuple[int, int, int] = (255, 0, 0),
+        mode: Optional[str] = None,
+        labels: Optional[np.ndarray] = None,
+        out: Optional[np.ndarray] = None
     ) -> np.ndarray:
         """
         Create visualization overlay of buildings on satellite image.
         
+        Blending runs in uint8 fixed-point (see satintel.overlay.blend).
+        
         Args:
             base_image: Original satellite image
             mask: Building mask
             alpha: Transparency of overlay (0-1)
+            color: RGB highlight color
+            mode: 'fill' or 'outline' (default: overlay_mode)
+            labels: Label image for outlines; outlines the mask when omitted
+            out: Preallocated (H, W, 3) uint8 output buffer (optional)
         
         Returns:
             Overlay image with highlighted buildings
         """
-        # TODO: Implement overlay generation
-        pass
+        mode = mode or self.overlay_mode
+        if mode == "outline":
+            mask = outline_mask(labels if labels is not None else mask, self.outline_thickness)
+        elif mode != "fill":
+            raise ValueError(f"Unknown overlay mode '{mode}'")
+        return blend(base_image, mask, color, alpha, out)
     
     def save_overlay(
         self, 
@@ -110,15 +232,41 @@ class BuildingAnalyzer:
         area_id: str, 
         date: str,
         output_dir: Path
-    ):
+    ) -> Path:
         """
         Save overlay image to disk.
         
+        The encoding is overlay_format, or with 'auto' the first of
+        overlay_candidates whose output fits overlay_max_bytes.
+        
         Args:
             overlay: Overlay image
             area_id: Area identifier
             date: Date string
             output_dir: Output directory path
+        
+        Returns:
+            Path of the written image (<output_dir>/<area>/<date>.<png|jpg|webp>)
         """
-        # TODO: Implement overlay saving
-        pass
+        with metrics.timer("encode"):
+            if self.overlay_format == "auto":
+                format, data = encode_within(overlay, self.overlay_max_bytes, self.overlay_candidates)
+            else:
+                format, data = self.overlay_format, encode(overlay, self.overlay_format, self.overlay_level)
+        
+        path = output_dir / area_id / f"{date}{SUFFIXES[format]}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Writer-unique temp name: a profiled run may save the same overlay
+        # concurrently with a regular request
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return path
+
+
+def _integral(values: np.ndarray) -> np.ndarray:
+    """(H + 1, W + 1) summed-area table with a zero first row and column."""
+    table = np.zeros((values.shape[0] + 1, values.shape[1] + 1), dtype=np.int64)
+    np.cumsum(values, axis=0, dtype=np.int64, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return table
@@ -0,0 +1,359 @@
+"""
+Batch Module - Offline precompute of masks and building statistics.
+
+Responsibilities:
+- Walk every indexed area/date under data/imagery (optionally filtered)
+- Detect buildings (or reuse a stored mask) and summarize them on a process
+  pool, one tile per task
+- Save detected masks through PrecomputedMaskLoader.save_mask so the API
+  loads them instead of running the model
+- Maintain a columnar summary of per-tile statistics (Parquet with pyarrow,
+  columnar JSON otherwise) and skip tiles whose row is still up to date
+- Command: python -m satintel.batch [--data-dir data] [--masks-dir ...] [--areas ...] [--workers N]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SUMMARY_COLUMNS = (
+    "area_id", "date", "building_count", "built_area_km2", "density_per_km2",
+    "avg_building_size_m2", "largest_building_m2", "mask_source", "model_version",
+    "mask_version", "source_mtime_ns", "processed_at",
+)
+
+# Per-process state built by _init_worker
+_worker: Dict = {}
+
+
+def read_summary(path: Path) -> Dict[tuple, Dict]:
+    """
+    Load a summary file.
+
+    Args:
+        path: .parquet or .json summary
+
+    Returns:
+        (area_id, date) -> row dict (empty if the file does not exist)
+    """
+    if not path.exists():
+        return {}
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        columns = pq.read_table(str(path)).to_pydict()
+    else:
+        with open(path) as f:
+            columns = json.load(f)
+    count = len(columns.get("area_id", []))
+    rows = [{name: columns[name][i] for name in SUMMARY_COLUMNS if name in columns} for i in range(count)]
+    return {(row["area_id"], row["date"]): row for row in rows}
+
+
+def write_summary(path: Path, rows: Dict[tuple, Dict]):
+    """
+    Write summary rows, sorted by area and date, atomically.
+
+    Args:
+        path: .parquet (requires pyarrow) or .json destination
+        rows: (area_id, date) -> row dict
+    """
+    ordered = [rows[key] for key in sorted(rows)]
+    columns = {name: [row.get(name) for row in ordered] for name in SUMMARY_COLUMNS}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if path.suffix == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.table(columns), str(tmp_path))
+    else:
+        with open(tmp_path, "w") as f:
+            json.dump(columns, f)
+    os.replace(tmp_path, path)
+
+
+def default_summary_path(data_dir: Path) -> Path:
+    """<data_dir>/metadata/building_summary.parquet, or .json without pyarrow."""
+    try:
+        import pyarrow  # noqa: F401
+        suffix = ".parquet"
+    except ImportError:
+        suffix = ".json"
+    return data_dir / "metadata" / f"building_summary{suffix}"
+
+
+def is_up_to_date(
+    row: Optional[Dict], source: Path, mask_path: Optional[Path], mask_version: Optional[str]
+) -> bool:
+    """
+    Whether a summary row still describes the source image under the current detector.
+
+    Args:
+        row: Summary row (None if the tile was never processed)
+        source: Source image path
+        mask_path: Stored mask path (None if there is none)
+        mask_version: mask_version of the detector the workers would load,
+            None without a model (stored masks are then all there is)
+
+    Returns:
+        True if recomputing would produce the same row
+    """
+    return (
+        row is not None
+        and mask_path is not None
+        and row.get("source_mtime_ns") == source.stat().st_mtime_ns
+        and (
+            row.get("mask_source") == "precomputed"
+            or mask_version is None
+            or row.get("mask_version") == mask_version
+        )
+    )
+
+
+def current_mask_version(config: Dict) -> Optional[str]:
+    """
+    mask_version the workers' detector will have, without loading the model.
+
+    Args:
+        config: Worker settings (see build_config)
+
+    Returns:
+        Version string, or None when no model can be loaded
+    """
+    from satintel import runtime
+    from satintel.models import BuildingDetector
+
+    if config["model_path"] is None or not Path(config["model_path"]).exists():
+        return None
+    detector = BuildingDetector(
+        config["model_path"], tile_size=config["tile_size"], tile_overlap=config["tile_overlap"]
+    )
+    detector.artifact = config["model_artifact"]
+    if detector.artifact == "auto":
+        try:
+            detector.artifact = runtime.select_artifact(Path(config["model_path"]))
+        except FileNotFoundError:
+            return None
+    return detector.mask_version
+
+
+def _init_worker(config: Dict):
+    """Build the detector, mask loader and analyzer once per worker process."""
+    from satintel.analysis import BuildingAnalyzer
+    from satintel.models import BuildingDetector, PrecomputedMaskLoader
+
+    detector = BuildingDetector(
+        config["model_path"],
+        min_building_size=config["min_building_size"],
+        tile_size=config["tile_size"],
+        tile_overlap=config["tile_overlap"],
+        batch_size=config["batch_size"]
+    )
+    if config["model_path"] is not None and Path(config["model_path"]).exists():
+        # Cores are shared out across workers instead of each using all of them
+        detector.load_model(config["model_artifact"], config["threads_per_worker"], 1)
+    _worker.update(
+        detector=detector,
+        loader=PrecomputedMaskLoader(Path(config["masks_dir"])),
+        analyzer=BuildingAnalyzer(config["pixel_resolution"]),
+        reuse_masks=config["reuse_masks"],
+    )
+
+
+def process_tile(area_id: str, date: str, source: str, bbox: Optional[List[float]] = None) -> Dict:
+    """
+    Produce the summary row for one tile (runs in a worker process).
+
+    A stored mask newer than the source is reused when allowed and it was
+    produced by the current detector (or by none, e.g. a hand-made mask);
+    otherwise the model runs and its mask is saved.
+
+    Args:
+        area_id: Area identifier
+        date: Date string (YYYY-MM-DD)
+        source: Source image path
+        bbox: Tile footprint, recorded as the mask's geo transform (optional)
+
+    Returns:
+        Summary row
+
+    Raises:
+        RuntimeError: If no mask is stored and no model is loaded
+    """
+    from satintel.imagery import ImageryManager
+    from satintel.labeling import label_buildings
+    from satintel.table import transform_from_bbox
+
+    detector, loader, analyzer = _worker["detector"], _worker["loader"], _worker["analyzer"]
+    source_path = Path(source)
+    mask_path = loader.find_mask(area_id, date)
+    stored = mask_path is not None and mask_path.stat().st_mtime_ns >= source_path.stat().st_mtime_ns
+    # Without a model any stored mask beats none; with one, masks of other versions are stale
+    version = detector.mask_version if detector.model is not None else None
+    stored_version = loader.mask_version(area_id, date) if stored else None
+
+    if _worker["reuse_masks"] and stored and loader.has_mask(area_id, date, version):
+        mask = loader.load_mask(area_id, date)
+        # Only unversioned masks are independent of the model; a reused model
+        # mask must be recomputed after the next model change
+        mask_source = "precomputed" if stored_version is None else "detected"
+    else:
+        if detector.model is None:
+            raise RuntimeError(f"No mask stored for {area_id} on {date} and no model loaded")
+        mask = detector.detect_buildings(ImageryManager.decode_image(source_path))
+        transform = transform_from_bbox(bbox, mask.shape[1], mask.shape[0]) if bbox else None
+        loader.save_mask(mask, area_id, date, transform, detector.mask_version)
+        mask_source = "detected"
+        stored_version = detector.mask_version
+
+    stats = analyzer.summarize_buildings(mask, label_buildings(mask, detector.min_building_size))
+    return {
+        "area_id": area_id,
+        "date": date,
+        **stats,
+        "mask_source": mask_source,
+        "model_version": detector.model_version,
+        "mask_version": stored_version,
+        "source_mtime_ns": source_path.stat().st_mtime_ns,
+        "processed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_batch(
+    data_dir: Path,
+    summary_path: Path,
+    config: Dict,
+    areas: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    workers: Optional[int] = None,
+    force: bool = False
+) -> Dict:
+    """
+    Precompute masks and statistics for every matching tile.
+
+    The summary is rewritten after the run with the new rows merged into
+    the existing ones.
+
+    Args:
+        data_dir: Data directory containing imagery/
+        summary_path: Summary file (.parquet or .json)
+        config: Worker settings (see build_config)
+        areas: Only these areas (all if None)
+        since: Earliest date, inclusive (optional)
+        until: Latest date, inclusive (optional)
+        workers: Process count (default: CPU count)
+        force: Recompute tiles even when their row is up to date
+
+    Returns:
+        Dict with processed, skipped and failed counts and errors
+    """
+    from satintel.imagery import ImageryManager
+    from satintel.models import PrecomputedMaskLoader
+
+    imagery = ImageryManager(data_dir)
+    loader = PrecomputedMaskLoader(Path(config["masks_dir"]))
+    mask_version = current_mask_version(config)
+    rows = read_summary(summary_path)
+
+    pending = []
+    skipped = 0
+    for area_id in areas or imagery.index.areas():
+        for date in imagery.get_available_dates(area_id):
+            if (since and date < since) or (until and date > until):
+                continue
+            source = imagery.get_image_path(area_id, date)
+            if source is None:
+                continue
+            row = rows.get((area_id, date))
+            if not force and is_up_to_date(row, source, loader.find_mask(area_id, date), mask_version):
+                skipped += 1
+                continue
+            pending.append((area_id, date, str(source), imagery.get_tile_bbox(area_id, date)))
+
+    workers = workers or os.cpu_count() or 1
+    config = {**config, "threads_per_worker": max(1, (os.cpu_count() or 1) // workers)}
+    summary = {"processed": 0, "skipped": skipped, "failed": 0, "errors": []}
+    if pending:
+        # spawn: workers must not inherit a forked copy of loaded models or threads
+        with ProcessPoolExecutor(
+            min(workers, len(pending)), mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(config,)
+        ) as pool:
+            futures = {pool.submit(process_tile, *job): job for job in pending}
+            for future in as_completed(futures):
+                area_id, date = futures[future][:2]
+                try:
+                    row = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    summary["errors"].append(f"{area_id}/{date}: {e}")
+                    print(f"  ✗ {area_id}/{date}: {e}")
+                    continue
+                rows[(area_id, date)] = row
+                summary["processed"] += 1
+                print(f"  ✓ {area_id}/{date}: {row['building_count']} buildings ({row['mask_source']})")
+        write_summary(summary_path, rows)
+    return summary
+
+
+def build_config(data_dir: Path, reuse_masks: bool = True, masks_dir: Optional[Path] = None) -> Dict:
+    """
+    Worker settings from config.settings.
+
+    Masks go to settings.masks_dir (MASKS_DIR), where the API reads them,
+    unless masks_dir overrides it.
+    """
+    from config.settings import settings
+
+    return {
+        "model_path": str(settings.model_path) if settings.model_path is not None else None,
+        "model_artifact": settings.model_artifact,
+        "min_building_size": settings.min_building_size_pixels,
+        "tile_size": settings.inference_tile_size,
+        "tile_overlap": settings.inference_tile_overlap,
+        "batch_size": settings.inference_batch_size,
+        "pixel_resolution": settings.pixel_resolution,
+        "masks_dir": str(masks_dir or settings.masks_dir),
+        "reuse_masks": reuse_masks,
+    }
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Precompute building masks and statistics for all imagery")
+    parser.add_argument('--data-dir', type=Path, default=Path("data"), help="Data directory (default: data)")
+    parser.add_argument('--summary', type=Path, help="Summary file (.parquet or .json)")
+    parser.add_argument('--masks-dir', type=Path, help="Mask directory (default: MASKS_DIR)")
+    parser.add_argument('--areas', nargs='+', help="Only these areas")
+    parser.add_argument('--since', help="Earliest date (YYYY-MM-DD)")
+    parser.add_argument('--until', help="Latest date (YYYY-MM-DD)")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--redetect', action='store_true', help="Run the model even where a mask is stored")
+    parser.add_argument('--force', action='store_true', help="Recompute up-to-date tiles")
+    args = parser.parse_args(argv)
+
+    summary_path = args.summary or default_summary_path(args.data_dir)
+    started = time.perf_counter()
+    result = run_batch(
+        args.data_dir, summary_path,
+        build_config(args.data_dir, reuse_masks=not args.redetect, masks_dir=args.masks_dir),
+        areas=args.areas, since=args.since, until=args.until,
+        workers=args.workers, force=args.force or args.redetect
+    )
+    print(
+        f"{result['processed']} processed, {result['skipped']} up to date, {result['failed']} failed "
+        f"in {time.perf_counter() - started:.1f}s -> {summary_path}"
+    )
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
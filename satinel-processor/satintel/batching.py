@@ -0,0 +1,138 @@
+"""
+Batching Module - Dynamic micro-batching of model inference across requests.
+
+Responsibilities:
+- Queue image windows submitted by concurrent requests
+- Collect up to max_batch_size items or max_wait_ms, run one forward pass
+- Resolve each caller's future with its slice of the output
+- Record queue-depth and batch-size histograms for throughput/latency tuning
+"""
+
+import queue
+import threading
+import time
+import numpy as np
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class BatchingEngine:
+    """Background worker that merges single-window requests into batches."""
+
+    def __init__(
+        self,
+        forward: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Initialize batching engine (the worker starts on first submit).
+
+        Args:
+            forward: Function mapping an (N, C, H, W) batch to (N, ...) outputs
+            max_batch_size: Most items per forward pass
+            max_wait_ms: Longest the first queued item waits for company
+        """
+        self.forward = forward
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Dict[int, int] = {}
+        self._queue_depths: Dict[int, int] = {}
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: np.ndarray) -> Future:
+        """
+        Enqueue one (C, H, W) input.
+
+        Args:
+            item: Single model input
+
+        Returns:
+            Future resolving to that input's output
+        """
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Run a caller's batch through the shared queue and wait for it.
+
+        Args:
+            batch: (N, C, H, W) inputs
+
+        Returns:
+            (N, ...) outputs in input order
+        """
+        futures = [self.submit(item) for item in batch]
+        return np.stack([future.result() for future in futures])
+
+    def stats(self) -> Dict:
+        """Counters and histograms (bucket -> count) since startup."""
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "queue_depth_histogram": dict(sorted(self._queue_depths.items())),
+            }
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="satintel-batching", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self) -> List[Tuple[np.ndarray, Future]]:
+        pending = [self._queue.get()]
+        depth = self._queue.qsize() + 1
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(pending) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        bucket = 1 << max(depth - 1, 0).bit_length()
+        with self._stats_lock:
+            self._queue_depths[bucket] = self._queue_depths.get(bucket, 0) + 1
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+
+            # Inputs of different shapes cannot share a forward pass
+            groups: Dict[Tuple, List[Tuple[np.ndarray, Future]]] = {}
+            for item, future in pending:
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault((item.shape, item.dtype.str), []).append((item, future))
+
+            for group in groups.values():
+                try:
+                    outputs = self.forward(np.stack([item for item, _ in group]))
+                except Exception as e:
+                    for _, future in group:
+                        future.set_exception(e)
+                    continue
+                for (_, future), output in zip(group, outputs):
+                    future.set_result(output)
+
+                with self._stats_lock:
+                    self.batches += 1
+                    self.items += len(group)
+                    self._batch_sizes[len(group)] = self._batch_sizes.get(len(group), 0) + 1
@@ -0,0 +1,187 @@
+"""
+Cache Module - Bounded in-process LRU cache shared across requests.
+
+Responsibilities:
+- Cache decoded images, masks, polygons and statistics by (area_id, date, stage)
+- Enforce a byte budget with least-recently-used eviction
+- Track hit/miss/eviction counters for the health endpoint and /metrics
+- Stay safe under concurrent requests, computing each missing key once
+"""
+
+import sys
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from satintel import metrics
+from satintel.singleflight import SingleFlight
+
+
+def estimate_nbytes(value: Any) -> int:
+    """
+    Rough in-memory size of a cached value.
+
+    Arrays report their buffer size; memory-mapped arrays count as free since
+    their pages belong to the OS page cache. Containers are walked one level
+    deep, which is accurate enough for budget accounting.
+    """
+    if isinstance(value, np.memmap):
+        return 0
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sys.getsizeof(k) + estimate_nbytes(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by total estimated bytes."""
+
+    def __init__(self, max_bytes: int, name: str = "stage"):
+        """
+        Initialize cache.
+
+        Args:
+            max_bytes: Byte budget; least recently used entries are evicted
+                once the total exceeds it
+            name: Cache label in satintel_cache_requests_total
+        """
+        self.max_bytes = max_bytes
+        self.name = name
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a value, marking it most recently used.
+
+        Args:
+            key: Cache key, e.g. (area_id, date, stage)
+            default: Returned on a miss
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.inc(metrics.CACHE_REQUESTS, cache=self.name, result="miss" if entry is None else "hit")
+        return default if entry is None else entry[0]
+
+    def put(self, key: Hashable, value: Any, nbytes: Optional[int] = None):
+        """
+        Store a value, evicting older entries to stay within budget.
+
+        Values larger than the whole budget are not stored.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            nbytes: Size override (estimated when omitted)
+        """
+        size = estimate_nbytes(value) if nbytes is None else nbytes
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value or compute, store and return it.
+
+        The computation runs outside the lock; concurrent misses on the same
+        key wait for one shared computation instead of repeating it.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument function producing the value
+
+        Returns:
+            Cached or freshly computed value
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self._flights.do(key, lambda: self._compute_missing(key, compute))
+        return value
+
+    def _compute_missing(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        # A flight for this key may have finished between our miss and now
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry[0]
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def invalidate(self, area_id: str, date: Optional[str] = None) -> int:
+        """
+        Drop all stages cached for an area (optionally one date).
+
+        Args:
+            area_id: Area identifier
+            date: Date string (optional)
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            doomed = [
+                key for key in self._entries
+                if isinstance(key, tuple) and key[0] == area_id
+                and (date is None or key[1] == date)
+            ]
+            for key in doomed:
+                self._bytes -= self._entries.pop(key)[1]
+        return len(doomed)
+
+    def clear(self):
+        """Remove every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of cache counters and occupancy."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self._flights.stats()["coalesced"],
+            }
@@ -0,0 +1,256 @@
+"""
+Change Module - Building change detection between two dates of a tile.
+
+Responsibilities:
+- Classify every pixel as new, demolished or unchanged in one vectorized pass
+- Match building instances across dates by IoU (mutual best match)
+- Summarize change statistics and an activity score
+- Render a change overlay (new in green, demolished in red)
+
+Everything is array arithmetic over the masks and label images; there are
+no per-building Python loops.
+"""
+
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from satintel.labeling import label_buildings
+from satintel.overlay import blend_classes
+from satintel.table import BuildingTable
+
+# Pixel classes in change maps
+NO_BUILDING = 0
+UNCHANGED = 1
+NEW = 2
+DEMOLISHED = 3
+
+# (before, after) -> class, indexed by before + 2 * after
+_CLASS_LUT = np.array([NO_BUILDING, DEMOLISHED, NEW, UNCHANGED], dtype=np.uint8)
+
+CHANGE_COLORS = {
+    NEW: (0, 200, 0),
+    DEMOLISHED: (220, 0, 0),
+}
+
+
+class ChangeDetector:
+    """Compares building masks and instances between two acquisition dates."""
+
+    def __init__(self, pixel_resolution: float = 10.0, iou_threshold: float = 0.3, min_building_size: int = 0):
+        """
+        Initialize change detector.
+
+        Args:
+            pixel_resolution: Meters per pixel
+            iou_threshold: Smallest IoU for two footprints to be the same building
+            min_building_size: Smallest component (pixels) labelled from raw masks
+        """
+        self.pixel_resolution = pixel_resolution
+        self.iou_threshold = iou_threshold
+        self.min_building_size = min_building_size
+
+    def compare_masks(self, before: np.ndarray, after: np.ndarray) -> Dict:
+        """
+        Pixel-level comparison of two building masks.
+
+        Args:
+            before: (H, W) binary mask of the earlier date
+            after: (H, W) binary mask of the later date
+
+        Returns:
+            Dict with change_map ((H, W) uint8 of NO_BUILDING/UNCHANGED/NEW/DEMOLISHED)
+            and new_px, demolished_px, unchanged_px counts
+
+        Raises:
+            ValueError: If the masks differ in shape
+        """
+        if before.shape != after.shape:
+            raise ValueError(f"Mask shapes differ: {before.shape} vs {after.shape}")
+
+        code = (before > 0).view(np.uint8) + 2 * (after > 0).view(np.uint8)
+        counts = np.bincount(code.ravel(), minlength=4)
+        return {
+            "change_map": _CLASS_LUT[code],
+            "new_px": int(counts[2]),
+            "demolished_px": int(counts[1]),
+            "unchanged_px": int(counts[3]),
+        }
+
+    def match_buildings(self, before: BuildingTable, after: BuildingTable) -> Dict:
+        """
+        Match building instances across dates by IoU.
+
+        Overlap areas for every (before, after) pair come from one pass over
+        the pixels covered by both label images; a pair matches when each is
+        the other's best IoU partner and the IoU clears iou_threshold.
+
+        Args:
+            before: Table of the earlier date (label image attached)
+            after: Table of the later date (label image attached)
+
+        Returns:
+            Dict of arrays: matched_before / matched_after (ids), iou,
+            new (after ids without a match), demolished (before ids without a match)
+        """
+        if before.labels is None or after.labels is None:
+            raise ValueError("Matching needs both tables' label images")
+
+        before_labels = before.labels.ravel()
+        after_labels = after.labels.ravel()
+        both = (before_labels > 0) & (after_labels > 0)
+        stride = np.int64(len(after) + 1)
+        pairs, overlap = np.unique(
+            before_labels[both].astype(np.int64) * stride + after_labels[both], return_counts=True
+        )
+        pair_before = (pairs // stride).astype(np.int32)
+        pair_after = (pairs % stride).astype(np.int32)
+
+        area_before = np.zeros(len(before) + 1, dtype=np.int64)
+        area_before[1:] = before.area_px
+        area_after = np.zeros(len(after) + 1, dtype=np.int64)
+        area_after[1:] = after.area_px
+        iou = overlap / (area_before[pair_before] + area_after[pair_after] - overlap)
+
+        best_for_before = _best_pair(pair_before, iou, len(before) + 1)
+        best_for_after = _best_pair(pair_after, iou, len(after) + 1)
+        index = np.arange(len(pairs))
+        mutual = (
+            (best_for_before[pair_before] == index)
+            & (best_for_after[pair_after] == index)
+            & (iou >= self.iou_threshold)
+        )
+
+        matched_before = pair_before[mutual]
+        matched_after = pair_after[mutual]
+        before_matched = np.zeros(len(before) + 1, dtype=bool)
+        before_matched[matched_before] = True
+        after_matched = np.zeros(len(after) + 1, dtype=bool)
+        after_matched[matched_after] = True
+        return {
+            "matched_before": before.id[matched_before - 1],
+            "matched_after": after.id[matched_after - 1],
+            "iou": iou[mutual],
+            "new": after.id[~after_matched[1:]],
+            "demolished": before.id[~before_matched[1:]],
+        }
+
+    def calculate_change_stats(
+        self,
+        pixel_changes: Dict,
+        matches: Dict,
+        buildings_before: int,
+        buildings_after: int,
+        compared_to: Optional[str] = None
+    ) -> Dict:
+        """
+        Summarize pixel and instance changes.
+
+        Args:
+            pixel_changes: Result of compare_masks
+            matches: Result of match_buildings
+            buildings_before: Building count on the earlier date
+            buildings_after: Building count on the later date
+            compared_to: Earlier date string (optional)
+
+        Returns:
+            Dict matching app.schemas.ChangeStats
+        """
+        km2_per_px = self.pixel_resolution ** 2 / 1e6
+        if buildings_before:
+            percent_change = 100.0 * (buildings_after - buildings_before) / buildings_before
+        else:
+            percent_change = 100.0 if buildings_after else 0.0
+
+        stats = {
+            "compared_to": compared_to,
+            "buildings_before": buildings_before,
+            "buildings_after": buildings_after,
+            "new_buildings": int(len(matches["new"])),
+            "removed_buildings": int(len(matches["demolished"])),
+            "unchanged_buildings": int(len(matches["matched_after"])),
+            "percent_change": percent_change,
+            "new_built_area_km2": pixel_changes["new_px"] * km2_per_px,
+            "demolished_area_km2": pixel_changes["demolished_px"] * km2_per_px,
+            "net_built_area_change_km2": (pixel_changes["new_px"] - pixel_changes["demolished_px"]) * km2_per_px,
+            "mean_match_iou": float(matches["iou"].mean()) if len(matches["iou"]) else None,
+        }
+        stats["activity_score"] = self.compute_activity_score(pixel_changes)
+        return stats
+
+    def compute_activity_score(self, pixel_changes: Dict) -> float:
+        """
+        Share of the built footprint (union of both dates) that changed, 0-100.
+
+        Args:
+            pixel_changes: Result of compare_masks
+
+        Returns:
+            Activity score
+        """
+        changed = pixel_changes["new_px"] + pixel_changes["demolished_px"]
+        union = changed + pixel_changes["unchanged_px"]
+        return 100.0 * changed / union if union else 0.0
+
+    def detect_changes(
+        self,
+        before_mask: np.ndarray,
+        after_mask: np.ndarray,
+        before: Optional[BuildingTable] = None,
+        after: Optional[BuildingTable] = None,
+        compared_to: Optional[str] = None
+    ) -> Tuple[Dict, np.ndarray]:
+        """
+        Full comparison of two dates.
+
+        Args:
+            before_mask: Mask of the earlier date
+            after_mask: Mask of the later date
+            before: Labelled table of the earlier date (labelled here if omitted)
+            after: Labelled table of the later date (labelled here if omitted)
+            compared_to: Earlier date string (optional)
+
+        Returns:
+            (change stats, change map)
+        """
+        if before is None:
+            before = label_buildings(before_mask, self.min_building_size)
+        if after is None:
+            after = label_buildings(after_mask, self.min_building_size)
+        pixel_changes = self.compare_masks(before_mask, after_mask)
+        matches = self.match_buildings(before, after)
+        stats = self.calculate_change_stats(pixel_changes, matches, len(before), len(after), compared_to)
+        return stats, pixel_changes["change_map"]
+
+    def create_change_overlay(
+        self,
+        base_image: np.ndarray,
+        change_map: np.ndarray,
+        alpha: float = 0.5
+    ) -> np.ndarray:
+        """
+        Highlight new (green) and demolished (red) pixels on an image.
+
+        Blends in uint8 fixed-point like the building overlay
+        (see satintel.overlay.blend).
+
+        Args:
+            base_image: (H, W, 3) image of the later date
+            change_map: Change map from compare_masks
+            alpha: Opacity of the highlight (0-1)
+
+        Returns:
+            (H, W, 3) uint8 overlay
+        """
+        return blend_classes(base_image, change_map, CHANGE_COLORS, alpha)
+
+
+def _best_pair(owner: np.ndarray, iou: np.ndarray, size: int) -> np.ndarray:
+    """Index of the highest-IoU pair for each owner id (-1 for owners without pairs)."""
+    best = np.full(size, -1, dtype=np.int64)
+    if len(owner):
+        # Sort by owner, then IoU; the last pair of each owner run is its best
+        order = np.lexsort((iou, owner))
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = owner[order][1:] != owner[order][:-1]
+        best[owner[order][last]] = order[last]
+    return best
@@ -0,0 +1,268 @@
+"""
+COG Module - Cloud-Optimized GeoTIFF ingest and windowed, multi-resolution reads.
+
+Responsibilities:
+- Convert source tiles into COGs: internal tiling, deflate/zstd compression,
+  power-of-two overview pyramid, embedded EPSG:4326 CRS and bbox
+- Read any pixel window at any overview level without decoding the full tile
+- Keep one COG per (area, date) under data/cog/<area>/<date>.tif, rebuilt when
+  the source changes
+- Bulk ingest command: python -m satintel.cog [data_dir]
+"""
+
+import math
+import os
+import sys
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# (col_off, row_off, width, height) in full-resolution pixels
+Window = Tuple[int, int, int, int]
+
+DEFAULT_BLOCKSIZE = 256
+MIN_OVERVIEW_SIZE = 64
+
+
+def overview_factors(height: int, width: int, min_size: int = MIN_OVERVIEW_SIZE) -> List[int]:
+    """
+    Decimation factors of the overview pyramid for a tile.
+
+    Levels halve the resolution until the longer side would drop below min_size.
+
+    Args:
+        height: Tile height in pixels
+        width: Tile width in pixels
+        min_size: Smallest long side an overview may have
+
+    Returns:
+        Factors [2, 4, ...] (empty for tiles already smaller than 2 * min_size)
+    """
+    factors = []
+    factor = 2
+    while max(height, width) // factor >= min_size:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+
+def write_cog(
+    image: np.ndarray,
+    dest: Path,
+    bbox: Sequence[float],
+    blocksize: int = DEFAULT_BLOCKSIZE,
+    compress: str = "deflate",
+    tags: Optional[dict] = None
+) -> Path:
+    """
+    Write an RGB tile as a Cloud-Optimized GeoTIFF.
+
+    The tile and its overviews are built in memory and copied out with the
+    overviews laid out ahead of the full-resolution data, which is the COG
+    layout range readers expect.
+
+    Args:
+        image: (H, W, 3) uint8 image
+        dest: Output .tif path
+        bbox: [lon_min, lat_min, lon_max, lat_max] (EPSG:4326)
+        blocksize: Internal tile size in pixels (multiple of 16)
+        compress: 'deflate', 'zstd' or 'lzw'
+        tags: Extra dataset tags to embed (optional)
+
+    Returns:
+        dest
+    """
+    import rasterio
+    import rasterio.shutil
+    from rasterio.enums import Resampling
+    from rasterio.io import MemoryFile
+    from rasterio.transform import from_bounds
+
+    if image.ndim == 2:
+        image = np.repeat(image[:, :, None], 3, axis=2)
+    bands = np.ascontiguousarray(np.moveaxis(np.asarray(image[:, :, :3], dtype=np.uint8), 2, 0))
+    count, height, width = bands.shape
+    profile = {
+        "driver": "GTiff",
+        "dtype": "uint8",
+        "count": count,
+        "height": height,
+        "width": width,
+        "crs": "EPSG:4326",
+        "transform": from_bounds(*bbox, width=width, height=height),
+        "photometric": "RGB",
+    }
+    creation = {
+        "tiled": True,
+        "blockxsize": blocksize,
+        "blockysize": blocksize,
+        "compress": compress,
+        "predictor": 2,
+        "interleave": "pixel",
+    }
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(dest.name + ".tmp")
+    with MemoryFile() as memfile:
+        with memfile.open(**profile) as mem:
+            mem.write(bands)
+            mem.build_overviews(overview_factors(height, width), Resampling.average)
+            mem.update_tags(bbox=",".join(map(str, bbox)), **(tags or {}))
+            rasterio.shutil.copy(mem, tmp_path, driver="GTiff", copy_src_overviews=True, **creation)
+    os.replace(tmp_path, dest)
+    return dest
+
+
+def read_cog(path: Path, window: Optional[Window] = None, overview: int = 0) -> np.ndarray:
+    """
+    Read a window of a COG at an overview level.
+
+    Args:
+        path: COG path
+        window: (col_off, row_off, width, height) in full-resolution pixels,
+            clipped to the tile (whole tile if None)
+        overview: 0 for full resolution, n for the level decimated by 2**n
+
+    Returns:
+        (ceil(height / 2**n), ceil(width / 2**n), 3) uint8 image
+
+    Raises:
+        ValueError: If the window lies outside the tile
+    """
+    import rasterio
+    from rasterio.enums import Resampling
+    from rasterio.windows import Window as RasterioWindow
+
+    with rasterio.open(path) as src:
+        col_off, row_off, width, height = _clip_window(window, src.height, src.width)
+        factor = 2 ** overview
+        out_shape = (src.count, math.ceil(height / factor), math.ceil(width / factor))
+        # GDAL serves a decimated read from the closest overview, touching
+        # only the internal tiles that intersect the window
+        data = src.read(
+            window=RasterioWindow(col_off, row_off, width, height),
+            out_shape=out_shape,
+            resampling=Resampling.nearest if factor == 1 else Resampling.average
+        )
+    return np.moveaxis(data, 0, 2)
+
+
+def crop_and_scale(image: np.ndarray, window: Optional[Window] = None, overview: int = 0) -> np.ndarray:
+    """
+    Same result shape as read_cog, computed from a fully decoded tile.
+
+    Args:
+        image: (H, W, C) full-resolution image
+        window: (col_off, row_off, width, height) (whole tile if None)
+        overview: Decimation level (factor 2**overview)
+
+    Returns:
+        Cropped and downscaled image
+    """
+    col_off, row_off, width, height = _clip_window(window, image.shape[0], image.shape[1])
+    crop = image[row_off:row_off + height, col_off:col_off + width]
+    factor = 2 ** overview
+    if factor == 1:
+        return crop
+    import cv2
+
+    size = (math.ceil(width / factor), math.ceil(height / factor))
+    return cv2.resize(np.ascontiguousarray(crop), size, interpolation=cv2.INTER_AREA)
+
+
+def _clip_window(window: Optional[Window], height: int, width: int) -> Window:
+    if window is None:
+        return 0, 0, width, height
+    col_off, row_off, win_width, win_height = (int(v) for v in window)
+    col_end = min(col_off + win_width, width)
+    row_end = min(row_off + win_height, height)
+    col_off, row_off = max(col_off, 0), max(row_off, 0)
+    if col_end <= col_off or row_end <= row_off:
+        raise ValueError(f"Window {window} lies outside the {width}x{height} tile")
+    return col_off, row_off, col_end - col_off, row_end - row_off
+
+
+class CogStore:
+    """One COG per source tile under <store_dir>/<area>/<date>.tif."""
+
+    def __init__(self, store_dir: Path, blocksize: int = DEFAULT_BLOCKSIZE, compress: str = "deflate"):
+        """
+        Initialize COG store.
+
+        Args:
+            store_dir: Directory holding <area>/<date>.tif
+            blocksize: Internal tile size in pixels
+            compress: GeoTIFF compression ('deflate', 'zstd', 'lzw')
+        """
+        self.store_dir = store_dir
+        self.blocksize = blocksize
+        self.compress = compress
+        self._lock = threading.Lock()
+
+    def path(self, area_id: str, date: str) -> Path:
+        """COG location for an area and date."""
+        return self.store_dir / area_id / f"{date}.tif"
+
+    def is_fresh(self, source: Path, area_id: str, date: str) -> bool:
+        """Whether the COG exists and is newer than its source."""
+        path = self.path(area_id, date)
+        return path.exists() and path.stat().st_mtime_ns >= source.stat().st_mtime_ns
+
+    def ingest(
+        self,
+        source: Path,
+        area_id: str,
+        date: str,
+        bbox: Sequence[float],
+        decode: Callable[[Path], np.ndarray]
+    ) -> bool:
+        """
+        Write or refresh the COG for a tile.
+
+        Args:
+            source: Source image path
+            area_id: Area identifier
+            date: Date string (YYYY-MM-DD)
+            bbox: [lon_min, lat_min, lon_max, lat_max]
+            decode: Function decoding the source into a uint8 array
+
+        Returns:
+            True if the COG was (re)written
+        """
+        with self._lock:
+            if self.is_fresh(source, area_id, date):
+                return False
+            write_cog(
+                decode(source), self.path(area_id, date), bbox,
+                blocksize=self.blocksize, compress=self.compress,
+                tags={"area_id": area_id, "date": date, "source": source.name}
+            )
+            return True
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Convert every indexed tile under <data_dir>/imagery into a COG."""
+    from satintel.imagery import ImageryManager
+
+    argv = sys.argv[1:] if argv is None else argv
+    data_dir = Path(argv[0]) if argv else Path("data")
+    imagery = ImageryManager(data_dir)
+    store = CogStore(data_dir / "cog")
+
+    written = 0
+    for area_id in imagery.index.areas():
+        for date in imagery.get_available_dates(area_id):
+            source = imagery.get_image_path(area_id, date)
+            bbox = imagery.get_tile_bbox(area_id, date)
+            if source is None or bbox is None:
+                continue
+            if store.ingest(source, area_id, date, bbox, ImageryManager.decode_image):
+                written += 1
+                print(f"  ✓ {store.path(area_id, date)}")
+    print(f"{written} COG(s) written to {store.store_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
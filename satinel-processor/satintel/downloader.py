@@ -0,0 +1,457 @@
+"""
+Downloader Module - Parallel, resumable bulk imagery downloads.
+
+Responsibilities:
+- Fetch many tiles concurrently on a bounded worker pool
+- Rate-limit requests per host (token bucket) and retry with exponential backoff
+- Keep an on-disk manifest so re-runs skip tiles already present and hash-verified
+- Resume interrupted GET downloads with HTTP Range requests
+- Append imagery metadata after every finished tile instead of at the end
+- Build Sentinel Hub Process API requests for AOI x date-range grids
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from satintel.tile_store import file_sha256
+
+SENTINEL_HUB_URL = "https://services.sentinel-hub.com"
+
+# Enhanced true color, 8-bit PNG output
+SENTINEL_EVALSCRIPT = """
+//VERSION=3
+function setup() {
+    return {
+        input: ["B02", "B03", "B04", "SCL"],
+        output: { bands: 3, sampleType: "AUTO" }
+    };
+}
+
+function evaluatePixel(sample) {
+    return [sample.B04 * 2.5, sample.B03 * 2.5, sample.B02 * 2.5];
+}
+"""
+
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+CHUNK_SIZE = 1 << 16
+
+
+class DownloadError(RuntimeError):
+    """Raised when a tile cannot be fetched after all retries."""
+
+
+def _atomic_write_json(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class RateLimiter:
+    """Token bucket per host."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Initialize rate limiter.
+
+        Args:
+            rate: Requests per second allowed per host (0 disables limiting)
+            burst: Requests that may be sent back to back (default: max(1, rate))
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def acquire(self, host: str):
+        """Block until a request to host may be sent."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (float(self.burst), now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+class DownloadManifest:
+    """Persistent record of completed downloads and their hashes."""
+
+    def __init__(self, path: Path):
+        """
+        Initialize manifest, loading it if present.
+
+        Args:
+            path: Manifest JSON file (e.g. data/metadata/download_manifest.json)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self._entries: Dict[str, Dict] = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def is_complete(self, key: str, dest: Path, verify_hash: bool = True) -> bool:
+        """
+        Whether a tile was downloaded and is still intact on disk.
+
+        Args:
+            key: Tile key
+            dest: Expected file location
+            verify_hash: Re-hash the file instead of trusting its size
+
+        Returns:
+            True if the download can be skipped
+        """
+        entry = self.get(key)
+        if entry is None or not dest.exists():
+            return False
+        if dest.stat().st_size != entry["size"]:
+            return False
+        return not verify_hash or file_sha256(dest) == entry["sha256"]
+
+    def mark_complete(self, key: str, dest: Path, sha256: str, size: int):
+        """Record a finished download and persist the manifest."""
+        with self._lock:
+            self._entries[key] = {
+                "path": str(dest),
+                "sha256": sha256,
+                "size": size,
+                "completed_at": datetime.now().isoformat(),
+            }
+            _atomic_write_json(self.path, self._entries)
+
+
+class MetadataLog:
+    """imagery_metadata.json, rewritten atomically after every new entry."""
+
+    def __init__(self, path: Path):
+        """
+        Initialize metadata log, keeping entries from earlier runs.
+
+        Args:
+            path: Metadata JSON file (a list of entries)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self._entries: List[Dict] = json.load(f)
+        except (OSError, ValueError):
+            self._entries = []
+
+    @property
+    def entries(self) -> List[Dict]:
+        with self._lock:
+            return list(self._entries)
+
+    def append(self, entry: Dict):
+        """Add (or replace, by aoi_id and filename) an entry and persist."""
+        with self._lock:
+            self._entries = [
+                e for e in self._entries
+                if (e.get("aoi_id"), e.get("filename")) != (entry.get("aoi_id"), entry.get("filename"))
+            ]
+            self._entries.append(entry)
+            _atomic_write_json(self.path, self._entries)
+
+
+class Downloader:
+    """Concurrent downloader with per-host rate limiting, retries and a manifest."""
+
+    def __init__(
+        self,
+        manifest: DownloadManifest,
+        metadata: Optional[MetadataLog] = None,
+        max_workers: int = 8,
+        requests_per_second: float = 5.0,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 120.0,
+        verify_hash: bool = True,
+        session=None
+    ):
+        """
+        Initialize downloader.
+
+        Args:
+            manifest: Record of completed tiles
+            metadata: Metadata log appended to per finished tile (optional)
+            max_workers: Concurrent downloads
+            requests_per_second: Per-host request rate (0 disables limiting)
+            max_retries: Retries after the first attempt
+            backoff_base: First retry delay in seconds (doubles each retry)
+            backoff_max: Longest retry delay (also caps a server's Retry-After)
+            timeout: Per-request timeout in seconds
+            verify_hash: Re-hash files listed in the manifest before skipping
+            session: requests.Session to use (created if omitted)
+        """
+        import requests
+
+        self.manifest = manifest
+        self.metadata = metadata
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(requests_per_second)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.verify_hash = verify_hash
+        self.session = session or requests.Session()
+
+    def download(self, jobs: Iterable[Dict]) -> Dict:
+        """
+        Download every job not already complete.
+
+        Each job is a dict with key, url and dest, plus optional method
+        ('GET' or 'POST'), headers, json (request body) and metadata
+        (entry appended to the metadata log once the file is in place).
+
+        Args:
+            jobs: Download jobs
+
+        Returns:
+            Summary with downloaded, skipped and failed counts and per-key errors
+        """
+        summary = {"downloaded": 0, "skipped": 0, "failed": 0, "bytes": 0, "errors": {}}
+        lock = threading.Lock()
+
+        def run(job: Dict):
+            try:
+                outcome, size = self.fetch(job)
+            except Exception as e:
+                with lock:
+                    summary["failed"] += 1
+                    summary["errors"][job["key"]] = str(e)
+                return
+            with lock:
+                summary[outcome] += 1
+                summary["bytes"] += size
+
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="satintel-download") as pool:
+            list(pool.map(run, jobs))
+        return summary
+
+    def fetch(self, job: Dict) -> Tuple[str, int]:
+        """
+        Download one job unless the manifest shows it intact on disk.
+
+        Returns:
+            ('downloaded' or 'skipped', bytes written)
+
+        Raises:
+            DownloadError: If all attempts fail
+        """
+        dest = Path(job["dest"])
+        if self.manifest.is_complete(job["key"], dest, self.verify_hash):
+            return "skipped", 0
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        for attempt in range(self.max_retries + 1):
+            delay = None
+            try:
+                try:
+                    sha256, size = self._attempt(job, dest)
+                except _RangeNotSatisfiable:
+                    # The .part was already complete (crash before os.replace) or
+                    # the remote file shrank: start over once without Range
+                    sha256, size = self._attempt(job, dest)
+            except DownloadError:
+                raise
+            except Exception as e:  # connection errors, timeouts
+                error = e
+            else:
+                self.manifest.mark_complete(job["key"], dest, sha256, size)
+                if self.metadata is not None and job.get("metadata") is not None:
+                    self.metadata.append({**job["metadata"], "sha256": sha256,
+                                          "downloaded_at": datetime.now().isoformat()})
+                return "downloaded", size
+
+            if isinstance(error, _RetryableStatus) and error.retry_after is not None:
+                # A server-supplied delay cannot park a worker for longer than backoff_max
+                delay = min(max(error.retry_after, 0.0), self.backoff_max)
+            if attempt == self.max_retries:
+                break
+            if delay is None:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)
+            time.sleep(delay)
+        raise DownloadError(f"{job['key']}: giving up after {self.max_retries + 1} attempts: {error}")
+
+    def _attempt(self, job: Dict, dest: Path) -> Tuple[str, int]:
+        method = job.get("method", "GET").upper()
+        headers = dict(job.get("headers") or {})
+        part = dest.with_name(dest.name + ".part")
+
+        # Only idempotent GETs are resumed; POST bodies are re-requested whole
+        offset = part.stat().st_size if method == "GET" and part.exists() else 0
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        self.limiter.acquire(urlparse(job["url"]).netloc)
+        with self.session.request(
+            method, job["url"], headers=headers, json=job.get("json"),
+            stream=True, timeout=self.timeout
+        ) as response:
+            if response.status_code in RETRY_STATUS:
+                raise _RetryableStatus(response)
+            if offset and response.status_code == 416:
+                part.unlink()
+                raise _RangeNotSatisfiable(f"{job['key']}: HTTP 416")
+            if response.status_code >= 400:
+                raise DownloadError(f"{job['key']}: HTTP {response.status_code}")
+
+            digest = hashlib.sha256()
+            if offset and response.status_code == 206:
+                with open(part, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                mode = "ab"
+            else:
+                mode = "wb"
+            with open(part, mode) as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+
+        expected = job.get("sha256")
+        if expected is not None and digest.hexdigest() != expected:
+            part.unlink()
+            raise ValueError(f"{job['key']}: checksum mismatch")
+        size = part.stat().st_size
+        os.replace(part, dest)
+        return digest.hexdigest(), size
+
+
+class _RangeNotSatisfiable(Exception):
+    pass
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        retry_after = response.headers.get("Retry-After")
+        try:
+            self.retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            self.retry_after = None
+
+
+def sentinel_token(client_id: str, client_secret: str, base_url: str = SENTINEL_HUB_URL, session=None) -> str:
+    """
+    OAuth2 client-credentials token for the Sentinel Hub APIs.
+
+    Args:
+        client_id: Sentinel Hub OAuth client ID
+        client_secret: Sentinel Hub OAuth client secret
+        base_url: Sentinel Hub services URL
+        session: requests.Session to use (optional)
+
+    Returns:
+        Bearer access token
+    """
+    import requests
+
+    response = (session or requests).post(
+        f"{base_url}/oauth/token",
+        data={"grant_type": "client_credentials", "client_id": client_id, "client_secret": client_secret},
+        timeout=60
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def sentinel_jobs(
+    aois: Dict[str, Dict],
+    date_ranges: Sequence[Tuple[str, str]],
+    imagery_dir: Path,
+    token: str,
+    image_size: Sequence[int] = (512, 512),
+    max_cloud_cover: float = 10,
+    base_url: str = SENTINEL_HUB_URL
+) -> List[Dict]:
+    """
+    Process API download jobs for every AOI and date range.
+
+    Args:
+        aois: AOI id -> {'name', 'bbox', ...}
+        date_ranges: (start, end) date pairs; tiles are named after the start
+        imagery_dir: data/imagery directory
+        token: Bearer token from sentinel_token
+        image_size: Output (width, height) in pixels
+        max_cloud_cover: Largest cloud cover percentage accepted
+        base_url: Sentinel Hub services URL
+
+    Returns:
+        Jobs for Downloader.download
+    """
+    jobs = []
+    for aoi_id, aoi in aois.items():
+        for date_start, date_end in date_ranges:
+            filename = f"{date_start}.png"
+            dest = imagery_dir / aoi_id / filename
+            jobs.append({
+                "key": f"sentinel-2/{aoi_id}/{date_start}/{date_end}/{image_size[0]}x{image_size[1]}",
+                "url": f"{base_url}/api/v1/process",
+                "method": "POST",
+                "headers": {"Authorization": f"Bearer {token}", "Accept": "image/png"},
+                "json": {
+                    "input": {
+                        "bounds": {
+                            "bbox": aoi["bbox"],
+                            "properties": {"crs": "http://www.opengis.net/def/crs/OGC/1.3/CRS84"},
+                        },
+                        "data": [{
+                            "type": "sentinel-2-l2a",
+                            "dataFilter": {
+                                "timeRange": {"from": f"{date_start}T00:00:00Z", "to": f"{date_end}T23:59:59Z"},
+                                "maxCloudCoverage": max_cloud_cover,
+                                "mosaickingOrder": "leastCC",
+                            },
+                        }],
+                    },
+                    "output": {
+                        "width": image_size[0],
+                        "height": image_size[1],
+                        "responses": [{"identifier": "default", "format": {"type": "image/png"}}],
+                    },
+                    "evalscript": SENTINEL_EVALSCRIPT,
+                },
+                "dest": dest,
+                "metadata": {
+                    "aoi_id": aoi_id,
+                    "aoi_name": aoi.get("name", aoi_id),
+                    "bbox": aoi["bbox"],
+                    "date_range": [date_start, date_end],
+                    "filename": filename,
+                    "path": str(dest),
+                    "source": "Sentinel-2",
+                    "resolution": "10m",
+                },
+            })
+    return jobs
@@ -0,0 +1,255 @@
+"""
+Executor Module - Configurable thread/process execution of pipeline stages.
+
+Responsibilities:
+- Run each pipeline stage inline, on a thread pool or on a process pool
+- Keep GIL-releasing NumPy/OpenCV/ONNX work on threads and pure-Python
+  work on processes, as configured per stage
+- Move NumPy arrays (and BuildingTable columns) between processes through
+  multiprocessing.shared_memory instead of pickling them
+"""
+
+import contextvars
+import multiprocessing
+import os
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional
+
+from satintel.table import BuildingTable
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+PLACEMENTS = (INLINE, THREAD, PROCESS)
+
+DEFAULT_PLACEMENT = {
+    "decode": THREAD,
+    "detect": THREAD,
+    "label": THREAD,
+    "trace": PROCESS,
+    "overlay": THREAD,
+}
+
+# Stages whose callables hold locks, models or worker threads and so cannot
+# be shipped to another process
+THREAD_ONLY_STAGES = {"detect"}
+
+# Arrays smaller than this are pickled; shared memory setup costs more
+SHARED_MIN_BYTES = 64 * 1024
+
+_TABLE_FIELDS = ("id", "area_px", "bbox", "centroid", "ring_offsets", "vertices", "labels")
+
+
+class SharedArray:
+    """Picklable handle to an array held in a shared memory block."""
+
+    def __init__(self, name: str, shape: tuple, dtype: str):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> "SharedArray":
+        """Copy an array into a new shared memory block (caller must release it)."""
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        handle = cls(block.name, array.shape, array.dtype.str)
+        block.close()
+        return handle
+
+    def open(self):
+        """
+        Attach to the block.
+
+        Returns:
+            (block, array view) - keep the block referenced while using the view
+        """
+        block = _attach(self.name)
+        return block, np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=block.buf)
+
+    def take(self) -> np.ndarray:
+        """Copy the array out and unlink the block."""
+        block, view = self.open()
+        try:
+            return view.copy()
+        finally:
+            del view
+            block.close()
+            block.unlink()
+
+    def release(self):
+        block = _attach(self.name)
+        block.close()
+        block.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Pool workers share the parent's resource tracker, whose registry is a
+    # set: re-registering on attach is harmless and the single unlink by the
+    # consumer unregisters the block
+    return shared_memory.SharedMemory(name=name)
+
+
+def share(value: Any) -> Any:
+    """Replace large arrays (also inside tables, tuples, lists, dicts) with SharedArray handles."""
+    if isinstance(value, np.ndarray) and value.nbytes >= SHARED_MIN_BYTES:
+        return SharedArray.create(np.ascontiguousarray(value))
+    if isinstance(value, BuildingTable):
+        return ("__table__", {f: share(getattr(value, f)) for f in _TABLE_FIELDS})
+    if isinstance(value, (tuple, list)):
+        return type(value)(share(v) for v in value)
+    if isinstance(value, dict):
+        return {k: share(v) for k, v in value.items()}
+    return value
+
+
+def unshare(value: Any, blocks: Optional[list] = None) -> Any:
+    """
+    Inverse of share().
+
+    With `blocks` the arrays are zero-copy views and the attached blocks are
+    appended to it (the caller closes them); without it they are copied out
+    and the blocks unlinked.
+    """
+    if isinstance(value, SharedArray):
+        if blocks is None:
+            return value.take()
+        block, view = value.open()
+        blocks.append(block)
+        return view
+    if isinstance(value, tuple) and len(value) == 2 and value[0] == "__table__":
+        return BuildingTable(**{f: unshare(a, blocks) for f, a in value[1].items()})
+    if isinstance(value, (tuple, list)):
+        return type(value)(unshare(v, blocks) for v in value)
+    if isinstance(value, dict):
+        return {k: unshare(v, blocks) for k, v in value.items()}
+    return value
+
+
+def release(value: Any):
+    """Unlink every block referenced by a share()d value."""
+    if isinstance(value, SharedArray):
+        value.release()
+    elif isinstance(value, tuple) and len(value) == 2 and value[0] == "__table__":
+        release(value[1])
+    elif isinstance(value, (tuple, list)):
+        for v in value:
+            release(v)
+    elif isinstance(value, dict):
+        for v in value.values():
+            release(v)
+
+
+def _run_shared(fn: Callable, args: tuple, kwargs: dict):
+    """Process-pool entry point: attach inputs, run, return outputs in new blocks."""
+    blocks: list = []
+    try:
+        # The result is copied into new blocks before the input views are closed
+        return share(fn(*unshare(args, blocks), **unshare(kwargs, blocks)))
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class StageExecutor:
+    """Dispatches pipeline stages to the pool configured for them."""
+
+    def __init__(
+        self,
+        thread_workers: Optional[int] = None,
+        process_workers: Optional[int] = 0,
+        placement: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize executor (pools start lazily).
+
+        Args:
+            thread_workers: Thread pool size (default: CPU count)
+            process_workers: Process pool size (None: CPU count); 0 demotes
+                process stages to threads
+            placement: Stage name -> 'inline', 'thread' or 'process'
+                (merged over DEFAULT_PLACEMENT)
+
+        Raises:
+            ValueError: If a placement is unknown or not allowed for its stage
+        """
+        self.thread_workers = thread_workers or os.cpu_count() or 1
+        self.process_workers = (os.cpu_count() or 1) if process_workers is None else process_workers
+        self.placement = {**DEFAULT_PLACEMENT, **(placement or {})}
+        for stage, where in self.placement.items():
+            if where not in PLACEMENTS:
+                raise ValueError(f"Unknown placement '{where}' for stage '{stage}'")
+            if where == PROCESS and stage in THREAD_ONLY_STAGES:
+                raise ValueError(f"Stage '{stage}' cannot run in a process pool")
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        # Concurrent first calls must not each start (and leak) a pool
+        self._pool_lock = threading.Lock()
+
+    def placement_of(self, stage: str) -> str:
+        where = self.placement.get(stage, INLINE)
+        if where == PROCESS and self.process_workers <= 0:
+            return THREAD
+        return where
+
+    def run(self, stage: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) where `stage` is placed and wait for it.
+
+        For process placement fn must be picklable (a module-level function
+        or a method of a picklable object); array arguments and results
+        travel through shared memory.
+
+        Args:
+            stage: Stage name (decode, detect, label, trace, overlay, ...)
+            fn: Callable to run
+
+        Returns:
+            fn's return value
+        """
+        where = self.placement_of(stage)
+        if where == INLINE:
+            return fn(*args, **kwargs)
+        if where == THREAD:
+            # Carry the caller's context (e.g. the request's stage timings) into the worker
+            context = contextvars.copy_context()
+            return self._thread_pool().submit(context.run, fn, *args, **kwargs).result()
+
+        shared_args, shared_kwargs = share(args), share(kwargs)
+        try:
+            result = self._process_pool().submit(_run_shared, fn, shared_args, shared_kwargs).result()
+        finally:
+            release((shared_args, shared_kwargs))
+        return unshare(result)
+
+    def shutdown(self, wait: bool = True):
+        with self._pool_lock:
+            pools = (self._threads, self._processes)
+            self._threads = self._processes = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=wait)
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        pool = self._threads
+        if pool is None:
+            with self._pool_lock:
+                if self._threads is None:
+                    self._threads = ThreadPoolExecutor(self.thread_workers, thread_name_prefix="satintel-stage")
+                pool = self._threads
+        return pool
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        pool = self._processes
+        if pool is None:
+            with self._pool_lock:
+                if self._processes is None:
+                    # spawn: forking a multi-threaded server process can deadlock the child
+                    self._processes = ProcessPoolExecutor(
+                        self.process_workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                pool = self._processes
+        return pool
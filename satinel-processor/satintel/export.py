@@ -0,0 +1,329 @@
+"""
+Export Module - Streaming GeoJSON and FlatGeobuf writers for building footprints.
+
+Responsibilities:
+- Stream a BuildingTable as chunked GeoJSON without materializing the collection
+- Write FlatGeobuf (polygons, lon/lat) with a packed Hilbert R-tree index
+- Select features by geographic bbox from the table's bbox columns
+"""
+
+import json
+import numpy as np
+from typing import Iterator, Optional, Sequence
+
+from satintel.table import BuildingTable, Transform
+
+FGB_MAGIC = b"fgb\x03fgb\x00"
+FGB_INDEX_NODE_SIZE = 16
+
+# FlatGeobuf enums (header.fbs)
+_GEOMETRY_POLYGON = 3
+_COLUMN_INT = 5
+_COLUMN_LONG = 7
+_COLUMN_DOUBLE = 10
+
+# Packed R-tree node: bbox + offset (feature byte offset for leaves, child index otherwise)
+NODE_DTYPE = np.dtype([
+    ("min_x", "<f8"), ("min_y", "<f8"), ("max_x", "<f8"), ("max_y", "<f8"), ("offset", "<u8"),
+])
+
+
+def select_bbox(table: BuildingTable, transform: Transform, bbox: Sequence[float]) -> BuildingTable:
+    """
+    Buildings whose footprint box intersects a geographic bbox.
+
+    The query box is mapped into pixel space once and compared against the
+    table's bbox columns; only matching rows (and their rings) are gathered.
+
+    Args:
+        table: Building table
+        transform: North-up pixel -> lon/lat transform
+        bbox: [lon_min, lat_min, lon_max, lat_max]
+
+    Returns:
+        Filtered table
+    """
+    a, _, c, _, e, f = transform
+    lon_min, lat_min, lon_max, lat_max = bbox
+    x1, x2 = sorted(((lon_min - c) / a, (lon_max - c) / a))
+    y1, y2 = sorted(((lat_max - f) / e, (lat_min - f) / e))
+    return table.intersecting(x1, y1, x2, y2)
+
+
+def iter_geojson(
+    table: BuildingTable,
+    transform: Optional[Transform] = None,
+    pixel_area_m2: Optional[float] = None,
+    chunk_size: int = 1000
+) -> Iterator[bytes]:
+    """
+    Stream a GeoJSON FeatureCollection in chunks.
+
+    Rows are taken chunk_size at a time through zero-copy table slices, so
+    only one chunk of features exists as Python objects at once.
+
+    Args:
+        table: Building table with rings
+        transform: Pixel -> lon/lat transform (pixel coordinates if None)
+        pixel_area_m2: Adds an area_m2 property when given
+        chunk_size: Features per yielded chunk
+
+    Yields:
+        UTF-8 encoded pieces of the document
+    """
+    yield b'{"type":"FeatureCollection","features":['
+    for start in range(0, len(table), chunk_size):
+        chunk = table[start:start + chunk_size]
+        body = ",".join(
+            json.dumps(feature, separators=(",", ":"))
+            for feature in chunk.iter_geojson_features(transform, pixel_area_m2)
+        )
+        yield (("," if start else "") + body).encode()
+    yield b"]}"
+
+
+def hilbert_index(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Hilbert curve distance of 16-bit grid coordinates (vectorized).
+
+    Args:
+        x: uint32 array of values in [0, 65535]
+        y: uint32 array of values in [0, 65535]
+
+    Returns:
+        uint32 Hilbert distances
+    """
+    x = x.astype(np.uint32)
+    y = y.astype(np.uint32)
+    mask = np.uint32(0xFFFF)
+
+    a = x ^ y
+    b = mask ^ a
+    c = mask ^ (x | y)
+    d = x & (y ^ mask)
+
+    A = a | (b >> 1)
+    B = (a >> 1) ^ a
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+
+    for shift in (2, 4, 8):
+        a, b, c, d = A, B, C, D
+        if shift < 8:
+            A = (a & (a >> shift)) ^ (b & (b >> shift))
+            B = (a & (b >> shift)) ^ (b & ((a ^ b) >> shift))
+        C = C ^ ((a & (c >> shift)) ^ (b & (d >> shift)))
+        D = D ^ ((b & (c >> shift)) ^ ((a ^ b) & (d >> shift)))
+
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+    i0 = x ^ y
+    i1 = b | (mask ^ (i0 | a))
+
+    def interleave(v):
+        v = (v | (v << 8)) & np.uint32(0x00FF00FF)
+        v = (v | (v << 4)) & np.uint32(0x0F0F0F0F)
+        v = (v | (v << 2)) & np.uint32(0x33333333)
+        return (v | (v << 1)) & np.uint32(0x55555555)
+
+    return (interleave(i1) << 1) | interleave(i0)
+
+
+def packed_rtree(boxes: np.ndarray, offsets: np.ndarray, node_size: int = FGB_INDEX_NODE_SIZE) -> np.ndarray:
+    """
+    Build a FlatGeobuf packed R-tree over items already in Hilbert order.
+
+    Nodes are laid out root first; leaves sit at the end and each parent
+    covers node_size consecutive children, so every level is one reduceat.
+
+    Args:
+        boxes: (N, 4) item boxes (min_x, min_y, max_x, max_y)
+        offsets: (N,) feature byte offsets
+        node_size: Children per node
+
+    Returns:
+        Structured NODE_DTYPE array of every node
+    """
+    # Always at least one level above the leaves, even for a single item
+    level_sizes = [len(boxes)]
+    while len(level_sizes) == 1 or level_sizes[-1] > 1:
+        level_sizes.append(-(-level_sizes[-1] // node_size))
+    num_nodes = sum(level_sizes)
+
+    # (start, end) of each level, leaves first
+    bounds = []
+    end = num_nodes
+    for size in level_sizes:
+        bounds.append((end - size, end))
+        end -= size
+
+    nodes = np.zeros(num_nodes, dtype=NODE_DTYPE)
+    start, end = bounds[0]
+    for i, name in enumerate(("min_x", "min_y", "max_x", "max_y")):
+        nodes[name][start:end] = boxes[:, i]
+    nodes["offset"][start:end] = offsets
+
+    for (child_start, child_end), (parent_start, parent_end) in zip(bounds, bounds[1:]):
+        firsts = np.arange(child_start, child_end, node_size)
+        children = nodes[child_start:child_end]
+        groups = firsts - child_start
+        parents = nodes[parent_start:parent_end]
+        parents["min_x"] = np.minimum.reduceat(children["min_x"], groups)
+        parents["min_y"] = np.minimum.reduceat(children["min_y"], groups)
+        parents["max_x"] = np.maximum.reduceat(children["max_x"], groups)
+        parents["max_y"] = np.maximum.reduceat(children["max_y"], groups)
+        parents["offset"] = firsts
+    return nodes
+
+
+def iter_flatgeobuf(
+    table: BuildingTable,
+    transform: Transform,
+    pixel_area_m2: Optional[float] = None,
+    layer_name: str = "buildings",
+    index_node_size: int = FGB_INDEX_NODE_SIZE,
+    chunk_size: int = 1000
+) -> Iterator[bytes]:
+    """
+    Stream a FlatGeobuf file of building polygons in EPSG:4326 (requires flatbuffers).
+
+    Features are Hilbert-sorted. The spatial index stores their byte
+    offsets, which are derived from vertex counts before any feature is
+    written; features are then encoded and yielded chunk by chunk, so only
+    the per-feature sizes are held in memory.
+
+    Args:
+        table: Building table with rings
+        transform: Pixel -> lon/lat transform
+        pixel_area_m2: Adds an area_m2 column when given
+        layer_name: Layer name stored in the header
+        index_node_size: R-tree fan-out (0 writes no index)
+        chunk_size: Features per yielded chunk
+
+    Yields:
+        Byte chunks of the file
+    """
+    coords = table.geo_vertices(transform)
+    offsets = table.ring_offsets
+    count = len(table)
+
+    # Conservative lon/lat boxes from the pixel bbox columns
+    a, _, c, _, e, f = transform
+    lon1 = a * table.bbox[:, 0] + c
+    lon2 = a * (table.bbox[:, 2] - 1) + c
+    lat1 = e * table.bbox[:, 1] + f
+    lat2 = e * (table.bbox[:, 3] - 1) + f
+    boxes = np.stack([
+        np.minimum(lon1, lon2), np.minimum(lat1, lat2),
+        np.maximum(lon1, lon2), np.maximum(lat1, lat2),
+    ], axis=1) if count else np.zeros((0, 4))
+    envelope = (
+        [boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max()]
+        if count else [0.0, 0.0, 0.0, 0.0]
+    )
+
+    order = np.arange(count)
+    if count and index_node_size:
+        width = max(envelope[2] - envelope[0], 1e-12)
+        height = max(envelope[3] - envelope[1], 1e-12)
+        hx = ((boxes[:, 0] + boxes[:, 2]) / 2 - envelope[0]) / width * 0xFFFF
+        hy = ((boxes[:, 1] + boxes[:, 3]) / 2 - envelope[1]) / height * 0xFFFF
+        order = np.argsort(hilbert_index(hx.astype(np.uint32), hy.astype(np.uint32)), kind="stable")
+
+    # Properties: (uint16 column index, value) pairs, encoded for every row at once
+    fields = [("c0", "<u2"), ("id", "<i4"), ("c1", "<u2"), ("area_px", "<i8")]
+    columns = [("id", _COLUMN_INT), ("area_px", _COLUMN_LONG)]
+    if pixel_area_m2 is not None:
+        fields += [("c2", "<u2"), ("area_m2", "<f8")]
+        columns.append(("area_m2", _COLUMN_DOUBLE))
+    properties = np.zeros(count, dtype=fields)
+    properties["c1"] = 1
+    properties["id"] = table.id
+    properties["area_px"] = table.area_px
+    if pixel_area_m2 is not None:
+        properties["c2"] = 2
+        properties["area_m2"] = table.area_px * pixel_area_m2
+    properties = properties.view(np.uint8).reshape(count, properties.dtype.itemsize)
+
+    def encode(i: int) -> bytes:
+        ring = coords[offsets[i]:offsets[i + 1]]
+        if len(ring):
+            ring = np.concatenate([ring, ring[:1]])
+        return _flatgeobuf_feature(ring, properties[i])
+
+    yield FGB_MAGIC + _flatgeobuf_header(layer_name, envelope, columns, count, index_node_size)
+
+    if count and index_node_size:
+        # An encoded feature's size depends only on its vertex count (the
+        # property block has a fixed layout), so one sample per distinct
+        # count gives every offset without holding encoded features
+        vertices = np.diff(offsets)[order]
+        distinct, first = np.unique(vertices, return_index=True)
+        size_of = np.array([len(encode(int(order[j]))) for j in first], dtype=np.uint64)
+        sizes = size_of[np.searchsorted(distinct, vertices)]
+        starts = np.zeros(count, dtype=np.uint64)
+        np.cumsum(sizes[:-1], out=starts[1:])
+        yield packed_rtree(boxes[order], starts, index_node_size).tobytes()
+
+    for start in range(0, count, chunk_size):
+        yield b"".join(encode(i) for i in order[start:start + chunk_size].tolist())
+
+
+def _flatgeobuf_feature(ring: np.ndarray, properties: np.ndarray) -> bytes:
+    import flatbuffers
+
+    builder = flatbuffers.Builder(ring.nbytes + 128)
+    xy = builder.CreateNumpyVector(ring.reshape(-1))
+    props = builder.CreateNumpyVector(properties)
+    builder.StartObject(8)  # Geometry
+    builder.PrependUOffsetTRelativeSlot(1, xy, 0)
+    builder.PrependUint8Slot(6, _GEOMETRY_POLYGON, 0)
+    geometry = builder.EndObject()
+    builder.StartObject(3)  # Feature
+    builder.PrependUOffsetTRelativeSlot(0, geometry, 0)
+    builder.PrependUOffsetTRelativeSlot(1, props, 0)
+    builder.FinishSizePrefixed(builder.EndObject())
+    return bytes(builder.Output())
+
+
+def _flatgeobuf_header(
+    name: str,
+    envelope: Sequence[float],
+    columns: Sequence,
+    count: int,
+    index_node_size: int
+) -> bytes:
+    import flatbuffers
+
+    builder = flatbuffers.Builder(1024)
+    name_offset = builder.CreateString(name)
+    column_offsets = []
+    for column_name, column_type in columns:
+        column_name_offset = builder.CreateString(column_name)
+        builder.StartObject(11)  # Column
+        builder.PrependUOffsetTRelativeSlot(0, column_name_offset, 0)
+        builder.PrependUint8Slot(1, column_type, 0)
+        column_offsets.append(builder.EndObject())
+    builder.StartVector(4, len(column_offsets), 4)
+    for offset in reversed(column_offsets):
+        builder.PrependUOffsetTRelative(offset)
+    columns_vector = builder.EndVector()
+    envelope_vector = builder.CreateNumpyVector(np.asarray(envelope, dtype=np.float64))
+
+    builder.StartObject(6)  # Crs
+    builder.PrependInt32Slot(1, 4326, 0)
+    crs = builder.EndObject()
+
+    builder.StartObject(14)  # Header
+    builder.PrependUOffsetTRelativeSlot(0, name_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(1, envelope_vector, 0)
+    builder.PrependUint8Slot(2, _GEOMETRY_POLYGON, 0)
+    builder.PrependUOffsetTRelativeSlot(7, columns_vector, 0)
+    builder.PrependUint64Slot(8, count, 0)
+    builder.ForceDefaults(True)
+    builder.PrependUint16Slot(9, index_node_size if count else 0, FGB_INDEX_NODE_SIZE)
+    builder.ForceDefaults(False)
+    builder.PrependUOffsetTRelativeSlot(10, crs, 0)
+    builder.FinishSizePrefixed(builder.EndObject())
+    return bytes(builder.Output())
+
@@ -3,59 +3,249 @@ Imagery Module - Handles satellite image loading, preprocessing, and tile manage
 
 Responsibilities:
 - Load imagery from data/imagery/<area>/<date>.png
+- Windowed reads at a chosen overview level via Cloud-Optimized GeoTIFFs
 - Snap lat/lon to nearest available tile
 - Image preprocessing and normalization
+- Record snap/decode/read latencies and decoded bytes (satintel.metrics)
 - Integration with Sentinel/USGS APIs for future live fetching
 """
 
+import time
 import numpy as np
 from pathlib import Path
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List
 from datetime import datetime
 
+from satintel import metrics
+from satintel.cog import CogStore, Window, crop_and_scale, read_cog
+from satintel.tile_index import TileIndex, IMAGE_SUFFIXES
+from satintel.tile_store import DecodedTileStore
+
 
 class ImageryManager:
     """Manages satellite imagery tiles and metadata."""
     
-    def __init__(self, data_dir: Path):
+    def __init__(
+        self,
+        data_dir: Path,
+        area_bboxes: Optional[Dict[str, List[float]]] = None,
+        index: Optional[TileIndex] = None,
+        refresh_interval: float = 30.0,
+        max_snap_distance_km: Optional[float] = 50.0,
+        tile_store: Optional[DecodedTileStore] = None,
+        cog_store: Optional[CogStore] = None
+    ):
         """
         Initialize imagery manager.
         
         Args:
             data_dir: Path to data directory containing imagery/
+            area_bboxes: Fallback bbox per area for directories without metadata
+            index: Tile index to use (default: persisted under metadata/)
+            refresh_interval: Seconds between incremental index syncs
+            max_snap_distance_km: Furthest a click may be from a tile to snap
+            tile_store: Decoded sidecar store; tiles are decoded on every
+                load when omitted
+            cog_store: COG store serving windowed/overview reads; those are
+                cut from the full decoded tile when omitted
         """
         self.data_dir = data_dir
         self.imagery_dir = data_dir / "imagery"
         self.metadata_dir = data_dir / "metadata"
+        self.metadata_file = self.metadata_dir / "imagery_metadata.json"
+        self.area_bboxes = area_bboxes or {}
+        self.refresh_interval = refresh_interval
+        self.max_snap_distance_km = max_snap_distance_km
+        self.tile_store = tile_store
+        self.cog_store = cog_store
+        self.index = index if index is not None else TileIndex(self.metadata_dir / "tile_index.json")
+        self._next_refresh = 0.0
+        self.refresh_index(force=True)
+    
+    def refresh_index(self, force: bool = False) -> int:
+        """
+        Incrementally sync the tile index with newly landed imagery.
+        
+        Args:
+            force: Sync even if refresh_interval has not elapsed
+        
+        Returns:
+            Number of tiles added or removed
+        """
+        now = time.monotonic()
+        if not force and now < self._next_refresh:
+            return 0
+        self._next_refresh = now + self.refresh_interval
+        return self.index.sync(self.imagery_dir, self.metadata_file, self.area_bboxes)
+    
+    def register_tile(self, area_id: str, date: str, bbox: List[float], path: Optional[Path] = None):
+        """
+        Add a freshly ingested tile to the index without waiting for a sync.
+        
+        Args:
+            area_id: Area identifier
+            date: Date string (YYYY-MM-DD)
+            bbox: [lon_min, lat_min, lon_max, lat_max]
+            path: Path to the image file
+        """
+        if self.index.add_tile(area_id, date, bbox, str(path) if path else None):
+            self.index.save()
     
-    def snap_to_tile(self, lat: float, lon: float, area_id: str) -> Optional[Dict]:
+    def snap_to_tile(self, lat: float, lon: float, area_id: Optional[str] = None) -> Optional[Dict]:
         """
         Snap user click coordinates to nearest available tile.
         
+        Tiles whose bbox contains the point win; otherwise the tile with the
+        smallest haversine distance to its bbox is used.
+        
         Args:
             lat: Latitude
             lon: Longitude
-            area_id: Area identifier (e.g., 'new_york', 'tehran')
+            area_id: Area identifier (e.g., 'new_york', 'tehran'), optional
         
         Returns:
             Dict with tile info or None if no tile found
         """
-        # TODO: Implement tile snapping logic
-        pass
+        with metrics.timer("snap"):
+            self.refresh_index()
+            
+            hits = self.index.containing(lat, lon, area_id)
+            if hits:
+                footprint, distance = hits[0], 0.0
+            else:
+                found = self.index.nearest(lat, lon, area_id, self.max_snap_distance_km)
+                if found is None:
+                    return None
+                footprint, distance = found
+        
+        lon_min, lat_min, lon_max, lat_max = footprint["bbox"]
+        dates = sorted(footprint["dates"])
+        return {
+            "area_id": footprint["area_id"],
+            "date": dates[-1],
+            "dates": dates,
+            "bbox": footprint["bbox"],
+            "center_lat": (lat_min + lat_max) / 2,
+            "center_lon": (lon_min + lon_max) / 2,
+            "distance_km": distance,
+        }
     
-    def load_image(self, area_id: str, date: str) -> np.ndarray:
+    def load_image(
+        self,
+        area_id: str,
+        date: str,
+        window: Optional[Window] = None,
+        overview: int = 0
+    ) -> np.ndarray:
         """
         Load satellite image for given area and date.
         
+        A window and/or overview level reads just that part of the tile from
+        its COG (built on first use), so low-zoom previews and full-resolution
+        crops do not decode the whole tile.
+        
+        Args:
+            area_id: Area identifier
+            date: Date string (YYYY-MM-DD)
+            window: (col_off, row_off, width, height) in full-resolution
+                pixels (whole tile if None)
+            overview: 0 for full resolution, n for 1/2**n resolution
+        
+        Returns:
+            Image as numpy array (H, W, C); a read-only np.memmap view when
+            a tile store is configured and the whole tile is requested
+        
+        Raises:
+            FileNotFoundError: If no image exists for the area and date
+            ValueError: If the window lies outside the tile
+        """
+        path = self.get_image_path(area_id, date)
+        if path is None:
+            raise FileNotFoundError(f"No imagery for {area_id} on {date}")
+        
+        if window is None and overview == 0:
+            if self.tile_store is not None:
+                with metrics.timer("mmap"):
+                    return self.tile_store.load(path, self.decode_image)
+            return self.decode_image(path)
+        
+        cog_path = self.get_cog_path(area_id, date)
+        if cog_path is not None:
+            with metrics.timer("cog_read"):
+                image = read_cog(cog_path, window, overview)
+            metrics.inc(metrics.BYTES_DECODED, image.nbytes, source="cog")
+            return image
+        return crop_and_scale(self.load_image(area_id, date), window, overview)
+    
+    def get_cog_path(self, area_id: str, date: str) -> Optional[Path]:
+        """
+        COG for an area and date, ingesting it from the source tile if stale.
+        
         Args:
             area_id: Area identifier
             date: Date string (YYYY-MM-DD)
         
         Returns:
-            Image as numpy array (H, W, C)
+            Path to the COG, or None without a COG store or a known bbox
         """
-        # TODO: Implement image loading
-        pass
+        path = self.get_image_path(area_id, date)
+        if self.cog_store is None or path is None:
+            return None
+        bbox = self.get_tile_bbox(area_id, date)
+        if bbox is None:
+            return None
+        self.cog_store.ingest(path, area_id, date, bbox, self.decode_image)
+        return self.cog_store.path(area_id, date)
+    
+    def get_image_path(self, area_id: str, date: str) -> Optional[Path]:
+        """
+        Locate the source image file for an area and date.
+        
+        Args:
+            area_id: Area identifier
+            date: Date string (YYYY-MM-DD)
+        
+        Returns:
+            Path to the image or None if missing
+        """
+        area_dir = self.imagery_dir / area_id
+        for suffix in IMAGE_SUFFIXES:
+            path = area_dir / f"{date}{suffix}"
+            if path.exists():
+                return path
+        return None
+    
+    def get_tile_bbox(self, area_id: str, date: str) -> Optional[List[float]]:
+        """
+        Geographic footprint of a tile.
+        
+        Args:
+            area_id: Area identifier
+            date: Date string (YYYY-MM-DD)
+        
+        Returns:
+            [lon_min, lat_min, lon_max, lat_max] or None if unknown
+        """
+        self.refresh_index()
+        return self.index.bbox(area_id, date)
+    
+    @staticmethod
+    def decode_image(path: Path) -> np.ndarray:
+        """
+        Decode an image file into an RGB uint8 array.
+        
+        Args:
+            path: Image file path
+        
+        Returns:
+            Image as numpy array (H, W, 3)
+        """
+        from PIL import Image
+        
+        with metrics.timer("decode"), Image.open(path) as img:
+            image = np.asarray(img.convert("RGB"))
+        metrics.inc(metrics.BYTES_DECODED, image.nbytes, source="image")
+        return image
     
     def get_available_dates(self, area_id: str) -> list[str]:
         """
@@ -67,18 +257,30 @@ class ImageryManager:
         Returns:
             List of date strings
         """
-        # TODO: Implement date listing
-        pass
+        self.refresh_index()
+        return self.index.dates(area_id)
     
-    def preprocess_image(self, image: np.ndarray) -> np.ndarray:
+    def preprocess_image(self, image: np.ndarray, max_size: Optional[int] = None) -> np.ndarray:
         """
         Preprocess image for model input.
         
         Args:
             image: Raw image array
+            max_size: Downscale so neither side exceeds this (optional)
         
         Returns:
-            Preprocessed image
+            Preprocessed image, float32 in [0, 1], shape (H, W, 3)
         """
-        # TODO: Implement preprocessing (normalization, resizing, etc.)
-        pass
+        if image.ndim == 2:
+            image = np.repeat(image[:, :, None], 3, axis=2)
+        image = image[:, :, :3]
+        
+        height, width = image.shape[:2]
+        if max_size is not None and max(height, width) > max_size:
+            import cv2
+            
+            scale = max_size / max(height, width)
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = cv2.resize(np.ascontiguousarray(image), size, interpolation=cv2.INTER_AREA)
+        
+        return image.astype(np.float32) / 255.0
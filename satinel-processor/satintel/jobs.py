@@ -0,0 +1,237 @@
+"""
+Jobs Module - Background job queue for tasking requests.
+
+Responsibilities:
+- Run pipeline work on a worker pool instead of the request thread
+- Track job status and per-stage progress events for polling and SSE
+  (async waiters are woken on their event loop, without a thread each)
+- Deduplicate identical in-flight requests so only one computation runs
+- Retain a bounded number of finished jobs for late pollers
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """One unit of background work and its progress history."""
+
+    def __init__(self, key: Hashable):
+        """
+        Initialize a queued job.
+
+        Args:
+            key: Deduplication key (e.g. (area_id, date))
+        """
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.stage: Optional[str] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.error_type: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.events: List[Dict] = []
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        with self._cond:
+            self._emit()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        """Status snapshot suitable for a JSON response."""
+        with self._cond:
+            data = {
+                "job_id": self.id,
+                "status": self.status,
+                "stage": self.stage,
+                "error": self.error,
+                "created": self.created,
+                "finished": self.finished,
+            }
+            if include_result:
+                data["result"] = self.result
+        return data
+
+    def wait(self, after: int = 0, timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Block until there are events past index `after` or the job finishes.
+
+        Args:
+            after: Number of events the caller has already seen
+            timeout: Seconds to wait at most (None waits indefinitely)
+
+        Returns:
+            New events (empty on timeout)
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > after or self.is_finished, timeout)
+            return self.events[after:]
+
+    async def wait_async(self, after: int = 0, timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Coroutine version of wait for event-loop callers (e.g. SSE streams).
+
+        Suspends the coroutine instead of blocking a thread; the worker
+        thread that emits the next event wakes it via call_soon_threadsafe.
+
+        Args:
+            after: Number of events the caller has already seen
+            timeout: Seconds to wait at most (None waits indefinitely)
+
+        Returns:
+            New events (empty on timeout)
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            if len(self.events) > after or self.is_finished:
+                return self.events[after:]
+            self._async_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                if waiter in self._async_waiters:
+                    self._async_waiters.remove(waiter)
+        with self._cond:
+            return self.events[after:]
+
+    def progress(self, stage: str):
+        """Record that a stage started."""
+        with self._cond:
+            self.stage = stage
+            self._emit()
+
+    def start(self):
+        with self._cond:
+            self.status = RUNNING
+            self._emit()
+
+    def complete(self, result: Any):
+        with self._cond:
+            self.status, self.result, self.finished = DONE, result, time.time()
+            self._emit()
+
+    def fail(self, error: BaseException):
+        with self._cond:
+            self.status, self.finished = FAILED, time.time()
+            self.error, self.error_type = str(error), type(error).__name__
+            self._emit()
+
+    def _emit(self):
+        # Caller holds the condition
+        self.events.append({
+            "seq": len(self.events),
+            "status": self.status,
+            "stage": self.stage,
+            "time": time.time(),
+        })
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+
+class JobManager:
+    """Worker pool with in-flight deduplication and bounded job history."""
+
+    def __init__(self, max_workers: int = 2, max_finished: int = 1000):
+        """
+        Initialize job manager.
+
+        Args:
+            max_workers: Jobs executed concurrently
+            max_finished: Finished jobs kept for polling before being forgotten
+        """
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="satintel-job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._in_flight: Dict[Hashable, Job] = {}
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def submit(
+        self,
+        key: Hashable,
+        work: Callable[[Callable[[str], None]], Any],
+        deduplicate: bool = True
+    ) -> Tuple[Job, bool]:
+        """
+        Queue work unless an identical job is already queued or running.
+
+        Args:
+            key: Deduplication key
+            work: Function called with a progress(stage) callback; its
+                return value becomes the job result
+            deduplicate: False always queues a new job that others cannot
+                attach to (e.g. a profiled run)
+
+        Returns:
+            (job, deduplicated) - the existing job and True when one was in flight
+        """
+        with self._lock:
+            existing = self._in_flight.get(key) if deduplicate else None
+            if existing is not None:
+                self.deduplicated += 1
+                return existing, True
+            job = Job(key)
+            self._jobs[job.id] = job
+            if deduplicate:
+                self._in_flight[key] = job
+            self.submitted += 1
+        self._executor.submit(self._run, job, work)
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Job by id, or None if unknown or already forgotten."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict:
+        """Counts of jobs by status plus submission/deduplication counters."""
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return {**counts, "submitted": self.submitted, "deduplicated": self.deduplicated}
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, work: Callable[[Callable[[str], None]], Any]):
+        job.start()
+        try:
+            result = work(job.progress)
+        except Exception as e:
+            job.fail(e)
+        else:
+            job.complete(result)
+        finally:
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+                self._trim()
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
@@ -0,0 +1,408 @@
+"""
+Map Tiles Module - XYZ (Web Mercator) tiles rendered from the stored rasters.
+
+Responsibilities:
+- Render 256x256 imagery and building-mask tiles for any z/x/y on demand,
+  resampling every overlapping source tile (windowed COG reads where available)
+- Keep rendered tiles in a size-bounded disk cache, fronted by an in-memory
+  LRU, with a content ETag per tile
+- Pre-render the tiles around points of interest (seeding)
+"""
+
+import hashlib
+import io
+import math
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from satintel.cache import LRUCache
+from satintel.pipeline import TaskPipeline
+from satintel.singleflight import SingleFlight
+from satintel.tile_index import parse_tile_date
+
+TILE_SIZE = 256
+MAX_ZOOM = 22
+LAYERS = ("imagery", "buildings")
+
+# (layer, date or 'latest-<hash of the latest dates drawn>', z, x, y)
+TileKey = Tuple[str, str, int, int, int]
+
+
+def tile_bounds(z: int, x: int, y: int) -> List[float]:
+    """
+    Geographic bounds of an XYZ tile.
+
+    Args:
+        z: Zoom level
+        x: Tile column
+        y: Tile row (0 at the north edge)
+
+    Returns:
+        [lon_min, lat_min, lon_max, lat_max]
+    """
+    n = 2 ** z
+    return [x / n * 360.0 - 180.0, float(_tile_lat(y + 1, n)), (x + 1) / n * 360.0 - 180.0, float(_tile_lat(y, n))]
+
+
+def lonlat_to_tile(lat: float, lon: float, z: int) -> Tuple[int, int]:
+    """
+    XYZ tile containing a point.
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        z: Zoom level
+
+    Returns:
+        (x, y)
+    """
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def _tile_lat(y, n: int):
+    return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y, dtype=np.float64) / n))))
+
+
+class MapTileCache:
+    """Size-bounded disk cache of encoded tiles with an in-memory hot set."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int, memory_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize tile cache, indexing tiles already on disk.
+
+        Args:
+            cache_dir: Directory holding <namespace>/<layer>/<date>/<z>/<x>/<y>.png
+            max_bytes: Disk budget; least recently used tiles are deleted beyond it
+            memory_bytes: Budget of the in-memory LRU in front of the disk
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory = LRUCache(memory_bytes, name="maptiles")
+        self._lock = threading.Lock()
+        self._files: "OrderedDict[Path, int]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+        if cache_dir.exists():
+            found = [(p.stat().st_mtime_ns, p, p.stat().st_size) for p in cache_dir.rglob("*.png")]
+            for _, path, size in sorted(found):
+                self._files[path] = size
+                self._bytes += size
+
+    def path(self, namespace: str, key: TileKey) -> Path:
+        """Disk location of a tile."""
+        layer, date, z, x, y = key
+        return self.cache_dir / namespace / layer / date / str(z) / str(x) / f"{y}.png"
+
+    def get(self, namespace: str, key: TileKey) -> Optional[Tuple[bytes, str]]:
+        """
+        Look up an encoded tile.
+
+        Args:
+            namespace: Renderer fingerprint the tile was produced under
+            key: Tile key
+
+        Returns:
+            (png bytes, etag) or None on a miss
+        """
+        hot = self.memory.get((namespace, key))
+        if hot is not None:
+            return hot
+
+        path = self.path(namespace, key)
+        with self._lock:
+            if path not in self._files:
+                return None
+            self._files.move_to_end(path)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        entry = (data, etag_of(data))
+        self.memory.put((namespace, key), entry, nbytes=len(data))
+        return entry
+
+    def put(self, namespace: str, key: TileKey, data: bytes) -> Tuple[bytes, str]:
+        """
+        Store an encoded tile, evicting least recently used tiles over budget.
+
+        Returns:
+            (png bytes, etag)
+        """
+        entry = (data, etag_of(data))
+        self.memory.put((namespace, key), entry, nbytes=len(data))
+
+        path = self.path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        doomed = []
+        with self._lock:
+            self._bytes -= self._files.pop(path, 0)
+            self._files[path] = len(data)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                old_path, old_size = self._files.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+                doomed.append(old_path)
+        for old_path in doomed:
+            try:
+                old_path.unlink()
+            except OSError:
+                pass
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of disk occupancy and eviction counters."""
+        with self._lock:
+            return {
+                "tiles": len(self._files),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+def etag_of(data: bytes) -> str:
+    """Short content hash used as a tile's ETag."""
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+class MapTileRenderer:
+    """Renders XYZ tiles of imagery and building masks from the pipeline's stages."""
+
+    def __init__(
+        self,
+        pipeline: TaskPipeline,
+        cache: Optional[MapTileCache] = None,
+        tile_size: int = TILE_SIZE,
+        building_color: Tuple[int, int, int] = (255, 0, 0),
+        building_alpha: float = 0.5,
+        png_compress_level: int = 1
+    ):
+        """
+        Initialize tile renderer.
+
+        Args:
+            pipeline: Pipeline providing imagery, the tile index and masks
+            cache: Rendered tile cache (every request renders when omitted)
+            tile_size: Output tile edge in pixels
+            building_color: RGB of building pixels on the buildings layer
+            building_alpha: Opacity of building pixels (0-1)
+            png_compress_level: zlib level for tile PNGs (0-9)
+        """
+        self.pipeline = pipeline
+        self.cache = cache
+        self.tile_size = tile_size
+        self.building_rgba = np.array([*building_color, round(building_alpha * 255)], dtype=np.uint8)
+        self.png_compress_level = png_compress_level
+        self._flights = SingleFlight()
+        self._shapes: Dict[Tuple[str, str, int], Tuple[int, int]] = {}
+
+    @property
+    def fingerprint(self) -> str:
+        """Cache namespace; changes with the model and analysis settings."""
+        digest = hashlib.blake2b(digest_size=6)
+        digest.update(f"{self.pipeline.detector.model_version}:{self.pipeline.settings_hash}".encode())
+        digest.update(f"{self.tile_size}:{self.building_rgba.tobytes().hex()}".encode())
+        return digest.hexdigest()
+
+    def tile(self, layer: str, z: int, x: int, y: int, date: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        Encoded tile, from cache when possible.
+
+        Args:
+            layer: 'imagery' or 'buildings'
+            z: Zoom level
+            x: Tile column
+            y: Tile row
+            date: Acquisition date (latest date of each source tile if None)
+
+        Returns:
+            (png bytes, etag)
+
+        Raises:
+            ValueError: If the layer or tile coordinates are invalid, or the
+                date is not a YYYY-MM-DD date of a source tile under this tile
+        """
+        if layer not in LAYERS:
+            raise ValueError(f"Unknown layer '{layer}'")
+        if not (0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"Tile {z}/{x}/{y} out of range")
+        if date is not None:
+            # The date becomes a cache path component: never accept arbitrary strings
+            if parse_tile_date(date) != date:
+                raise ValueError(f"Invalid date '{date}' (expected YYYY-MM-DD)")
+            imagery = self.pipeline.imagery
+            imagery.refresh_index()
+            if not any(date in f["dates"] for f in imagery.index.intersecting(tile_bounds(z, x, y))):
+                raise ValueError(f"No imagery on {date} under tile {z}/{x}/{y}")
+
+        key = (layer, date or self._latest_tag(z, x, y), z, x, y)
+        if self.cache is None:
+            data = self.encode(self.render(layer, z, x, y, date))
+            return data, etag_of(data)
+
+        namespace = self.fingerprint
+        cached = self.cache.get(namespace, key)
+        if cached is not None:
+            return cached
+        return self._flights.do(
+            (namespace, key),
+            lambda: self.cache.get(namespace, key)
+            or self.cache.put(namespace, key, self.encode(self.render(layer, z, x, y, date)))
+        )
+
+    def _latest_tag(self, z: int, x: int, y: int) -> str:
+        # A new acquisition changes the tag, so 'latest' tiles never go stale
+        imagery = self.pipeline.imagery
+        imagery.refresh_index()
+        drawn = sorted(
+            f"{f['area_id']}@{max(f['dates'])}" for f in imagery.index.intersecting(tile_bounds(z, x, y))
+        )
+        return "latest-" + hashlib.blake2b("|".join(drawn).encode(), digest_size=6).hexdigest()
+
+    def render(self, layer: str, z: int, x: int, y: int, date: Optional[str] = None) -> np.ndarray:
+        """
+        Render a tile as RGBA.
+
+        Source tiles are painted largest first, so finer footprints win where
+        they overlap. Pixels outside every source tile stay transparent.
+
+        Returns:
+            (tile_size, tile_size, 4) uint8 image
+        """
+        size = self.tile_size
+        bounds = tile_bounds(z, x, y)
+        out = np.zeros((size, size, 4), dtype=np.uint8)
+
+        # Pixel-center coordinates: lon is linear in x, lat follows Mercator in y
+        steps = (np.arange(size) + 0.5) / size
+        lons = bounds[0] + steps * (bounds[2] - bounds[0])
+        lats = _tile_lat(y + steps, 2 ** z)
+
+        imagery = self.pipeline.imagery
+        imagery.refresh_index()
+        for footprint in imagery.index.intersecting(bounds):
+            dates = sorted(footprint["dates"])
+            if date is not None and date not in dates:
+                continue
+            tile_date = date or dates[-1]
+            area_id = footprint["area_id"]
+            try:
+                if layer == "imagery":
+                    self._paint_imagery(out, area_id, tile_date, footprint["bbox"], lons, lats)
+                else:
+                    self._paint_buildings(out, area_id, tile_date, footprint["bbox"], lons, lats)
+            except FileNotFoundError:
+                continue
+        return out
+
+    def encode(self, tile: np.ndarray) -> bytes:
+        """Encode an RGBA tile as PNG."""
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.fromarray(tile, "RGBA").save(buffer, format="PNG", compress_level=self.png_compress_level)
+        return buffer.getvalue()
+
+    def seed(self, points: Iterable[Tuple[float, float]], zooms: Sequence[int], radius: int = 1,
+             layers: Sequence[str] = LAYERS) -> int:
+        """
+        Pre-render the tiles around points of interest.
+
+        Args:
+            points: (lat, lon) pairs
+            zooms: Zoom levels to seed
+            radius: Tiles on each side of the tile containing a point
+            layers: Layers to seed
+
+        Returns:
+            Number of distinct tiles rendered or refreshed
+        """
+        keys = set()
+        for lat, lon in points:
+            for z in zooms:
+                cx, cy = lonlat_to_tile(lat, lon, z)
+                n = 2 ** z
+                for x in range(max(cx - radius, 0), min(cx + radius, n - 1) + 1):
+                    for y in range(max(cy - radius, 0), min(cy + radius, n - 1) + 1):
+                        keys.update((layer, z, x, y) for layer in layers)
+        for layer, z, x, y in sorted(keys):
+            self.tile(layer, z, x, y)
+        return len(keys)
+
+    # ------------------------------------------------------------------
+    # Resampling
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _source_pixels(bbox: Sequence[float], height: int, width: int, lons: np.ndarray, lats: np.ndarray):
+        """Source row/col of each output pixel center plus the in-bounds masks."""
+        lon_min, lat_min, lon_max, lat_max = bbox
+        cols = np.floor((lons - lon_min) / (lon_max - lon_min) * width).astype(np.int64)
+        rows = np.floor((lat_max - lats) / (lat_max - lat_min) * height).astype(np.int64)
+        col_ok = (cols >= 0) & (cols < width)
+        row_ok = (rows >= 0) & (rows < height)
+        return rows, cols, row_ok, col_ok
+
+    def _paint_imagery(self, out, area_id, date, bbox, lons, lats):
+        path = self.pipeline.imagery.get_image_path(area_id, date)
+        if path is None:
+            return
+        height, width = self._source_shape(area_id, date, path)
+        rows, cols, row_ok, col_ok = self._source_pixels(bbox, height, width, lons, lats)
+        if not row_ok.any() or not col_ok.any():
+            return
+
+        # Read only the covered window, at the coarsest overview that still
+        # has at least one source pixel per output pixel
+        r0, r1 = rows[row_ok].min(), rows[row_ok].max() + 1
+        c0, c1 = cols[col_ok].min(), cols[col_ok].max() + 1
+        src_per_px = (c1 - c0) / max(col_ok.sum(), 1)
+        overview = max(0, int(math.floor(math.log2(src_per_px)))) if src_per_px >= 2 else 0
+        factor = 2 ** overview
+        window = self.pipeline.imagery.load_image(area_id, date, window=(c0, r0, c1 - c0, r1 - r0), overview=overview)
+
+        sub_rows = np.minimum((rows[row_ok] - r0) // factor, window.shape[0] - 1)
+        sub_cols = np.minimum((cols[col_ok] - c0) // factor, window.shape[1] - 1)
+        block = out[np.ix_(row_ok, col_ok)]
+        block[..., :3] = window[np.ix_(sub_rows, sub_cols)][..., :3]
+        block[..., 3] = 255
+        out[np.ix_(row_ok, col_ok)] = block
+
+    def _paint_buildings(self, out, area_id, date, bbox, lons, lats):
+        mask = self.pipeline.mask(area_id, date)
+        rows, cols, row_ok, col_ok = self._source_pixels(bbox, mask.shape[0], mask.shape[1], lons, lats)
+        if not row_ok.any() or not col_ok.any():
+            return
+        hit = mask[np.ix_(rows[row_ok], cols[col_ok])] > 0
+        block = out[np.ix_(row_ok, col_ok)]
+        block[hit] = self.building_rgba
+        out[np.ix_(row_ok, col_ok)] = block
+
+    def _source_shape(self, area_id: str, date: str, path: Path) -> Tuple[int, int]:
+        stamp = (area_id, date, path.stat().st_mtime_ns)
+        shape = self._shapes.get(stamp)
+        if shape is None:
+            cog_path = self.pipeline.imagery.get_cog_path(area_id, date)
+            if cog_path is not None:
+                import rasterio
+
+                with rasterio.open(cog_path) as src:
+                    shape = (src.height, src.width)
+            else:
+                shape = tuple(self.pipeline.image(area_id, date).shape[:2])
+            self._shapes[stamp] = shape
+        return shape
@@ -0,0 +1,248 @@
+"""
+Metrics Module - Lightweight in-process instrumentation for the hot path.
+
+Responsibilities:
+- Time pipeline stages with a context manager / decorator into latency
+  histograms (satintel_stage_seconds{stage=...})
+- Count decoded bytes, cache hits and misses, and record model batch sizes
+- Collect a per-request stage breakdown (seconds per stage) for TaskResponse
+- Render everything in the Prometheus text exposition format for /metrics
+
+Timings are recorded by the thread doing the work. StageExecutor propagates
+the request context into its thread pool; work run in a process pool is only
+visible through the pipeline-level timer around it.
+"""
+
+import contextvars
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+# Seconds; covers sub-millisecond lookups up to minute-long CPU inference
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+STAGE_SECONDS = "satintel_stage_seconds"
+BYTES_DECODED = "satintel_bytes_decoded_total"
+CACHE_REQUESTS = "satintel_cache_requests_total"
+MODEL_BATCH_SIZE = "satintel_model_batch_size"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Per-request stage -> seconds, set by collect()
+_stages: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("satintel_stages", default=None)
+
+
+class _Histogram:
+    """Cumulative-bucket histogram per label set."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.series: Dict[Labels, list] = {}
+
+    def observe(self, labels: Labels, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            # [bucket counts..., +Inf count, sum]
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+
+class MetricsRegistry:
+    """Thread-safe registry of counters, gauges and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, str] = {}
+        self._types: Dict[str, str] = {}
+        self._values: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, _Histogram] = {}
+        self.histogram(STAGE_SECONDS, "Latency of pipeline stages", LATENCY_BUCKETS)
+        self.counter(BYTES_DECODED, "Bytes of pixel data decoded from imagery")
+        self.counter(CACHE_REQUESTS, "Cache lookups by cache and result (hit/miss)")
+        self.histogram(MODEL_BATCH_SIZE, "Windows per model forward pass", BATCH_SIZE_BUCKETS)
+
+    def counter(self, name: str, help: str):
+        """Declare a counter (idempotent)."""
+        self._declare(name, "counter", help)
+
+    def gauge(self, name: str, help: str):
+        """Declare a gauge (idempotent)."""
+        self._declare(name, "gauge", help)
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        """Declare a histogram with upper bucket bounds (idempotent)."""
+        with self._lock:
+            if name not in self._histograms:
+                self._help[name] = help
+                self._types[name] = "histogram"
+                self._histograms[name] = _Histogram(buckets)
+
+    def _declare(self, name: str, kind: str, help: str):
+        with self._lock:
+            if name not in self._types:
+                self._help[name] = help
+                self._types[name] = kind
+                self._values[name] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        """
+        Add to a counter.
+
+        Raises:
+            KeyError: If the counter was never declared
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str):
+        """Set a gauge."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[name][key] = value
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Record a histogram observation."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._histograms[name].observe(key, value)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """
+        Time a block as a pipeline stage.
+
+        The duration goes into satintel_stage_seconds{stage=...} and, inside
+        collect(), into the request's breakdown. Failed blocks are recorded
+        too, so slow failures show up in the tail.
+
+        Args:
+            stage: Stage name (decode, detect, forward, ...)
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            key = (("stage", stage),)
+            stages = _stages.get()
+            with self._lock:
+                self._histograms[STAGE_SECONDS].observe(key, elapsed)
+                if stages is not None:
+                    stages[stage] = stages.get(stage, 0.0) + elapsed
+
+    def timed(self, stage: str) -> Callable[[Callable], Callable]:
+        """Decorator form of timer()."""
+        def decorate(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Current values as plain dicts.
+
+        Returns:
+            name -> {label string -> value}; histograms map to
+            {'count', 'sum'} per label string
+        """
+        with self._lock:
+            out = {name: {_format_labels(k): v for k, v in series.items()} for name, series in self._values.items()}
+            for name, hist in self._histograms.items():
+                out[name] = {
+                    _format_labels(k): {"count": sum(s[:-1]), "sum": s[-1]}
+                    for k, s in hist.series.items()
+                }
+        return out
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for name in sorted(self._types):
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {self._types[name]}")
+                if name in self._histograms:
+                    hist = self._histograms[name]
+                    for key in sorted(hist.series):
+                        series = hist.series[key]
+                        cumulative = 0
+                        for bound, count in zip(hist.buckets + (math.inf,), series[:-1]):
+                            cumulative += count
+                            le = "+Inf" if bound == math.inf else repr(float(bound))
+                            lines.append(f"{name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                        lines.append(f"{name}_sum{_format_labels(key)} {series[-1]!r}")
+                        lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+                else:
+                    for key in sorted(self._values[name]):
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(self._values[name][key])}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop every recorded value (declarations are kept)."""
+        with self._lock:
+            for series in self._values.values():
+                series.clear()
+            for hist in self._histograms.values():
+                hist.series.clear()
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+@contextmanager
+def collect() -> Iterator[Dict[str, float]]:
+    """
+    Collect stage timings of the enclosed work (this thread and context-propagating pools).
+
+    Nested collections also add their timings to the enclosing one.
+
+    Yields:
+        Dict stage -> seconds, filled as stages finish
+    """
+    outer = _stages.get()
+    stages: Dict[str, float] = {}
+    token = _stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _stages.reset(token)
+        if outer is not None:
+            with REGISTRY._lock:
+                for stage, seconds in stages.items():
+                    outer[stage] = outer.get(stage, 0.0) + seconds
+
+
+# Process-wide registry used by the instrumented modules and /metrics
+REGISTRY = MetricsRegistry()
+
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+render = REGISTRY.render
@@ -6,27 +6,100 @@ Responsibilities:
 - Run inference on satellite imagery
 - Convert masks to polygons/bounding boxes
 - Model management and optimization
+- Store precomputed masks compactly (bit-packed/RLE, see satintel.maskfile)
+- Record detection and forward-pass latencies and batch sizes (satintel.metrics)
 """
 
+import hashlib
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
+
+from satintel import maskfile, metrics
+from satintel.labeling import label_buildings, trace_rings
+from satintel.table import BuildingTable
 
 
 class BuildingDetector:
     """Detects buildings in satellite imagery using deep learning."""
     
-    def __init__(self, model_path: Optional[Path] = None):
+    def __init__(
+        self,
+        model_path: Optional[Path] = None,
+        min_building_size: int = 10,
+        threshold: float = 0.0,
+        tile_size: Optional[int] = None,
+        tile_overlap: int = 64,
+        batch_size: int = 4
+    ):
         """
         Initialize building detector.
         
         Args:
             model_path: Path to pretrained model weights (optional)
+            min_building_size: Smallest component kept, in pixels
+            threshold: Logit threshold above which a pixel is a building
+            tile_size: Sliding-window size for inference; None runs the
+                model on the whole image at once
+            tile_overlap: Pixels shared by neighbouring windows, blended
+            batch_size: Windows per forward pass
         """
         self.model = None
         self.model_path = model_path
+        self.min_building_size = min_building_size
+        self.threshold = threshold
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.batch_size = batch_size
+        self.batcher = None
+        self.artifact: Optional[str] = None
+        self._version: Optional[Tuple[Tuple[int, int], str]] = None
+        self._loaded_version: Optional[str] = None
+    
+    @property
+    def model_version(self) -> str:
+        """
+        Short content hash of the model weights ("none" without weights).
+        
+        Once a model is loaded this is the hash of the weights it was loaded
+        from, so results keyed on it always describe the model that produced
+        them, even if the file is replaced afterwards. Without a loaded model
+        it follows the file (recomputed only when its mtime or size changes).
+        """
+        if self.model is not None and self._loaded_version is not None:
+            return self._loaded_version
+        return self._file_version()
     
-    def load_model(self):
+    @property
+    def mask_version(self) -> str:
+        """
+        model_version plus the inference settings that change its masks
+        (artifact, threshold, window size and overlap).
+        
+        Recorded in the header of masks this detector produces, so a stored
+        mask is only reused by a detector that would produce the same one.
+        """
+        inference = repr((self.artifact, self.threshold, self.tile_size, self.tile_overlap))
+        return f"{self.model_version}-{hashlib.sha256(inference.encode()).hexdigest()[:8]}"
+    
+    def _file_version(self) -> str:
+        if self.model_path is None or not Path(self.model_path).exists():
+            return "none"
+        
+        from satintel.tile_store import file_sha256
+        
+        stat = Path(self.model_path).stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if self._version is None or self._version[0] != stamp:
+            self._version = (stamp, file_sha256(Path(self.model_path))[:16])
+        return self._version[1]
+    
+    def load_model(
+        self,
+        artifact: str = "auto",
+        intra_op_threads: Optional[int] = None,
+        inter_op_threads: Optional[int] = None
+    ):
         """
         Load pretrained building segmentation model.
         
@@ -35,35 +108,202 @@ class BuildingDetector:
         - DeepLabV3+ for semantic segmentation
         - Mask R-CNN for instance segmentation
         - Or precomputed masks for demo
+        
+        Exported TorchScript/ONNX/int8 variants prepared by
+        `python -m satintel.runtime prepare` are used when present.
+        
+        Args:
+            artifact: "auto" picks the fastest prepared variant that passed
+                the accuracy report; or force one of satintel.runtime.ARTIFACT_ORDER
+            intra_op_threads: Threads used inside one operator (optional)
+            inter_op_threads: Threads running independent operators (optional)
+        
+        Raises:
+            FileNotFoundError: If model_path is unset or missing
         """
-        # TODO: Implement model loading
-        pass
+        if self.model_path is None or not Path(self.model_path).exists():
+            raise FileNotFoundError(f"Model weights not found: {self.model_path}")
+        
+        from satintel import runtime
+        
+        model_path = Path(self.model_path)
+        if artifact == "auto":
+            artifact = runtime.select_artifact(model_path)
+        # Hashed before loading so the pinned version never describes newer weights
+        version = self._file_version()
+        self.model = runtime.load_artifact(model_path, artifact, intra_op_threads, inter_op_threads)
+        self.artifact = artifact
+        self._loaded_version = version
+        return self.model
     
-    def detect_buildings(self, image: np.ndarray) -> np.ndarray:
+    @metrics.timed("detect")
+    def detect_buildings(self, image: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Detect buildings in satellite image.
         
+        With tile_size set, the scene is processed as overlapping windows,
+        one row of windows at a time. Window logits are feathered across the
+        overlap and normalised by the summed weights, so there are no seams,
+        and only a (tile_size, W) strip of logits is held at once.
+        
         Args:
-            image: Preprocessed satellite image (H, W, C)
+            image: Preprocessed satellite image (H, W, C) as float in [0, 1],
+                or raw uint8 (normalised per window, so large scenes never
+                need a full float copy)
+            out: Preallocated (H, W) uint8 output, e.g. an np.memmap (optional)
         
         Returns:
             Binary mask (H, W) where 1 = building, 0 = background
+        
+        Raises:
+            RuntimeError: If no model is loaded
+        """
+        if self.model is None:
+            raise RuntimeError("No building detection model loaded")
+        
+        height, width = image.shape[:2]
+        if out is None:
+            out = np.zeros((height, width), dtype=np.uint8)
+        
+        if self.tile_size is None:
+            batch = self._window_batch(image, [(0, 0)], height, width)
+            out[:] = self._predict(batch)[0, 0, :height, :width] > self.threshold
+            return out
+        
+        tile = self.tile_size
+        overlap = min(self.tile_overlap, tile // 2)
+        weights = self._blend_weights(tile, overlap)
+        ys = self._window_origins(height, tile, tile - overlap)
+        xs = self._window_origins(width, tile, tile - overlap)
+        
+        acc = np.zeros((tile, width), dtype=np.float32)
+        wsum = np.zeros((tile, width), dtype=np.float32)
+        for i, y in enumerate(ys):
+            origins = [(y, x) for x in xs]
+            for start in range(0, len(origins), self.batch_size):
+                chunk = origins[start:start + self.batch_size]
+                logits = self._predict(self._window_batch(image, chunk, tile, tile))
+                for (_, x), window in zip(chunk, logits[:, 0]):
+                    w = min(tile, width - x)
+                    acc[:, x:x + w] += window[:, :w] * weights[:, :w]
+                    wsum[:, x:x + w] += weights[:, :w]
+            
+            # Rows above the next window row receive no further contributions
+            done = (ys[i + 1] if i + 1 < len(ys) else height) - y
+            done = min(done, height - y)
+            out[y:y + done] = acc[:done] / wsum[:done] > self.threshold
+            
+            keep = tile - done
+            acc[:keep] = acc[done:done + keep]
+            wsum[:keep] = wsum[done:done + keep]
+            acc[keep:] = 0
+            wsum[keep:] = 0
+        
+        return out
+    
+    @staticmethod
+    def _window_origins(length: int, tile: int, stride: int) -> List[int]:
+        """Window start offsets covering [0, length) with the last flush to the edge."""
+        if length <= tile:
+            return [0]
+        origins = list(range(0, length - tile + 1, stride))
+        if origins[-1] != length - tile:
+            origins.append(length - tile)
+        return origins
+    
+    @staticmethod
+    def _blend_weights(tile: int, overlap: int) -> np.ndarray:
+        """(tile, tile) feathering weights: sin² ramps over the overlap, 1 inside."""
+        ramp = np.ones(tile, dtype=np.float32)
+        if overlap > 0:
+            t = (np.arange(overlap, dtype=np.float32) + 0.5) / overlap
+            edge = np.sin(t * np.pi / 2) ** 2
+            ramp[:overlap] = edge
+            ramp[-overlap:] = np.minimum(ramp[-overlap:], edge[::-1])
+        return np.outer(ramp, ramp)
+    
+    @staticmethod
+    def _window_batch(image: np.ndarray, origins: List[Tuple[int, int]], tile_h: int, tile_w: int) -> np.ndarray:
+        """Cut, zero-pad and normalise windows into an (N, C, tile_h, tile_w) float32 batch."""
+        channels = image.shape[2]
+        batch = np.zeros((len(origins), channels, tile_h, tile_w), dtype=np.float32)
+        scale = 1.0 / 255.0 if image.dtype == np.uint8 else 1.0
+        for n, (y, x) in enumerate(origins):
+            window = image[y:y + tile_h, x:x + tile_w]
+            h, w = window.shape[:2]
+            np.multiply(window.transpose(2, 0, 1), scale, out=batch[n, :, :h, :w], casting="unsafe")
+        return batch
+    
+    def enable_batching(self, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        """
+        Route forward passes through a shared micro-batching engine, so
+        windows from concurrent requests are merged into larger batches.
+        
+        Args:
+            max_batch_size: Most windows per forward pass
+            max_wait_ms: Longest a window waits for others to join its batch
+        
+        Returns:
+            The BatchingEngine (its stats() feed the health endpoint)
+        """
+        from satintel.batching import BatchingEngine
+        
+        self.batcher = BatchingEngine(self._forward, max_batch_size, max_wait_ms)
+        return self.batcher
+    
+    def _predict(self, batch: np.ndarray) -> np.ndarray:
+        """Forward a batch, via the micro-batching engine when enabled."""
+        if self.batcher is not None:
+            return self.batcher.infer(batch)
+        return self._forward(batch)
+    
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Run the model on an (N, C, H, W) float32 batch.
+        
+        Torch modules are called under no_grad; any other callable is
+        assumed to map numpy batches to (N, 1, H, W) logits directly.
         """
-        # TODO: Implement building detection
-        pass
+        try:
+            import torch
+        except ImportError:
+            torch = None
+        
+        metrics.observe(metrics.MODEL_BATCH_SIZE, len(batch))
+        with metrics.timer("forward"):
+            if torch is not None and isinstance(self.model, torch.nn.Module):
+                with torch.no_grad():
+                    out = self.model(torch.from_numpy(batch))
+                if isinstance(out, dict):
+                    out = out["out"]
+                return out.numpy()
+            return np.asarray(self.model(batch))
     
-    def mask_to_polygons(self, mask: np.ndarray) -> List[Dict]:
+    def label_buildings(self, mask: np.ndarray) -> BuildingTable:
+        """
+        Label building instances in one connected-components pass.
+        
+        Args:
+            mask: Binary building mask
+        
+        Returns:
+            BuildingTable of ids, areas, bboxes and centroids (no rings),
+            filtered by min_building_size, with the label image attached
+        """
+        return label_buildings(mask, self.min_building_size)
+    
+    def mask_to_polygons(self, mask: np.ndarray, simplify_tolerance: Optional[float] = None) -> BuildingTable:
         """
         Convert binary mask to polygon representations.
         
         Args:
             mask: Binary building mask
+            simplify_tolerance: Douglas-Peucker tolerance in pixels (optional)
         
         Returns:
-            List of polygon dicts with coordinates and properties
+            BuildingTable with outer rings packed into one vertex buffer
         """
-        # TODO: Implement mask to polygon conversion
-        pass
+        return trace_rings(self.label_buildings(mask), simplify_tolerance)
     
     def compute_bounding_boxes(self, mask: np.ndarray) -> List[Tuple[int, int, int, int]]:
         """
@@ -75,21 +315,27 @@ class BuildingDetector:
         Returns:
             List of (x1, y1, x2, y2) bounding boxes
         """
-        # TODO: Implement bounding box computation
-        pass
+        return [tuple(box) for box in self.label_buildings(mask).bbox.tolist()]
 
 
 class PrecomputedMaskLoader:
-    """Loads precomputed masks for fast demo operation."""
+    """
+    Loads precomputed masks for fast demo operation.
+    
+    Masks are stored as data/masks/<area>/<date>.mask (see satintel.maskfile);
+    legacy <date>.npy masks are still read until they are rewritten.
+    """
     
-    def __init__(self, masks_dir: Path):
+    def __init__(self, masks_dir: Path, verify: bool = True):
         """
         Initialize mask loader.
         
         Args:
             masks_dir: Path to data/masks/ directory
+            verify: Check mask checksums on load
         """
         self.masks_dir = masks_dir
+        self.verify = verify
     
     def load_mask(self, area_id: str, date: str) -> np.ndarray:
         """
@@ -100,19 +346,112 @@ class PrecomputedMaskLoader:
             date: Date string (YYYY-MM-DD)
         
         Returns:
-            Binary mask array
+            Binary mask array (H, W) uint8 of 0/1
+        
+        Raises:
+            FileNotFoundError: If no mask has been saved for the area and date
+            MaskFileError: If the stored mask is corrupt
+        """
+        path = self.find_mask(area_id, date)
+        if path is None:
+            raise FileNotFoundError(f"No precomputed mask for {area_id} on {date}")
+        with metrics.timer("mask_load"):
+            if path.suffix == maskfile.SUFFIX:
+                return maskfile.read_mask(path, self.verify)
+            return np.load(path)
+    
+    def load_labels(self, area_id: str, date: str) -> np.ndarray:
+        """
+        Load a stored label image (see save_labels).
+        
+        Raises:
+            FileNotFoundError: If no label image has been saved
+        """
+        path = self.labels_path(area_id, date)
+        if not path.exists():
+            raise FileNotFoundError(f"No precomputed labels for {area_id} on {date}")
+        return maskfile.read_labels(path, self.verify)
+    
+    def has_mask(self, area_id: str, date: str, version: Optional[str] = None) -> bool:
+        """
+        Check whether a precomputed mask exists.
+        
+        Args:
+            area_id: Area identifier
+            date: Date string (YYYY-MM-DD)
+            version: Only count masks recorded as produced by this detector
+                version, or by none (hand-made and legacy .npy masks)
         """
-        # TODO: Implement mask loading
-        pass
+        if self.find_mask(area_id, date) is None:
+            return False
+        return version is None or self.mask_version(area_id, date) in (None, version)
+    
+    def mask_version(self, area_id: str, date: str) -> Optional[str]:
+        """Detector version recorded in a stored mask's header (None if absent or legacy)."""
+        path = self.find_mask(area_id, date)
+        if path is None or path.suffix != maskfile.SUFFIX:
+            return None
+        return maskfile.read_header(path).get("model_version")
+    
+    def find_mask(self, area_id: str, date: str) -> Optional[Path]:
+        """Stored mask file (current format first, then legacy .npy), or None."""
+        for path in (self.mask_path(area_id, date), self.legacy_mask_path(area_id, date)):
+            if path.exists():
+                return path
+        return None
+    
+    def mask_path(self, area_id: str, date: str) -> Path:
+        """Path masks are saved to: data/masks/<area>/<date>.mask."""
+        return self.masks_dir / area_id / f"{date}{maskfile.SUFFIX}"
+    
+    def legacy_mask_path(self, area_id: str, date: str) -> Path:
+        """Path of a legacy uint8 mask: data/masks/<area>/<date>.npy."""
+        return self.masks_dir / area_id / f"{date}.npy"
     
-    def save_mask(self, mask: np.ndarray, area_id: str, date: str):
+    def labels_path(self, area_id: str, date: str) -> Path:
+        """Path of a stored label image: data/masks/<area>/<date>.labels.mask."""
+        return self.masks_dir / area_id / f"{date}.labels{maskfile.SUFFIX}"
+    
+    def save_mask(
+        self,
+        mask: np.ndarray,
+        area_id: str,
+        date: str,
+        transform: Optional[Tuple[float, ...]] = None,
+        model_version: Optional[str] = None
+    ):
         """
         Save computed mask for future use.
         
+        A legacy .npy mask for the same tile is removed.
+        
         Args:
             mask: Binary mask to save
             area_id: Area identifier
             date: Date string
+            transform: Pixel -> lon/lat affine recorded in the header (optional)
+            model_version: Version of the detector that produced the mask,
+                e.g. BuildingDetector.mask_version (optional)
+        """
+        maskfile.write_mask(self.mask_path(area_id, date), mask, transform, model_version)
+        self.legacy_mask_path(area_id, date).unlink(missing_ok=True)
+    
+    def save_labels(
+        self,
+        labels: np.ndarray,
+        area_id: str,
+        date: str,
+        transform: Optional[Tuple[float, ...]] = None,
+        model_version: Optional[str] = None
+    ):
+        """
+        Save a building label image alongside the mask.
+        
+        Args:
+            labels: (H, W) label image, 0 = background
+            area_id: Area identifier
+            date: Date string
+            transform: Pixel -> lon/lat affine (optional)
+            model_version: Model version (optional)
         """
-        # TODO: Implement mask saving
-        pass
+        maskfile.write_labels(self.labels_path(area_id, date), labels, transform, model_version)
@@ -0,0 +1,232 @@
+"""
+Overlay Module - Fixed-point overlay compositing and image encoding.
+
+Responsibilities:
+- Alpha-blend a highlight color into building pixels with uint8 lookup
+  tables (no float temporaries), optionally into a caller-owned buffer;
+  class maps (e.g. change maps) get one color per class the same way
+- Derive outline-only masks from a label image (touching buildings keep
+  separate outlines)
+- Encode overlays as PNG (chosen zlib level), JPEG or WebP, or pick the
+  first candidate encoding that fits a size budget
+"""
+
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+
+# Alpha is quantized to 1/256 steps
+ALPHA_SHIFT = 8
+ALPHA_ONE = 1 << ALPHA_SHIFT
+
+FORMATS = ("png", "jpeg", "webp")
+SUFFIXES = {"png": ".png", "jpeg": ".jpg", "webp": ".webp"}
+MEDIA_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+FORMAT_OF_SUFFIX = {suffix: format for format, suffix in SUFFIXES.items()}
+
+# (format, level/quality) fastest first, as measured by benchmarks/bench_overlay.py
+# (roughly 5, 140 and 140 ms per megapixel); WebP is the smallest fallback.
+# Only used with OVERLAY_FORMAT=auto: lossy JPEG blurs mask edges, so PNG is the default
+DEFAULT_CANDIDATES: Tuple[Tuple[str, int], ...] = (("jpeg", 90), ("png", 1), ("webp", 80))
+
+
+def blend_lut(color: Sequence[int], alpha: float) -> np.ndarray:
+    """
+    Per-channel lookup table of blended values.
+
+    Entry [v, c] is (v * (256 - a) + color[c] * a) >> 8 with a = alpha * 256,
+    computed in integers.
+
+    Args:
+        color: RGB highlight color
+        alpha: Highlight opacity (0-1)
+
+    Returns:
+        (256, 1, 3) uint8 table, the layout cv2.LUT takes for 3-channel images
+    """
+    a = int(round(min(max(alpha, 0.0), 1.0) * ALPHA_ONE))
+    values = np.arange(256, dtype=np.uint32)[:, None]
+    lut = (values * (ALPHA_ONE - a) + np.asarray(color, dtype=np.uint32)[None, :] * a) >> ALPHA_SHIFT
+    return lut.astype(np.uint8).reshape(256, 1, 3)
+
+
+def blend(
+    base_image: np.ndarray,
+    mask: np.ndarray,
+    color: Sequence[int] = (255, 0, 0),
+    alpha: float = 0.5,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Blend a color into the masked pixels of an image.
+
+    Every pixel goes through one uint8 table lookup; unmasked pixels are then
+    restored from the base image. The only temporary is a one-byte-per-pixel
+    selection mask.
+
+    Args:
+        base_image: (H, W, 3+) uint8 image
+        mask: (H, W) mask; non-zero pixels are highlighted
+        color: RGB highlight color
+        alpha: Highlight opacity (0-1)
+        out: Preallocated (H, W, 3) uint8 output (allocated if None; may not
+            alias base_image)
+
+    Returns:
+        out
+    """
+    import cv2
+
+    base = np.ascontiguousarray(base_image[:, :, :3], dtype=np.uint8)
+    if out is None:
+        out = np.empty(base.shape, dtype=np.uint8)
+    cv2.LUT(base, blend_lut(color, alpha), dst=out)
+    # cv2.copyTo is several times faster than a broadcast np.copyto(where=)
+    cv2.copyTo(base, (mask == 0).view(np.uint8), out)
+    return out
+
+
+def blend_classes(
+    base_image: np.ndarray,
+    class_map: np.ndarray,
+    colors: Dict[int, Sequence[int]],
+    alpha: float = 0.5,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Blend one color per class into an image; other pixels keep the base.
+
+    The first class goes through blend; each further class present is
+    looked up into a scratch buffer and copied in under its own mask.
+
+    Args:
+        base_image: (H, W, 3+) uint8 image
+        class_map: (H, W) integer class per pixel
+        colors: Class -> RGB highlight color (classes not listed are left alone)
+        alpha: Highlight opacity (0-1)
+        out: Preallocated (H, W, 3) uint8 output (allocated if None; may not
+            alias base_image)
+
+    Returns:
+        out
+    """
+    import cv2
+
+    base = np.ascontiguousarray(base_image[:, :, :3], dtype=np.uint8)
+    (first, first_color), *rest = colors.items()
+    out = blend(base, class_map == first, first_color, alpha, out)
+    scratch = None
+    for label, color in rest:
+        selected = class_map == label
+        if not selected.any():
+            continue
+        scratch = cv2.LUT(base, blend_lut(color, alpha), dst=scratch)
+        cv2.copyTo(scratch, selected.view(np.uint8), out)
+    return out
+
+
+def outline_mask(labels: np.ndarray, thickness: int = 1) -> np.ndarray:
+    """
+    Boundary pixels of every labelled region.
+
+    A pixel is on an outline when it is labelled and a 4-neighbour carries a
+    different label, so adjacent buildings are outlined separately.
+
+    Args:
+        labels: (H, W) integer label image (or binary mask), 0 = background
+        thickness: Outline width in pixels
+
+    Returns:
+        (H, W) uint8 mask of outline pixels
+    """
+    edge = np.zeros(labels.shape, dtype=bool)
+    vertical = labels[1:] != labels[:-1]
+    horizontal = labels[:, 1:] != labels[:, :-1]
+    edge[1:] |= vertical
+    edge[:-1] |= vertical
+    edge[:, 1:] |= horizontal
+    edge[:, :-1] |= horizontal
+    # Image borders close regions that touch them
+    edge[[0, -1], :] = True
+    edge[:, [0, -1]] = True
+    edge &= labels > 0
+
+    outline = edge.view(np.uint8)
+    if thickness > 1:
+        import cv2
+
+        kernel = np.ones((2 * thickness - 1, 2 * thickness - 1), dtype=np.uint8)
+        outline = cv2.dilate(outline, kernel) & (labels > 0).view(np.uint8)
+    return outline
+
+
+def encode(image: np.ndarray, format: str = "png", level: Optional[int] = None) -> bytes:
+    """
+    Encode an RGB image.
+
+    Args:
+        image: (H, W, 3) uint8 RGB image
+        format: 'png', 'jpeg' or 'webp'
+        level: PNG zlib level (0-9, default 1) or JPEG/WebP quality
+            (1-100, default 90/80; WebP above 100 is lossless)
+
+    Returns:
+        Encoded bytes
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    import cv2
+
+    if format == "png":
+        params = [cv2.IMWRITE_PNG_COMPRESSION, 1 if level is None else level]
+    elif format == "jpeg":
+        params = [cv2.IMWRITE_JPEG_QUALITY, 90 if level is None else level]
+    elif format == "webp":
+        params = [cv2.IMWRITE_WEBP_QUALITY, 80 if level is None else level]
+    else:
+        raise ValueError(f"Unknown overlay format '{format}' (expected one of {FORMATS})")
+
+    ok, data = cv2.imencode(SUFFIXES[format], cv2.cvtColor(image, cv2.COLOR_RGB2BGR), params)
+    if not ok:
+        raise RuntimeError(f"Encoding {format} failed")
+    return data.tobytes()
+
+
+def encode_within(
+    image: np.ndarray,
+    max_bytes: Optional[int],
+    candidates: Sequence[Tuple[str, int]] = DEFAULT_CANDIDATES
+) -> Tuple[str, bytes]:
+    """
+    First candidate encoding whose output fits a size budget.
+
+    Usually only the first candidate runs; later ones are tried only when
+    earlier outputs are too large. If none fit, the smallest output is used.
+
+    Args:
+        image: (H, W, 3) uint8 RGB image
+        max_bytes: Size budget (None accepts the first candidate)
+        candidates: (format, level) pairs in order of preference
+
+    Returns:
+        (format, encoded bytes)
+    """
+    smallest: Optional[Tuple[str, bytes]] = None
+    for format, level in candidates:
+        data = encode(image, format, level)
+        if max_bytes is None or len(data) <= max_bytes:
+            return format, data
+        if smallest is None or len(data) < len(smallest[1]):
+            smallest = (format, data)
+    return smallest
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """Format of encoded image bytes from their magic number."""
+    if data.startswith(b"\x89PNG"):
+        return "png"
+    if data.startswith(b"\xff\xd8"):
+        return "jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
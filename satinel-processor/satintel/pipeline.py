@@ -0,0 +1,547 @@
+"""
+Pipeline Module - Orchestrates the snap → load → detect → summarize flow.
+
+Responsibilities:
+- Run the tasking pipeline stage by stage for one tile
+- Reuse decoded images, masks, building instances and statistics through a shared cache
+- Persist detected masks so later runs (and other dates' change) skip the model
+- Provide traced footprints and the tile's geo transform for export
+- Compare each result with the tile's previous date when change detection is
+  enabled (resampling the previous mask if the dates differ in resolution)
+- Produce overlay images and the task result payload
+- Attach a per-stage timing breakdown to each result when enabled
+- Analyze many points at once, grouped by tile, yielding results as tiles finish
+"""
+
+import contextvars
+import hashlib
+import json
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from satintel import metrics
+from satintel.analysis import BuildingAnalyzer
+from satintel.cache import LRUCache
+from satintel.change import ChangeDetector
+from satintel.executor import StageExecutor
+from satintel.imagery import ImageryManager
+from satintel.models import BuildingDetector, PrecomputedMaskLoader
+from satintel.result_store import ResultStore
+from satintel.singleflight import SingleFlight
+from satintel.labeling import label_buildings, trace_rings
+from satintel.table import BuildingTable, Transform, transform_from_bbox
+
+
+# Per-run stage cache of a fresh run, which replaces the shared one so the
+# run behaves exactly like the first request for a tile
+_fresh_stages: contextvars.ContextVar = contextvars.ContextVar("satintel_fresh_stages", default=None)
+
+
+class TileNotFoundError(LookupError):
+    """Raised when a coordinate does not snap to any available tile."""
+
+
+def _trace_rings_only(table: BuildingTable) -> BuildingTable:
+    """trace_rings without the label image in the result (spares a process-pool copy)."""
+    traced = trace_rings(table)
+    traced.labels = None
+    return traced
+
+
+def _point_fields(index: int, point: Dict) -> Dict:
+    return {"index": index, "id": point.get("id"), "lat": point["lat"], "lon": point["lon"]}
+
+
+class TaskPipeline:
+    """Runs building analysis for a tile, caching every intermediate stage."""
+
+    def __init__(
+        self,
+        imagery: ImageryManager,
+        detector: BuildingDetector,
+        mask_loader: PrecomputedMaskLoader,
+        analyzer: BuildingAnalyzer,
+        cache: Optional[LRUCache] = None,
+        result_store: Optional[ResultStore] = None,
+        executor: Optional[StageExecutor] = None,
+        change_detector: Optional[ChangeDetector] = None,
+        use_precomputed_masks: bool = True,
+        max_tile_size: Optional[int] = None,
+        overlay_dir: Path = Path("static/overlays"),
+        overlay_url_prefix: str = "/static/overlays",
+        overlay_alpha: float = 0.5,
+        stage_timings: bool = False,
+        persist_masks: bool = True
+    ):
+        """
+        Initialize pipeline.
+
+        Args:
+            imagery: Tile lookup and image loading
+            detector: Building detector (used when no precomputed mask exists)
+            mask_loader: Precomputed mask storage
+            analyzer: Statistics and overlay generation
+            cache: Shared stage cache (optional)
+            result_store: Persistent store of finished results (optional)
+            executor: Runs CPU-heavy stages on thread/process pools (inline if None)
+            change_detector: Compares each result with the previous date (optional)
+            use_precomputed_masks: Prefer stored masks over running the model
+            max_tile_size: Largest image side fed to the model when the
+                detector is not in sliding-window mode
+            overlay_dir: Directory overlays are written to
+            overlay_url_prefix: URL under which overlay_dir is served
+            overlay_alpha: Overlay transparency
+            stage_timings: Add a per-stage breakdown (stages_ms) to results
+            persist_masks: Save masks the model detects through mask_loader
+                (sliding-window mode with precomputed masks enabled only)
+        """
+        self.imagery = imagery
+        self.detector = detector
+        self.mask_loader = mask_loader
+        self.analyzer = analyzer
+        self.cache = cache
+        self.result_store = result_store
+        self.executor = executor
+        self.change_detector = change_detector
+        self.flights = SingleFlight()
+        self.use_precomputed_masks = use_precomputed_masks
+        self.max_tile_size = max_tile_size
+        self.overlay_dir = overlay_dir
+        self.overlay_url_prefix = overlay_url_prefix
+        self.overlay_alpha = overlay_alpha
+        self.stage_timings = stage_timings
+        self.persist_masks = persist_masks
+
+        if result_store is not None:
+            result_store.invalidate(keep_model_version=self.detector.model_version)
+
+    @property
+    def settings_hash(self) -> str:
+        """Hash of every setting that changes the pipeline's output."""
+        relevant = {
+            "use_precomputed_masks": self.use_precomputed_masks,
+            "max_tile_size": self.max_tile_size,
+            "overlay_alpha": self.overlay_alpha,
+            "overlay_mode": self.analyzer.overlay_mode,
+            "overlay_format": self.analyzer.overlay_format,
+            "pixel_resolution": self.analyzer.pixel_resolution,
+            "min_building_size": self.detector.min_building_size,
+            "threshold": self.detector.threshold,
+            # int8 and fp32 artifacts, and window geometry, give slightly different masks
+            "artifact": self.detector.artifact,
+            "inference_tile_size": self.detector.tile_size,
+            "inference_tile_overlap": self.detector.tile_overlap,
+            "change_iou_threshold": self.change_detector.iou_threshold if self.change_detector else None,
+        }
+        return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode()).hexdigest()[:16]
+
+    def result_key(self, area_id: str, date: str) -> str:
+        """Result store key for a tile under the current model and settings."""
+        return ResultStore.make_key(area_id, date, self.detector.model_version, self.settings_hash)
+
+    def cached_result(self, area_id: str, date: str) -> Optional[Dict]:
+        """Stored result for a tile, or None if it has not been computed."""
+        if self.result_store is None:
+            return None
+        result = self.result_store.get(self.result_key(area_id, date))
+        metrics.inc(metrics.CACHE_REQUESTS, cache="results", result="miss" if result is None else "hit")
+        return result
+
+    def cached_overlay(self, area_id: str, date: str) -> Optional[Path]:
+        """Stored overlay image (PNG, JPEG or WebP) for a tile, or None."""
+        if self.result_store is None:
+            return None
+        return self.result_store.overlay_path(self.result_key(area_id, date))
+
+    def _cached(self, area_id: str, date: str, stage: str, compute: Callable[[], Any]) -> Any:
+        scratch = _fresh_stages.get()
+        if scratch is not None:
+            key = (area_id, date, stage)
+            if key not in scratch:
+                scratch[key] = compute()
+            return scratch[key]
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute((area_id, date, stage), compute)
+
+    def _execute(self, stage: str, fn: Callable, *args) -> Any:
+        if self.executor is None:
+            return fn(*args)
+        return self.executor.run(stage, fn, *args)
+
+    def _timed_execute(self, stage: str, fn: Callable, *args) -> Any:
+        # For stages whose callables are not instrumented themselves
+        with metrics.timer(stage):
+            return self._execute(stage, fn, *args)
+
+    def snap(self, lat: float, lon: float, area_id: Optional[str] = None) -> Dict:
+        """
+        Snap coordinates to a tile.
+
+        Raises:
+            TileNotFoundError: If no tile is close enough
+        """
+        tile = self.imagery.snap_to_tile(lat, lon, area_id)
+        if tile is None:
+            raise TileNotFoundError(f"No imagery available near ({lat}, {lon})")
+        return tile
+
+    def image(self, area_id: str, date: str) -> np.ndarray:
+        """Decoded image (H, W, C)."""
+        def compute():
+            if self.imagery.tile_store is not None:
+                # Memory-mapped sidecar: nothing to offload
+                return self.imagery.load_image(area_id, date)
+            path = self.imagery.get_image_path(area_id, date)
+            if path is None:
+                raise FileNotFoundError(f"No imagery for {area_id} on {date}")
+            return self._execute("decode", ImageryManager.decode_image, path)
+
+        return self._cached(area_id, date, "image", compute)
+
+    def mask(self, area_id: str, date: str) -> np.ndarray:
+        """
+        Binary building mask, precomputed when available else detected.
+
+        Stored masks recorded as produced by another detector version are
+        only used when no model is loaded. Detected masks are saved with the
+        detector's version, so after a restart or cache eviction they are
+        loaded instead of re-running the model.
+        """
+        def compute():
+            version = self.detector.mask_version if self.detector.model is not None else None
+            if self.use_precomputed_masks and self.mask_loader.has_mask(area_id, date, version):
+                return self.mask_loader.load_mask(area_id, date)
+            image = self.image(area_id, date)
+            if self.detector.tile_size is not None:
+                # Sliding-window inference handles any scene size at full resolution
+                mask = self._execute("detect", self.detector.detect_buildings, image)
+                if self.persist_masks and self.use_precomputed_masks:
+                    # Whole-image masks depend on max_tile_size and are not persisted
+                    self._save_mask(area_id, date, mask, version)
+                return mask
+            mask = self._execute(
+                "detect", self.detector.detect_buildings,
+                self.imagery.preprocess_image(image, self.max_tile_size)
+            )
+            if mask.shape != image.shape[:2]:
+                import cv2
+
+                mask = cv2.resize(mask, (image.shape[1], image.shape[0]),
+                                  interpolation=cv2.INTER_NEAREST)
+            return mask
+
+        return self._cached(area_id, date, "mask", compute)
+
+    def _save_mask(self, area_id: str, date: str, mask: np.ndarray, version: Optional[str]):
+        bbox = self.imagery.get_tile_bbox(area_id, date)
+        transform = transform_from_bbox(bbox, mask.shape[1], mask.shape[0]) if bbox else None
+        with metrics.timer("mask_save"):
+            self.mask_loader.save_mask(mask, area_id, date, transform, version)
+
+    def buildings(self, area_id: str, date: str) -> BuildingTable:
+        """Building table labelled from the mask (columns only, no rings)."""
+        return self._cached(
+            area_id, date, "buildings",
+            lambda: self._timed_execute(
+                "label", label_buildings, self.mask(area_id, date), self.detector.min_building_size
+            )
+        )
+
+    def footprints(self, area_id: str, date: str) -> BuildingTable:
+        """Building table with outer rings traced, for footprint export."""
+        def compute():
+            table = self.buildings(area_id, date)
+            traced = self._timed_execute("trace", _trace_rings_only, table)
+            traced.labels = table.labels
+            return traced
+
+        return self._cached(area_id, date, "footprints", compute)
+
+    def transform(self, area_id: str, date: str) -> Transform:
+        """
+        Pixel -> lon/lat transform of a tile's mask.
+
+        Raises:
+            TileNotFoundError: If the tile is not in the index
+        """
+        bbox = self.imagery.get_tile_bbox(area_id, date)
+        if bbox is None:
+            raise TileNotFoundError(f"No imagery for {area_id} on {date}")
+        height, width = self.mask(area_id, date).shape[:2]
+        return transform_from_bbox(bbox, width, height)
+
+    def stats(self, area_id: str, date: str) -> Dict:
+        """Summary statistics from BuildingAnalyzer.summarize_buildings."""
+        return self._cached(
+            area_id, date, "stats",
+            lambda: self.analyzer.summarize_buildings(
+                self.mask(area_id, date), self.buildings(area_id, date)
+            )
+        )
+
+    def overlay(self, area_id: str, date: str) -> Path:
+        """Path of the rendered overlay image, created on first request."""
+        def compute():
+            labels = None
+            if self.analyzer.overlay_mode == "outline":
+                labels = self.buildings(area_id, date).labels
+            overlay = self._execute(
+                "overlay", self.analyzer.create_overlay,
+                self.image(area_id, date), self.mask(area_id, date), self.overlay_alpha,
+                (255, 0, 0), None, labels
+            )
+            return self.analyzer.save_overlay(overlay, area_id, date, self.overlay_dir)
+
+        return self._cached(area_id, date, "overlay", compute)
+
+    def change(self, area_id: str, date: str, previous: str) -> Dict:
+        """Change statistics of `date` relative to `previous` (requires a change detector)."""
+        return self._change(area_id, date, previous)[0]
+
+    def change_overlay(self, area_id: str, date: str, previous: str) -> Path:
+        """Path of the change overlay image (new green, demolished red), created on first request."""
+        def compute():
+            overlay = self._execute(
+                "overlay", self.change_detector.create_change_overlay,
+                self.image(area_id, date), self._change(area_id, date, previous)[1], self.overlay_alpha
+            )
+            return self.analyzer.save_overlay(overlay, area_id, f"{date}_change_{previous}", self.overlay_dir)
+
+        return self._cached(area_id, date, f"change_overlay:{previous}", compute)
+
+    def _change(self, area_id: str, date: str, previous: str):
+        if self.change_detector is None:
+            raise RuntimeError("Change detection is not enabled")
+        def compute():
+            before_mask, after_mask = self.mask(area_id, previous), self.mask(area_id, date)
+            before = self.buildings(area_id, previous)
+            if before_mask.shape != after_mask.shape:
+                # Dates delivered at different resolutions: compare on this date's grid
+                import cv2
+
+                before_mask = cv2.resize(
+                    np.ascontiguousarray(before_mask), (after_mask.shape[1], after_mask.shape[0]),
+                    interpolation=cv2.INTER_NEAREST
+                )
+                before = label_buildings(before_mask, self.detector.min_building_size)
+            after = self.buildings(area_id, date)
+            with metrics.timer("change"):
+                return self.change_detector.detect_changes(
+                    before_mask, after_mask, before, after, compared_to=previous
+                )
+
+        return self._cached(area_id, date, f"change:{previous}", compute)
+
+    def run(
+        self,
+        lat: float,
+        lon: float,
+        area_id: Optional[str] = None,
+        progress: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """
+        Run the full pipeline for a coordinate.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            area_id: Area identifier (optional)
+            progress: Called with each stage name as it starts (optional)
+
+        Returns:
+            Dict matching app.schemas.TaskResponse
+        """
+        started = time.perf_counter()
+        return self.process(self.snap(lat, lon, area_id), progress, started)
+
+    def process(
+        self,
+        tile: Dict,
+        progress: Optional[Callable[[str], None]] = None,
+        started: Optional[float] = None,
+        fresh: bool = False
+    ) -> Dict:
+        """
+        Analyze a snapped tile.
+
+        Concurrent calls for the same (area_id, date) share one
+        computation; each caller gets its own copy of the result. With
+        stage_timings, stages_ms holds the milliseconds this call spent in
+        each instrumented stage (empty when it shared another call's work).
+
+        Args:
+            tile: Result of snap()
+            progress: Called with each stage name as it starts (optional)
+            started: perf_counter() value processing time is measured from
+            fresh: Compute every stage on this call, bypassing the result
+                store, the stage cache and the single-flight (e.g. to
+                profile a slow tile that has been computed before)
+
+        Returns:
+            Dict matching app.schemas.TaskResponse
+        """
+        started = time.perf_counter() if started is None else started
+        key = (tile["area_id"], tile["date"])
+        with metrics.collect() as stages:
+            if fresh:
+                token = _fresh_stages.set({})
+                try:
+                    result = self._analyze(tile, progress, fresh=True)
+                finally:
+                    _fresh_stages.reset(token)
+            else:
+                result = dict(self.flights.do(key, lambda: self._analyze(tile, progress)))
+        result["processing_time_ms"] = int((time.perf_counter() - started) * 1000)
+        if self.stage_timings:
+            result["stages_ms"] = {stage: round(seconds * 1000, 3) for stage, seconds in stages.items()}
+        return result
+
+    def analyze_points(
+        self,
+        points: Sequence[Dict],
+        radius_m: Optional[float] = None,
+        area_id: Optional[str] = None,
+        max_workers: int = 4
+    ) -> Iterator[Dict]:
+        """
+        Analyze many coordinates, loading each tile once.
+        
+        Points are snapped and grouped by tile; each tile's mask, buildings
+        and statistics are computed once (through the stage cache) and all of
+        its points are summarized together. Overlays are not rendered.
+        
+        Args:
+            points: Dicts with 'lat', 'lon' and an optional 'id'
+            radius_m: Also report statistics of the square window of this
+                half-width around each point (optional)
+            area_id: Restrict snapping to one area (optional)
+            max_workers: Tiles processed concurrently
+        
+        Yields:
+            One dict per point, in tile completion order: 'index' (position
+            in points), 'id', 'lat', 'lon', then either 'area_id', 'date',
+            'distance_km', 'stats' (and 'local' with radius_m) or 'error'
+        """
+        groups: Dict[tuple, List[int]] = {}
+        tiles: Dict[tuple, Dict] = {}
+        snapped: List[Optional[Dict]] = []
+        for index, point in enumerate(points):
+            tile = self.imagery.snap_to_tile(point["lat"], point["lon"], area_id)
+            snapped.append(tile)
+            if tile is None:
+                message = f"No imagery available near ({point['lat']}, {point['lon']})"
+                yield {**_point_fields(index, point), "error": message}
+                continue
+            key = (tile["area_id"], tile["date"])
+            tiles.setdefault(key, tile)
+            groups.setdefault(key, []).append(index)
+        
+        if not groups:
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(groups)), thread_name_prefix="satintel-batch") as pool:
+            futures = {
+                pool.submit(self._analyze_points_on_tile, tiles[key], indices, points, snapped, radius_m): key
+                for key, indices in groups.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    rows = [
+                        {**_point_fields(index, points[index]), "error": f"{type(e).__name__}: {e}"}
+                        for index in groups[futures[future]]
+                    ]
+                yield from rows
+
+    def _analyze_points_on_tile(
+        self,
+        tile: Dict,
+        indices: List[int],
+        points: Sequence[Dict],
+        snapped: List[Optional[Dict]],
+        radius_m: Optional[float]
+    ) -> List[Dict]:
+        area_id, date = tile["area_id"], tile["date"]
+        stats = self.stats(area_id, date)
+        local = None
+        if radius_m is not None:
+            mask = self.mask(area_id, date)
+            a, _, c, _, e, f = self.transform(area_id, date)
+            lats = np.array([points[i]["lat"] for i in indices])
+            lons = np.array([points[i]["lon"] for i in indices])
+            local = self.analyzer.summarize_points(
+                mask, self.buildings(area_id, date),
+                np.floor((lats - f) / e), np.floor((lons - c) / a),
+                radius_m / self.analyzer.pixel_resolution
+            )
+        
+        rows = []
+        for n, index in enumerate(indices):
+            row = {
+                **_point_fields(index, points[index]),
+                "area_id": area_id,
+                "date": date,
+                "distance_km": snapped[index]["distance_km"],
+                "stats": stats,
+            }
+            if local is not None:
+                row["local"] = {name: column[n].item() for name, column in local.items()}
+            rows.append(row)
+        return rows
+
+    def _analyze(self, tile: Dict, progress: Optional[Callable[[str], None]], fresh: bool = False) -> Dict:
+        report = progress or (lambda stage: None)
+        area_id, date = tile["area_id"], tile["date"]
+
+        if not fresh:
+            report("lookup")
+            with metrics.timer("lookup"):
+                stored = self.cached_result(area_id, date)
+            if stored is not None:
+                return stored
+
+        report("detect")
+        mask = self.mask(area_id, date)
+        report("summarize")
+        stats = self.stats(area_id, date)
+        report("overlay")
+        overlay_path = self.overlay(area_id, date)
+
+        change = None
+        earlier = [d for d in tile.get("dates", []) if d < date]
+        if self.change_detector is not None and earlier:
+            report("change")
+            previous = max(earlier)
+            change = dict(self.change(area_id, date, previous))
+            change_path = self.change_overlay(area_id, date, previous)
+            change["overlay_url"] = f"{self.overlay_url_prefix}/{area_id}/{change_path.name}"
+
+        tile_area_km2 = mask.shape[0] * mask.shape[1] * self.analyzer.pixel_resolution ** 2 / 1e6
+
+        result = {
+            "area_id": area_id,
+            "date": date,
+            "lat": tile["center_lat"],
+            "lon": tile["center_lon"],
+            "image_url": f"/api/imagery/{area_id}/{date}",
+            "overlay_url": f"{self.overlay_url_prefix}/{area_id}/{overlay_path.name}",
+            "stats": stats,
+            "tile_size_km": tile_area_km2,
+            "resolution_m": self.analyzer.pixel_resolution,
+        }
+        if change is not None:
+            result["change"] = change
+        if self.result_store is not None and not fresh:
+            report("store")
+            result["overlay_url"] = f"/api/task/{area_id}/{date}/overlay{overlay_path.suffix}"
+            with metrics.timer("store"):
+                self.result_store.put(
+                    self.result_key(area_id, date), result, overlay_path,
+                    area_id=area_id, date=date, model_version=self.detector.model_version
+                )
+
+        return result
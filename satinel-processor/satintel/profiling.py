@@ -0,0 +1,162 @@
+"""
+Profiling Module - On-demand profiling of single pipeline runs.
+
+Responsibilities:
+- Run a function under cProfile (deterministic, calling thread) and a
+  wall-clock sampling profiler (calling thread plus the stage and batching
+  pools, whose work cProfile cannot see)
+- Write flamegraph-compatible collapsed stacks (<name>.collapsed, for
+  flamegraph.pl or speedscope), cProfile stats (<name>.prof, for pstats or
+  snakeviz) and a top-functions text summary (<name>.txt)
+- Keep only the newest profiles in the output directory
+
+Nothing here runs unless a profile is requested; unprofiled requests never
+import this module.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Worker threads that run pipeline work on behalf of the profiled request
+DEFAULT_THREAD_PREFIXES = ("satintel-stage", "satintel-batching")
+
+# Python 3.12+ allows one cProfile session per process, and concurrent
+# sessions would sample each other's pool threads anyway
+_session_lock = threading.Lock()
+
+
+class SamplingProfiler:
+    """Periodically snapshots thread stacks into collapsed-stack counts."""
+
+    def __init__(
+        self,
+        interval_ms: float = 1.0,
+        thread_ids: Iterable[int] = (),
+        thread_prefixes: Tuple[str, ...] = DEFAULT_THREAD_PREFIXES
+    ):
+        """
+        Initialize profiler.
+
+        Args:
+            interval_ms: Time between samples
+            thread_ids: Threads always sampled (e.g. the request thread)
+            thread_prefixes: Also sample threads whose name starts with one of these
+        """
+        self.interval = interval_ms / 1000.0
+        self.thread_ids = set(thread_ids)
+        self.thread_prefixes = thread_prefixes
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="satintel-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self) -> str:
+        """Stacks as 'root;caller;callee count' lines, heaviest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, str(ident))
+                if ident == me or not (ident in self.thread_ids or name.startswith(self.thread_prefixes)):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(name)
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+def profile_call(
+    fn: Callable[[], Any],
+    output_dir: Path,
+    label: str,
+    interval_ms: float = 1.0,
+    keep: Optional[int] = 50
+) -> Tuple[Any, Dict[str, str]]:
+    """
+    Run fn under both profilers and write the results.
+
+    Files are written even when fn raises; the exception then propagates.
+    Profiled calls run one at a time.
+
+    Args:
+        fn: Zero-argument function to profile
+        output_dir: Directory for the profile files
+        label: Name prefix (e.g. '<area>_<date>')
+        interval_ms: Sampling interval
+        keep: Newest profiles to keep in output_dir (None keeps all)
+
+    Returns:
+        (fn's result, {'collapsed', 'stats', 'summary'} -> file name)
+    """
+    with _session_lock:
+        sampler = SamplingProfiler(interval_ms, thread_ids=[threading.get_ident()])
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        sampler.start()
+        profiler.enable()
+        try:
+            result = fn()
+        finally:
+            profiler.disable()
+            sampler.stop()
+            files = _write(profiler, sampler, output_dir, label, time.perf_counter() - started)
+            if keep is not None:
+                _prune(output_dir, keep)
+    return result, files
+
+
+def _write(
+    profiler: cProfile.Profile,
+    sampler: SamplingProfiler,
+    output_dir: Path,
+    label: str,
+    elapsed: float
+) -> Dict[str, str]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}_{label}_{uuid.uuid4().hex[:6]}"
+    files = {
+        "collapsed": f"{name}.collapsed",
+        "stats": f"{name}.prof",
+        "summary": f"{name}.txt",
+    }
+    (output_dir / files["collapsed"]).write_text(sampler.collapsed())
+    profiler.dump_stats(output_dir / files["stats"])
+
+    summary = io.StringIO()
+    summary.write(f"{label}: {elapsed * 1000:.1f} ms wall, {sampler.samples} samples\n\n")
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+    (output_dir / files["summary"]).write_text(summary.getvalue())
+    return files
+
+
+def _prune(output_dir: Path, keep: int):
+    profiles = sorted(output_dir.glob("*.prof"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in profiles[keep:]:
+        for suffix in (".prof", ".collapsed", ".txt"):
+            stale.with_suffix(suffix).unlink(missing_ok=True)
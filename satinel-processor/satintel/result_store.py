@@ -0,0 +1,289 @@
+"""
+Result Store Module - Persistent, content-addressed cache of task results.
+
+Responsibilities:
+- Store TaskResponse payloads and overlay images (under their real
+  .png/.jpg/.webp suffix) under data/cache/results/
+- Key entries by (area_id, date, model version, settings hash)
+- Write atomically, bound total size and evict by age and LRU
+- Keep an index that survives restarts (rebuilt from disk and per-entry
+  .meta sidecars if lost)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from satintel.overlay import SUFFIXES
+
+INDEX_FILE = "index.json"
+ACCESS_FLUSH_SECONDS = 60.0
+
+
+class ResultStore:
+    """On-disk result cache with a persisted LRU index."""
+
+    def __init__(
+        self,
+        store_dir: Path,
+        max_bytes: int = 1024 ** 3,
+        max_age_seconds: Optional[float] = None
+    ):
+        """
+        Initialize result store, loading or rebuilding its index.
+
+        Args:
+            store_dir: Root directory (e.g. data/cache/results)
+            max_bytes: Total size budget for payloads and overlays
+            max_age_seconds: Entries older than this are evicted (optional)
+        """
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict] = {}
+        self._last_save = time.time()
+        self._load_index()
+
+    @staticmethod
+    def make_key(area_id: str, date: str, model_version: str, settings_hash: str) -> str:
+        """
+        Content address for a result.
+
+        Args:
+            area_id: Area identifier
+            date: Date string (YYYY-MM-DD)
+            model_version: Identifier of the model weights that produced it
+            settings_hash: Hash of the processing settings
+
+        Returns:
+            Hex SHA-256 key
+        """
+        raw = "\0".join((area_id, date, model_version, settings_hash))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def payload_path(self, key: str) -> Path:
+        return self.store_dir / key[:2] / f"{key}.json"
+
+    def meta_path(self, key: str) -> Path:
+        """Sidecar holding the entry's area, date and model version for index recovery."""
+        return self.store_dir / key[:2] / f"{key}.meta"
+
+    def overlay_path(self, key: str) -> Optional[Path]:
+        """Path of the stored overlay image (PNG, JPEG or WebP), or None if absent."""
+        entry = self._index.get(key)
+        # Entries indexed before suffixes were recorded always stored .png
+        suffix = entry.get("overlay", ".png") if entry is not None else None
+        if suffix is None:
+            return None
+        path = self.payload_path(key).with_suffix(suffix)
+        return path if path.exists() else None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Read a stored payload.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Payload dict or None on a miss
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry, time.time()):
+                self._remove(key)
+                self._save_index()
+                return None
+
+        try:
+            with open(self.payload_path(key)) as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                # A concurrent put may have replaced the entry meanwhile; keep that one
+                if self._index.get(key) is entry:
+                    self._remove(key)
+                    self._save_index()
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry["accessed"] = now
+            due = now - self._last_save > ACCESS_FLUSH_SECONDS
+        if due:
+            self.flush()
+        return payload
+
+    def put(
+        self,
+        key: str,
+        payload: Dict,
+        overlay_file: Optional[Path] = None,
+        area_id: Optional[str] = None,
+        date: Optional[str] = None,
+        model_version: Optional[str] = None
+    ):
+        """
+        Atomically store a payload (and overlay), then enforce limits.
+
+        Args:
+            key: Key from make_key
+            payload: JSON-serializable result
+            overlay_file: Overlay image to copy into the store, keeping its
+                suffix (optional)
+            area_id, date, model_version: Recorded in the index so entries
+                can be invalidated without reading payloads
+        """
+        payload_path = self.payload_path(key)
+        payload_path.parent.mkdir(parents=True, exist_ok=True)
+
+        size = self._atomic_write(payload_path, json.dumps(payload).encode())
+        suffix = overlay_file.suffix.lower() if overlay_file is not None else None
+        meta = {"area_id": area_id, "date": date, "model_version": model_version, "overlay": suffix}
+        self._atomic_write(self.meta_path(key), json.dumps(meta).encode())
+        for stale in SUFFIXES.values():
+            if stale != suffix:
+                payload_path.with_suffix(stale).unlink(missing_ok=True)
+        if overlay_file is not None:
+            overlay_path = payload_path.with_suffix(suffix)
+            tmp_path = overlay_path.with_name(f"{overlay_path.name}.{threading.get_ident()}.tmp")
+            shutil.copyfile(overlay_file, tmp_path)
+            os.replace(tmp_path, overlay_path)
+            size += overlay_path.stat().st_size
+
+        now = time.time()
+        with self._lock:
+            self._index[key] = {
+                **meta,
+                "size": size,
+                "created": now,
+                "accessed": now,
+            }
+            self._evict(now)
+            self._save_index()
+
+    def invalidate(self, area_id: Optional[str] = None, keep_model_version: Optional[str] = None) -> int:
+        """
+        Remove entries for an area and/or produced by other model versions.
+
+        Args:
+            area_id: Only consider this area (optional)
+            keep_model_version: Drop entries whose model version differs
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            doomed = [
+                key for key, entry in self._index.items()
+                if (area_id is None or entry.get("area_id") == area_id)
+                and (keep_model_version is None or entry.get("model_version") != keep_model_version)
+            ]
+            for key in doomed:
+                self._remove(key)
+            if doomed:
+                self._save_index()
+        return len(doomed)
+
+    def flush(self):
+        """
+        Persist access times gathered since the last write.
+
+        Reads only touch the in-memory index; it is written at most every
+        ACCESS_FLUSH_SECONDS so a hit stays a single file read.
+        """
+        with self._lock:
+            self._save_index()
+
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self._index.values())
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _expired(self, entry: Dict, now: float) -> bool:
+        return self.max_age_seconds is not None and now - entry["created"] > self.max_age_seconds
+
+    def _evict(self, now: float):
+        for key in [k for k, e in self._index.items() if self._expired(e, now)]:
+            self._remove(key)
+
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k]["accessed"]):
+            total -= self._index[key]["size"]
+            self._remove(key)
+            if total <= self.max_bytes:
+                break
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        payload_path = self.payload_path(key)
+        overlays = [payload_path.with_suffix(suffix) for suffix in SUFFIXES.values()]
+        for path in (payload_path, self.meta_path(key), *overlays):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> int:
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def _save_index(self):
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._atomic_write(self.store_dir / INDEX_FILE, json.dumps(self._index).encode())
+        self._last_save = time.time()
+
+    def _load_index(self):
+        try:
+            with open(self.store_dir / INDEX_FILE) as f:
+                self._index = json.load(f)
+            return
+        except (OSError, ValueError):
+            self._index = {}
+
+        # Index lost or corrupt: recover entries from the files on disk
+        if not self.store_dir.exists():
+            return
+        for payload_path in self.store_dir.glob("*/*.json"):
+            stat = payload_path.stat()
+            size = stat.st_size
+            try:
+                with open(self.meta_path(payload_path.stem)) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {"area_id": None, "date": None, "model_version": None}
+            present = [suffix for suffix in SUFFIXES.values() if payload_path.with_suffix(suffix).exists()]
+            if meta.get("overlay") not in present:
+                meta["overlay"] = present[0] if present else None
+            if meta["overlay"] is not None:
+                size += payload_path.with_suffix(meta["overlay"]).stat().st_size
+            self._index[payload_path.stem] = {
+                **meta,
+                "size": size,
+                "created": stat.st_mtime,
+                "accessed": stat.st_mtime,
+            }
+        if self._index:
+            self._save_index()
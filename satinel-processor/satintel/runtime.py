@@ -0,0 +1,426 @@
+"""
+Runtime Module - Optimized CPU model artifacts for building detection.
+
+Responsibilities:
+- Export the PyTorch model to TorchScript and ONNX
+- Produce int8 variants (ONNX dynamic and calibrated static quantization)
+- Pick the fastest prepared artifact at load time, with thread tuning
+- Report accuracy (IoU vs the reference model) and latency per variant;
+  quantized variants are only served once a report has validated them
+  (prepare runs the report when given tiles, on tiles held out from calibration)
+- Ignore exports and reports made from other weights than the current ones
+
+Usage:
+    python -m satintel.runtime prepare --model models/building_detector.pth --tiles data/imagery/new_york
+    python -m satintel.runtime report --model models/building_detector.pth --tiles data/imagery/new_york
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+import numpy as np
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Artifact kinds, typically fastest first
+ARTIFACT_ORDER = ["onnx-int8-static", "onnx-int8-dynamic", "onnx", "torchscript", "pytorch"]
+# Kinds that match the reference model without an accuracy report
+FULL_PRECISION = ["onnx", "torchscript", "pytorch"]
+ARTIFACT_SUFFIXES = {
+    "pytorch": "",
+    "torchscript": ".ts.pt",
+    "onnx": ".onnx",
+    "onnx-int8-dynamic": ".int8-dynamic.onnx",
+    "onnx-int8-static": ".int8-static.onnx",
+}
+
+
+def artifact_path(model_path: Path, kind: str) -> Path:
+    """Location of a prepared artifact next to the source weights."""
+    if kind == "pytorch":
+        return model_path
+    return model_path.with_name(model_path.stem + ARTIFACT_SUFFIXES[kind])
+
+
+def manifest_path(model_path: Path) -> Path:
+    """Runtime manifest (prepared artifacts and report) for a model."""
+    return model_path.with_name(model_path.stem + ".runtime.json")
+
+
+def read_manifest(model_path: Path) -> Dict:
+    try:
+        with open(manifest_path(model_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(model_path: Path, manifest: Dict):
+    with open(manifest_path(model_path), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def source_sha256(model_path: Path) -> Optional[str]:
+    """Hash of the source weights, recorded in the manifest by prepare and report."""
+    from satintel.tile_store import file_sha256
+
+    return file_sha256(model_path) if model_path.exists() else None
+
+
+def manifest_is_current(model_path: Path, manifest: Optional[Dict] = None) -> bool:
+    """Whether the manifest (exports and report) was made from the current weights."""
+    if manifest is None:
+        manifest = read_manifest(model_path)
+    return manifest.get("source_sha256") is not None and manifest["source_sha256"] == source_sha256(model_path)
+
+
+class OnnxModel:
+    """ONNX Runtime session exposed as a numpy batch -> logits callable."""
+
+    def __init__(self, path: Path, intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None):
+        """
+        Initialize ONNX Runtime session.
+
+        Args:
+            path: .onnx file
+            intra_op_threads: Threads used inside one operator (optional)
+            inter_op_threads: Threads running independent operators (optional)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        self.path = path
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch.astype(np.float32, copy=False)})[0]
+
+
+def configure_torch_threads(intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None):
+    """Apply torch thread counts (inter-op can only be set once per process)."""
+    import torch
+
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError:
+            pass
+
+
+def load_pytorch(model_path: Path):
+    """Load the plain pickled PyTorch module in eval mode."""
+    import torch
+
+    model = torch.load(model_path, map_location="cpu", weights_only=False)
+    model.eval()
+    return model
+
+
+def load_artifact(
+    model_path: Path,
+    kind: str,
+    intra_op_threads: Optional[int] = None,
+    inter_op_threads: Optional[int] = None
+):
+    """
+    Load one artifact variant as a model callable.
+
+    Args:
+        model_path: Source weights path
+        kind: One of ARTIFACT_ORDER
+        intra_op_threads, inter_op_threads: Thread tuning
+
+    Returns:
+        torch module or OnnxModel
+    """
+    path = artifact_path(model_path, kind)
+    if kind.startswith("onnx"):
+        return OnnxModel(path, intra_op_threads, inter_op_threads)
+
+    configure_torch_threads(intra_op_threads, inter_op_threads)
+    if kind == "torchscript":
+        import torch
+
+        model = torch.jit.load(str(path), map_location="cpu")
+        model.eval()
+        return model
+    return load_pytorch(path)
+
+
+def available_artifacts(model_path: Path, current_only: bool = True) -> List[str]:
+    """
+    Artifact kinds present on disk whose runtime can be imported.
+
+    Exported variants only count when the manifest records the current
+    weights' hash; after the weights change without a new prepare they
+    would describe the old model, so only pytorch is left.
+
+    Args:
+        model_path: Source weights path
+        current_only: False also lists exports of other weights (for report,
+            which measures them against the current model)
+    """
+    current = not current_only or manifest_is_current(model_path)
+    kinds = []
+    for kind in ARTIFACT_ORDER:
+        if not artifact_path(model_path, kind).exists():
+            continue
+        if kind != "pytorch" and not current:
+            logger.warning("Ignoring %s artifact of %s: exported from other weights", kind, model_path)
+            continue
+        module = "onnxruntime" if kind.startswith("onnx") else "torch"
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        kinds.append(kind)
+    return kinds
+
+
+def select_artifact(model_path: Path, min_iou: float = 0.95) -> str:
+    """
+    Choose the artifact to serve.
+
+    With a report in the manifest, the lowest-latency variant whose IoU
+    against the reference model is at least min_iou wins. Without one
+    (e.g. right after prepare) only full-precision kinds are considered,
+    so an unchecked int8 variant is never served. A manifest made from
+    other weights is ignored entirely, which leaves pytorch.
+
+    Args:
+        model_path: Source weights path
+        min_iou: Accuracy floor for quantized/exported variants
+
+    Returns:
+        Artifact kind
+
+    Raises:
+        FileNotFoundError: If no reported-accurate or full-precision artifact
+            can be loaded
+    """
+    available = available_artifacts(model_path)
+
+    manifest = read_manifest(model_path)
+    report = manifest.get("report", {}) if manifest_is_current(model_path, manifest) else {}
+    candidates = [
+        kind for kind in available
+        if kind in report and report[kind].get("iou", 0.0) >= min_iou
+    ]
+    if candidates:
+        return min(candidates, key=lambda kind: report[kind]["latency_ms"])
+    full_precision = [
+        kind for kind in available
+        if kind in FULL_PRECISION and report.get(kind, {}).get("iou", 1.0) >= min_iou
+    ]
+    if not full_precision:
+        raise FileNotFoundError(
+            f"No loadable full-precision artifact for {model_path} "
+            "(run `python -m satintel.runtime report` to validate quantized ones)"
+        )
+    return full_precision[0]
+
+
+def prepare(
+    model_path: Path,
+    tile_size: int = 512,
+    calibration_tiles: Iterable[np.ndarray] = (),
+    opset: int = 17
+) -> Dict[str, str]:
+    """
+    Export TorchScript and ONNX artifacts plus int8-quantized ONNX variants.
+
+    Args:
+        model_path: Plain PyTorch weights (pickled module)
+        tile_size: Window size used for tracing and calibration
+        calibration_tiles: (C, tile, tile) float32 inputs for static
+            quantization; the static variant is skipped without them
+        opset: ONNX opset version
+
+    Returns:
+        Mapping of artifact kind -> written path
+    """
+    import torch
+
+    model = load_pytorch(model_path)
+    example = torch.zeros(1, 3, tile_size, tile_size)
+    written = {"pytorch": str(model_path)}
+
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example, strict=False)
+    traced = torch.jit.freeze(traced)
+    traced.save(str(artifact_path(model_path, "torchscript")))
+    written["torchscript"] = str(artifact_path(model_path, "torchscript"))
+
+    onnx_path = artifact_path(model_path, "onnx")
+    torch.onnx.export(
+        model, example, str(onnx_path),
+        input_names=["image"], output_names=["logits"],
+        dynamic_axes={"image": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset
+    )
+    written["onnx"] = str(onnx_path)
+    written.update(quantize_onnx(onnx_path, model_path, calibration_tiles))
+
+    manifest = read_manifest(model_path)
+    manifest.update({"tile_size": tile_size, "artifacts": written, "source_sha256": source_sha256(model_path)})
+    manifest.pop("report", None)
+    write_manifest(model_path, manifest)
+    return written
+
+
+def quantize_onnx(onnx_path: Path, model_path: Path, calibration_tiles: Iterable[np.ndarray] = ()) -> Dict[str, str]:
+    """
+    Produce int8 ONNX variants of an exported model.
+
+    Dynamic quantization needs no data; static (QDQ) quantization is
+    calibrated on the given tiles and usually much faster for conv nets.
+
+    Returns:
+        Mapping of artifact kind -> written path
+    """
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+    )
+
+    written = {}
+    dynamic_path = artifact_path(model_path, "onnx-int8-dynamic")
+    quantize_dynamic(str(onnx_path), str(dynamic_path), weight_type=QuantType.QInt8)
+    written["onnx-int8-dynamic"] = str(dynamic_path)
+
+    tiles = [np.asarray(tile, dtype=np.float32) for tile in calibration_tiles]
+    if tiles:
+        class TileReader(CalibrationDataReader):
+            def __init__(self):
+                self._iter = iter({"image": tile[None]} for tile in tiles)
+
+            def get_next(self):
+                return next(self._iter, None)
+
+        static_path = artifact_path(model_path, "onnx-int8-static")
+        quantize_static(
+            str(onnx_path), str(static_path), TileReader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8
+        )
+        written["onnx-int8-static"] = str(static_path)
+    return written
+
+
+def report(
+    model_path: Path,
+    tiles: List[np.ndarray],
+    threshold: float = 0.0,
+    repeats: int = 3,
+    loader: Callable[[Path, str], Callable] = load_artifact
+) -> Dict[str, Dict]:
+    """
+    Compare every variant on disk against the reference model.
+
+    Exports from earlier weights are measured too, so recording the current
+    weights' hash afterwards never vouches for an unmeasured artifact.
+
+    Args:
+        model_path: Source weights path
+        tiles: (C, H, W) float32 inputs
+        threshold: Logit threshold for masks
+        repeats: Timed passes per tile (median is reported)
+        loader: Function loading an artifact kind (injectable for tests)
+
+    Returns:
+        kind -> {"iou": mean IoU vs reference, "latency_ms": median per tile}
+    """
+    kinds = available_artifacts(model_path, current_only=False)
+    reference_kind = "pytorch" if "pytorch" in kinds else kinds[-1]
+    reference = loader(model_path, reference_kind)
+    references = [_masks(reference, tile, threshold) for tile in tiles]
+
+    results = {}
+    for kind in kinds:
+        model = reference if kind == reference_kind else loader(model_path, kind)
+        _masks(model, tiles[0], threshold)  # warm-up
+        latencies, ious = [], []
+        for tile, expected in zip(tiles, references):
+            for _ in range(repeats):
+                started = time.perf_counter()
+                mask = _masks(model, tile, threshold)
+                latencies.append((time.perf_counter() - started) * 1000)
+            union = np.logical_or(mask, expected).sum()
+            ious.append(1.0 if union == 0 else np.logical_and(mask, expected).sum() / union)
+        results[kind] = {
+            "iou": float(np.mean(ious)),
+            "latency_ms": float(statistics.median(latencies)),
+        }
+
+    manifest = read_manifest(model_path)
+    manifest.update({"report": results, "source_sha256": source_sha256(model_path)})
+    write_manifest(model_path, manifest)
+    return results
+
+
+def _masks(model: Callable, tile: np.ndarray, threshold: float) -> np.ndarray:
+    from satintel.models import BuildingDetector
+
+    detector = BuildingDetector()
+    detector.model = model
+    return detector._forward(tile[None].astype(np.float32))[0, 0] > threshold
+
+
+def _load_tiles(tiles_dir: Path, tile_size: int, limit: int) -> List[np.ndarray]:
+    from satintel.imagery import ImageryManager
+
+    tiles = []
+    for path in sorted(tiles_dir.glob("*.png"))[:limit]:
+        image = ImageryManager.decode_image(path)[:tile_size, :tile_size]
+        tile = np.zeros((3, tile_size, tile_size), dtype=np.float32)
+        tile[:, :image.shape[0], :image.shape[1]] = image.transpose(2, 0, 1) / 255.0
+        tiles.append(tile)
+    return tiles
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prepare and compare optimized model runtimes")
+    parser.add_argument("command", choices=["prepare", "report"])
+    parser.add_argument("--model", type=Path, required=True, help="Plain PyTorch weights")
+    parser.add_argument("--tiles", type=Path, required=True, help="Directory of PNG tiles")
+    parser.add_argument("--tile-size", type=int, default=512)
+    parser.add_argument("--limit", type=int, default=16, help="Max tiles to use (prepare calibrates on half)")
+    args = parser.parse_args(argv)
+
+    tiles = _load_tiles(args.tiles, args.tile_size, args.limit)
+    if args.command == "prepare":
+        # Calibrating on the tiles that are then scored would flatter the int8 variant
+        calibration, tiles = tiles[:len(tiles) // 2], tiles[len(tiles) // 2:]
+        for kind, path in prepare(args.model, args.tile_size, calibration).items():
+            print(f"  ✓ {kind:18s} {path}")
+        if not tiles:
+            # Quantized variants stay unused until a report validates them
+            return 0
+
+    if not tiles:
+        print(f"ERROR: no PNG tiles found in {args.tiles}")
+        return 1
+    results = report(args.model, tiles)
+    print(f"{'variant':18s} {'IoU':>8s} {'ms/tile':>10s}")
+    for kind, row in sorted(results.items(), key=lambda item: item[1]["latency_ms"]):
+        print(f"{kind:18s} {row['iou']:8.4f} {row['latency_ms']:10.2f}")
+    print(f"Selected: {select_artifact(args.model)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Single-Flight Module - Coalesce concurrent computations of the same key.
+
+Responsibilities:
+- Let the first caller for a key compute while concurrent callers wait
+- Hand every waiter the same result (or the same exception)
+- Count calls, executions and coalesced calls for the coalescing ratio
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Duplicate-call suppression keyed by an arbitrary hashable."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.executions = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the computation (e.g. (area_id, date))
+            fn: Zero-argument function computing the value
+
+        Returns:
+            fn's result, shared by every caller that arrived while it ran
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every waiter
+        """
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.executions += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+    def stats(self) -> Dict:
+        """Call counters and the share of calls served by another caller's work."""
+        with self._lock:
+            coalesced = self.calls - self.executions
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": coalesced,
+                "in_flight": len(self._in_flight),
+                "coalescing_ratio": coalesced / self.calls if self.calls else 0.0,
+            }
@@ -0,0 +1,256 @@
+"""
+Table Module - Compact columnar table of building footprints.
+
+Responsibilities:
+- Hold per-building columns (id, area, bbox, centroid) as NumPy arrays
+- Store outer rings as offsets into one flat vertex buffer
+- Zero-copy slicing and vectorized filtering
+- Convert to GeoJSON and to Arrow/Parquet
+"""
+
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Affine pixel -> geo transform (a, b, c, d, e, f): x = a*col + b*row + c, y = d*col + e*row + f
+Transform = Tuple[float, float, float, float, float, float]
+
+
+def transform_from_bbox(bbox: Sequence[float], width: int, height: int) -> Transform:
+    """
+    Pixel -> lon/lat transform for a north-up tile covering bbox.
+
+    Args:
+        bbox: [lon_min, lat_min, lon_max, lat_max]
+        width: Tile width in pixels
+        height: Tile height in pixels
+
+    Returns:
+        Affine coefficients (a, b, c, d, e, f)
+    """
+    lon_min, lat_min, lon_max, lat_max = bbox
+    return ((lon_max - lon_min) / width, 0.0, lon_min, 0.0, -(lat_max - lat_min) / height, lat_max)
+
+
+class BuildingTable:
+    """
+    Columnar building table.
+
+    Columns are parallel arrays of length N. Ring i is
+    vertices[ring_offsets[i]:ring_offsets[i + 1]]; rings are optional so the
+    cheap columns can be produced without tracing outlines. The label image
+    the table was derived from may be attached as `labels`.
+    """
+
+    def __init__(
+        self,
+        id: np.ndarray,
+        area_px: np.ndarray,
+        bbox: np.ndarray,
+        centroid: np.ndarray,
+        ring_offsets: Optional[np.ndarray] = None,
+        vertices: Optional[np.ndarray] = None,
+        labels: Optional[np.ndarray] = None
+    ):
+        """
+        Initialize building table.
+
+        Args:
+            id: (N,) int32 building ids (label values in `labels`)
+            area_px: (N,) int64 pixel counts
+            bbox: (N, 4) int32 (x1, y1, x2, y2) boxes, x2/y2 exclusive
+            centroid: (N, 2) float64 (x, y) centroids
+            ring_offsets: (N + 1,) int64 offsets into vertices (optional)
+            vertices: (V, 2) int32 (x, y) ring vertices (optional)
+            labels: (H, W) int32 label image (optional)
+        """
+        self.id = id
+        self.area_px = area_px
+        self.bbox = bbox
+        self.centroid = centroid
+        self.ring_offsets = ring_offsets
+        self.vertices = vertices
+        self.labels = labels
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    @property
+    def has_rings(self) -> bool:
+        return self.ring_offsets is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Total bytes held by the columns, rings and label image."""
+        arrays = (self.id, self.area_px, self.bbox, self.centroid,
+                  self.ring_offsets, self.vertices, self.labels)
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    @classmethod
+    def empty(cls) -> "BuildingTable":
+        return cls(
+            id=np.zeros(0, dtype=np.int32),
+            area_px=np.zeros(0, dtype=np.int64),
+            bbox=np.zeros((0, 4), dtype=np.int32),
+            centroid=np.zeros((0, 2), dtype=np.float64),
+            ring_offsets=np.zeros(1, dtype=np.int64),
+            vertices=np.zeros((0, 2), dtype=np.int32),
+        )
+
+    @classmethod
+    def from_polygons(cls, polygons: List[Dict]) -> "BuildingTable":
+        """Build a table from legacy polygon dicts (id, area_px, bbox, centroid, coordinates)."""
+        if not polygons:
+            return cls.empty()
+        rings = [np.asarray(p["coordinates"], dtype=np.int32).reshape(-1, 2) for p in polygons]
+        offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rings], out=offsets[1:])
+        return cls(
+            id=np.array([p["id"] for p in polygons], dtype=np.int32),
+            area_px=np.array([p["area_px"] for p in polygons], dtype=np.int64),
+            bbox=np.array([p["bbox"] for p in polygons], dtype=np.int32).reshape(-1, 4),
+            centroid=np.array([p["centroid"] for p in polygons], dtype=np.float64).reshape(-1, 2),
+            ring_offsets=offsets,
+            vertices=np.concatenate(rings),
+        )
+
+    # ------------------------------------------------------------------
+    # Selection
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, selector: Union[slice, np.ndarray, Sequence[int]]) -> "BuildingTable":
+        """
+        Select rows.
+
+        Step-1 slices are zero-copy: columns and the vertex buffer are
+        views. Boolean masks and index arrays gather (copy) the rows.
+        """
+        if isinstance(selector, slice) and selector.step in (None, 1):
+            start, stop, _ = selector.indices(len(self))
+            stop = max(start, stop)
+            ring_offsets = vertices = None
+            if self.has_rings:
+                base = self.ring_offsets[start]
+                vertices = self.vertices[base:self.ring_offsets[stop]]
+                ring_offsets = self.ring_offsets[start:stop + 1] - base
+            return BuildingTable(
+                self.id[start:stop], self.area_px[start:stop], self.bbox[start:stop],
+                self.centroid[start:stop], ring_offsets, vertices, self.labels
+            )
+
+        index = np.arange(len(self))[selector]
+        if index.ndim == 0:
+            index = index[None]
+        ring_offsets = vertices = None
+        if self.has_rings:
+            starts = self.ring_offsets[index]
+            lengths = self.ring_offsets[index + 1] - starts
+            ring_offsets = np.zeros(len(index) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=ring_offsets[1:])
+            # Vertex gather without a per-building loop
+            gather = np.repeat(starts - ring_offsets[:-1], lengths) + np.arange(ring_offsets[-1])
+            vertices = self.vertices[gather]
+        return BuildingTable(
+            self.id[index], self.area_px[index], self.bbox[index],
+            self.centroid[index], ring_offsets, vertices, self.labels
+        )
+
+    def filter(self, keep: np.ndarray) -> "BuildingTable":
+        """Rows where the boolean array `keep` is True."""
+        return self[np.asarray(keep, dtype=bool)]
+
+    def intersecting(self, x1: float, y1: float, x2: float, y2: float) -> "BuildingTable":
+        """Rows whose bbox intersects the pixel window [x1, x2) x [y1, y2)."""
+        b = self.bbox
+        return self.filter((b[:, 0] < x2) & (b[:, 2] > x1) & (b[:, 1] < y2) & (b[:, 3] > y1))
+
+    def ring(self, index: int) -> np.ndarray:
+        """(K, 2) outer ring of one building (a view into the vertex buffer)."""
+        if not self.has_rings:
+            raise ValueError("Table was built without rings")
+        return self.vertices[self.ring_offsets[index]:self.ring_offsets[index + 1]]
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def geo_vertices(self, transform: Optional[Transform] = None) -> np.ndarray:
+        """Vertex buffer mapped through a pixel -> geo transform, as float64."""
+        vertices = self.vertices.astype(np.float64)
+        if transform is None:
+            return vertices
+        a, b, c, d, e, f = transform
+        x, y = vertices[:, 0], vertices[:, 1]
+        return np.stack([a * x + b * y + c, d * x + e * y + f], axis=1)
+
+    def iter_geojson_features(
+        self,
+        transform: Optional[Transform] = None,
+        pixel_area_m2: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """
+        Yield one GeoJSON Feature per building.
+
+        Args:
+            transform: Pixel -> lon/lat transform (pixel coordinates if None)
+            pixel_area_m2: Adds an area_m2 property when given
+        """
+        if not self.has_rings:
+            raise ValueError("Table was built without rings")
+        coords = self.geo_vertices(transform).tolist()
+        offsets = self.ring_offsets.tolist()
+        ids = self.id.tolist()
+        areas = self.area_px.tolist()
+        for i in range(len(self)):
+            ring = coords[offsets[i]:offsets[i + 1]]
+            if ring:
+                ring.append(ring[0])
+            properties = {"id": ids[i], "area_px": areas[i]}
+            if pixel_area_m2 is not None:
+                properties["area_m2"] = areas[i] * pixel_area_m2
+            yield {
+                "type": "Feature",
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+                "properties": properties,
+            }
+
+    def to_geojson(self, transform: Optional[Transform] = None, pixel_area_m2: Optional[float] = None) -> Dict:
+        """GeoJSON FeatureCollection of every building."""
+        return {
+            "type": "FeatureCollection",
+            "features": list(self.iter_geojson_features(transform, pixel_area_m2)),
+        }
+
+    def to_arrow(self, transform: Optional[Transform] = None):
+        """
+        Arrow table with one row per building (requires pyarrow).
+
+        The ring column is a list<fixed_size_list<double>[2]> built directly
+        on the offset and vertex buffers.
+        """
+        import pyarrow as pa
+
+        columns = {
+            "id": pa.array(self.id),
+            "area_px": pa.array(self.area_px),
+            "x1": pa.array(self.bbox[:, 0]),
+            "y1": pa.array(self.bbox[:, 1]),
+            "x2": pa.array(self.bbox[:, 2]),
+            "y2": pa.array(self.bbox[:, 3]),
+            "centroid_x": pa.array(self.centroid[:, 0]),
+            "centroid_y": pa.array(self.centroid[:, 1]),
+        }
+        if self.has_rings:
+            points = pa.FixedSizeListArray.from_arrays(
+                pa.array(self.geo_vertices(transform).reshape(-1)), 2
+            )
+            columns["ring"] = pa.ListArray.from_arrays(
+                pa.array(self.ring_offsets.astype(np.int32)), points
+            )
+        return pa.table(columns)
+
+    def to_parquet(self, path: Path, transform: Optional[Transform] = None):
+        """Write the table to a Parquet file (requires pyarrow)."""
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(transform), str(path))
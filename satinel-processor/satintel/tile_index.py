@@ -0,0 +1,512 @@
+"""
+Tile Index Module - Spatial index over imagery tile footprints and dates.
+
+Responsibilities:
+- Index every tile's bounding box and acquisition dates on a fixed lat/lon grid
+- Point-in-bbox and haversine nearest-neighbour lookups
+- Persist the index under data/metadata/ so startup does not rescan imagery
+- Update incrementally from imagery_metadata.json and data/imagery/<area>/
+"""
+
+import json
+import math
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+INDEX_VERSION = 1
+IMAGE_SUFFIXES = (".png", ".tif", ".tiff", ".jpg")
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points.
+
+    Args:
+        lat1, lon1: First point in degrees
+        lat2, lon2: Second point in degrees
+
+    Returns:
+        Distance in kilometers
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bbox_distance_km(lat: float, lon: float, bbox: List[float]) -> float:
+    """
+    Distance from a point to the closest point of a bbox (0 if inside).
+
+    Args:
+        lat, lon: Query point in degrees
+        bbox: [lon_min, lat_min, lon_max, lat_max]
+
+    Returns:
+        Distance in kilometers
+    """
+    lon_min, lat_min, lon_max, lat_max = bbox
+    clat = min(max(lat, lat_min), lat_max)
+    clon = min(max(lon, lon_min), lon_max)
+    if clat == lat and clon == lon:
+        return 0.0
+    return haversine_km(lat, lon, clat, clon)
+
+
+def parse_tile_date(name: str) -> Optional[str]:
+    """Return the YYYY-MM-DD date encoded in a tile filename stem, if any."""
+    stem = Path(name).stem
+    try:
+        datetime.strptime(stem, "%Y-%m-%d")
+    except ValueError:
+        return None
+    return stem
+
+
+class TileIndex:
+    """
+    Grid-bucketed spatial index of tile footprints.
+
+    A footprint is one (area_id, bbox) pair together with every date that has
+    imagery for it. Footprints are bucketed into square lat/lon cells, so a
+    point lookup touches one cell and a nearest-neighbour search expands ring
+    by ring only until no closer footprint can exist.
+    """
+
+    def __init__(self, index_path: Optional[Path] = None, cell_size_deg: float = 0.25):
+        """
+        Initialize tile index, loading the persisted copy if present.
+
+        Args:
+            index_path: JSON file the index is persisted to (optional)
+            cell_size_deg: Grid cell size in degrees
+        """
+        self.index_path = index_path
+        self.cell_size_deg = cell_size_deg
+        self._lock = threading.RLock()
+        self._footprints: Dict[str, Dict] = {}
+        self._grid: Dict[Tuple[int, int], List[str]] = {}
+        self._cell_bounds: Optional[List[int]] = None
+        self._sources: Dict[str, int] = {}
+        self._area_bboxes: Dict[str, List[float]] = {}
+        self._dirty = False
+
+        if index_path is not None and index_path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._footprints)
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def add_tile(
+        self,
+        area_id: str,
+        date: str,
+        bbox: List[float],
+        path: Optional[str] = None
+    ) -> bool:
+        """
+        Insert or update a single dated tile.
+
+        Args:
+            area_id: Area identifier
+            date: Date string (YYYY-MM-DD)
+            bbox: [lon_min, lat_min, lon_max, lat_max]
+            path: Path to the image file (optional)
+
+        Returns:
+            True if the index changed
+        """
+        bbox = [float(v) for v in bbox]
+        key = self._footprint_key(area_id, bbox)
+        with self._lock:
+            footprint = self._footprints.get(key)
+            if footprint is None:
+                footprint = {"area_id": area_id, "bbox": bbox, "dates": {}}
+                self._footprints[key] = footprint
+                self._insert_cells(key, bbox)
+            if date in footprint["dates"] and footprint["dates"][date] == path:
+                return False
+            footprint["dates"][date] = path
+            self._dirty = True
+            return True
+
+    def remove_tile(self, area_id: str, date: str) -> bool:
+        """
+        Remove a dated tile from every footprint of an area.
+
+        Args:
+            area_id: Area identifier
+            date: Date string
+
+        Returns:
+            True if the index changed
+        """
+        changed = False
+        with self._lock:
+            for key, footprint in list(self._footprints.items()):
+                if footprint["area_id"] != area_id or date not in footprint["dates"]:
+                    continue
+                del footprint["dates"][date]
+                changed = True
+                if not footprint["dates"]:
+                    self._drop_footprint(key)
+            self._dirty = self._dirty or changed
+        return changed
+
+    def sync(
+        self,
+        imagery_dir: Path,
+        metadata_file: Optional[Path] = None,
+        default_bboxes: Optional[Dict[str, List[float]]] = None
+    ) -> int:
+        """
+        Bring the index up to date with metadata and the imagery tree.
+
+        Only sources whose mtime changed since the last sync are re-read, so
+        calling this frequently costs one stat per area directory.
+
+        Args:
+            imagery_dir: data/imagery directory
+            metadata_file: imagery_metadata.json written by the downloader
+            default_bboxes: Fallback bbox per area when metadata has none
+
+        Returns:
+            Number of tiles added or removed
+        """
+        default_bboxes = default_bboxes or {}
+        changes = 0
+
+        with self._lock:
+            if metadata_file is not None and metadata_file.exists():
+                mtime = metadata_file.stat().st_mtime_ns
+                if self._sources.get("metadata") != mtime:
+                    for entry in self._read_metadata(metadata_file):
+                        self._area_bboxes.setdefault(entry["aoi_id"], entry["bbox"])
+                        date = (entry.get("date_range") or [None])[0] \
+                            or parse_tile_date(entry.get("filename", ""))
+                        if date and self.add_tile(entry["aoi_id"], date, entry["bbox"], entry.get("path")):
+                            changes += 1
+                    self._sources["metadata"] = mtime
+
+            if imagery_dir.exists():
+                for area_dir in imagery_dir.iterdir():
+                    if not area_dir.is_dir():
+                        continue
+                    area_id = area_dir.name
+                    source = f"dir:{area_id}"
+                    mtime = area_dir.stat().st_mtime_ns
+                    if self._sources.get(source) == mtime:
+                        continue
+                    bbox = self._area_bboxes.get(area_id) or default_bboxes.get(area_id)
+                    if bbox is None:
+                        continue
+                    changes += self._sync_area_dir(area_id, area_dir, bbox)
+                    self._sources[source] = mtime
+
+            if changes:
+                self._dirty = True
+            if self._dirty:
+                self.save()
+        return changes
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def containing(self, lat: float, lon: float, area_id: Optional[str] = None) -> List[Dict]:
+        """
+        Find footprints whose bbox contains a point.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            area_id: Restrict to one area (optional)
+
+        Returns:
+            Matching footprints, smallest bbox first
+        """
+        with self._lock:
+            keys = self._grid.get(self._cell(lat, lon), ())
+            hits = []
+            for key in keys:
+                footprint = self._footprints[key]
+                if area_id is not None and footprint["area_id"] != area_id:
+                    continue
+                lon_min, lat_min, lon_max, lat_max = footprint["bbox"]
+                if lat_min <= lat <= lat_max and lon_min <= lon <= lon_max:
+                    hits.append(footprint)
+        hits.sort(key=lambda f: (f["bbox"][2] - f["bbox"][0]) * (f["bbox"][3] - f["bbox"][1]))
+        return hits
+
+    def intersecting(self, bbox: List[float], area_id: Optional[str] = None) -> List[Dict]:
+        """
+        Find footprints whose bbox overlaps a query box.
+
+        Args:
+            bbox: [lon_min, lat_min, lon_max, lat_max]
+            area_id: Restrict to one area (optional)
+
+        Returns:
+            Overlapping footprints, largest bbox first
+        """
+        lon_min, lat_min, lon_max, lat_max = bbox
+        with self._lock:
+            if self._cell_bounds is None:
+                return []
+            row_min, col_min = self._cell(lat_min, lon_min)
+            row_max, col_max = self._cell(lat_max, lon_max)
+            # Clamp to occupied cells so world-sized queries stay cheap
+            b = self._cell_bounds
+            row_min, col_min = max(row_min, b[0]), max(col_min, b[1])
+            row_max, col_max = min(row_max, b[2]), min(col_max, b[3])
+
+            seen = set()
+            hits = []
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    for key in self._grid.get((row, col), ()):
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        footprint = self._footprints[key]
+                        if area_id is not None and footprint["area_id"] != area_id:
+                            continue
+                        f_lon_min, f_lat_min, f_lon_max, f_lat_max = footprint["bbox"]
+                        if (f_lon_min < lon_max and lon_min < f_lon_max
+                                and f_lat_min < lat_max and lat_min < f_lat_max):
+                            hits.append(footprint)
+        hits.sort(key=lambda f: (f["bbox"][2] - f["bbox"][0]) * (f["bbox"][3] - f["bbox"][1]), reverse=True)
+        return hits
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        area_id: Optional[str] = None,
+        max_distance_km: Optional[float] = None
+    ) -> Optional[Tuple[Dict, float]]:
+        """
+        Find the footprint closest to a point by haversine distance to its bbox.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            area_id: Restrict to one area (optional)
+            max_distance_km: Give up beyond this distance (optional)
+
+        Returns:
+            (footprint, distance_km) or None if nothing is in range
+        """
+        with self._lock:
+            if self._cell_bounds is None:
+                return None
+            row0, col0 = self._cell(lat, lon)
+            min_row, min_col, max_row, max_col = self._cell_bounds
+            max_ring = max(abs(row0 - min_row), abs(row0 - max_row),
+                           abs(col0 - min_col), abs(col0 - max_col))
+
+            best: Optional[Dict] = None
+            best_distance = float("inf")
+            seen = set()
+            for ring in range(max_ring + 1):
+                for cell in self._ring_cells(row0, col0, ring):
+                    for key in self._grid.get(cell, ()):
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        footprint = self._footprints[key]
+                        if area_id is not None and footprint["area_id"] != area_id:
+                            continue
+                        distance = bbox_distance_km(lat, lon, footprint["bbox"])
+                        if distance < best_distance:
+                            best, best_distance = footprint, distance
+                bound = self._ring_lower_bound_km(lat, ring)
+                if max_distance_km is not None and bound > max_distance_km:
+                    break
+                if best is not None and best_distance <= bound:
+                    break
+
+        if best is None or (max_distance_km is not None and best_distance > max_distance_km):
+            return None
+        return best, best_distance
+
+    def dates(self, area_id: str) -> List[str]:
+        """
+        List all dates with imagery for an area.
+
+        Args:
+            area_id: Area identifier
+
+        Returns:
+            Sorted list of date strings
+        """
+        with self._lock:
+            found = set()
+            for footprint in self._footprints.values():
+                if footprint["area_id"] == area_id:
+                    found.update(footprint["dates"])
+        return sorted(found)
+
+    def bbox(self, area_id: str, date: str) -> Optional[List[float]]:
+        """
+        Footprint bbox of a dated tile.
+
+        Args:
+            area_id: Area identifier
+            date: Date string (YYYY-MM-DD)
+
+        Returns:
+            [lon_min, lat_min, lon_max, lat_max] or None if not indexed
+        """
+        with self._lock:
+            for footprint in self._footprints.values():
+                if footprint["area_id"] == area_id and date in footprint["dates"]:
+                    return list(footprint["bbox"])
+        return None
+
+    def areas(self) -> List[str]:
+        """List all indexed area identifiers."""
+        with self._lock:
+            return sorted({f["area_id"] for f in self._footprints.values()})
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self):
+        """Atomically write the index to index_path (no-op without a path)."""
+        if self.index_path is None:
+            self._dirty = False
+            return
+        with self._lock:
+            payload = {
+                "version": INDEX_VERSION,
+                "cell_size_deg": self.cell_size_deg,
+                "sources": self._sources,
+                "area_bboxes": self._area_bboxes,
+                "footprints": list(self._footprints.values()),
+            }
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+    def load(self):
+        """Load the persisted index, discarding it if the format changed."""
+        try:
+            with open(self.index_path) as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if payload.get("version") != INDEX_VERSION:
+            return
+
+        with self._lock:
+            self.cell_size_deg = payload.get("cell_size_deg", self.cell_size_deg)
+            self._sources = payload.get("sources", {})
+            self._area_bboxes = payload.get("area_bboxes", {})
+            self._footprints.clear()
+            self._grid.clear()
+            self._cell_bounds = None
+            for footprint in payload.get("footprints", []):
+                key = self._footprint_key(footprint["area_id"], footprint["bbox"])
+                self._footprints[key] = footprint
+                self._insert_cells(key, footprint["bbox"])
+            self._dirty = False
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _footprint_key(area_id: str, bbox: Iterable[float]) -> str:
+        return area_id + "|" + ",".join(f"{v:.6f}" for v in bbox)
+
+    @staticmethod
+    def _read_metadata(metadata_file: Path) -> List[Dict]:
+        try:
+            with open(metadata_file) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [e for e in entries if "aoi_id" in e and "bbox" in e]
+
+    def _sync_area_dir(self, area_id: str, area_dir: Path, bbox: List[float]) -> int:
+        on_disk = {}
+        for path in area_dir.iterdir():
+            if path.suffix.lower() not in IMAGE_SUFFIXES:
+                continue
+            date = parse_tile_date(path.name)
+            if date is not None:
+                on_disk.setdefault(date, str(path))
+
+        changes = 0
+        for date in set(self.dates(area_id)) - set(on_disk):
+            changes += self.remove_tile(area_id, date)
+        for date, path in on_disk.items():
+            changes += self.add_tile(area_id, date, bbox, path)
+        return changes
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size_deg), math.floor(lon / self.cell_size_deg))
+
+    def _insert_cells(self, key: str, bbox: List[float]):
+        lon_min, lat_min, lon_max, lat_max = bbox
+        row_min, col_min = self._cell(lat_min, lon_min)
+        row_max, col_max = self._cell(lat_max, lon_max)
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                self._grid.setdefault((row, col), []).append(key)
+
+        if self._cell_bounds is None:
+            self._cell_bounds = [row_min, col_min, row_max, col_max]
+        else:
+            b = self._cell_bounds
+            self._cell_bounds = [min(b[0], row_min), min(b[1], col_min),
+                                 max(b[2], row_max), max(b[3], col_max)]
+
+    def _drop_footprint(self, key: str):
+        footprint = self._footprints.pop(key)
+        lon_min, lat_min, lon_max, lat_max = footprint["bbox"]
+        row_min, col_min = self._cell(lat_min, lon_min)
+        row_max, col_max = self._cell(lat_max, lon_max)
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                keys = self._grid.get((row, col))
+                if keys and key in keys:
+                    keys.remove(key)
+                    if not keys:
+                        del self._grid[(row, col)]
+
+    @staticmethod
+    def _ring_cells(row0: int, col0: int, ring: int):
+        if ring == 0:
+            yield (row0, col0)
+            return
+        for col in range(col0 - ring, col0 + ring + 1):
+            yield (row0 - ring, col)
+            yield (row0 + ring, col)
+        for row in range(row0 - ring + 1, row0 + ring):
+            yield (row, col0 - ring)
+            yield (row, col0 + ring)
+
+    def _ring_lower_bound_km(self, lat: float, ring: int) -> float:
+        """Minimum distance from the query point to any cell beyond `ring`."""
+        span_deg = ring * self.cell_size_deg
+        lat_km = span_deg * KM_PER_DEGREE
+        far_lat = min(90.0, abs(lat) + span_deg + self.cell_size_deg)
+        lon_km = span_deg * KM_PER_DEGREE * math.cos(math.radians(far_lat))
+        return min(lat_km, lon_km)
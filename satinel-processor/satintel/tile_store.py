@@ -0,0 +1,184 @@
+"""
+Tile Store Module - Decode-once, memory-mapped storage for imagery tiles.
+
+Responsibilities:
+- Write a raw uint8 .npy sidecar for each source tile on first load
+- Serve repeat loads as zero-copy read-only np.memmap views, keeping only
+  the most recently used ones mapped
+- Invalidate sidecars when the source mtime/size (or content hash) changes
+- Bulk ingest command: python -m satintel.tile_store [data_dir]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from satintel.tile_index import IMAGE_SUFFIXES
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Hex SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DecodedTileStore:
+    """Caches decoded tiles as .npy sidecars and hands out memmap views."""
+
+    def __init__(self, store_dir: Path, verify_hash: bool = False, max_open: int = 256):
+        """
+        Initialize tile store.
+
+        Args:
+            store_dir: Directory holding <area>/<date>.npy sidecars
+            verify_hash: On mtime/size change, compare source SHA-256 before
+                re-decoding (saves work when identical files are re-downloaded)
+            max_open: Most memmaps kept open; the least recently used one is
+                dropped beyond this (its file is re-mapped on the next load)
+        """
+        self.store_dir = store_dir
+        self.verify_hash = verify_hash
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._open: "OrderedDict[Path, Tuple[Tuple[int, int], np.memmap]]" = OrderedDict()
+
+    def sidecar_path(self, source: Path) -> Path:
+        """Sidecar location for a source tile: <store_dir>/<area>/<date>.npy."""
+        return self.store_dir / source.parent.name / (source.stem + ".npy")
+
+    def load(self, source: Path, decode: Callable[[Path], np.ndarray]) -> np.memmap:
+        """
+        Load a tile, decoding it only if no fresh sidecar exists.
+
+        Args:
+            source: Source image path
+            decode: Function decoding the source into a uint8 array
+
+        Returns:
+            Read-only memory-mapped array (H, W, C)
+        """
+        stat = source.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._open.get(source)
+        if cached is not None and cached[0] == stamp:
+            try:
+                self._open.move_to_end(source)
+            except KeyError:
+                pass  # evicted concurrently; the caller still holds a valid view
+            return cached[1]
+
+        with self._lock:
+            cached = self._open.get(source)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+
+            sidecar = self.sidecar_path(source)
+            if not self._is_fresh(source, sidecar, stamp):
+                self._write(source, sidecar, stamp, decode(source))
+
+            view = np.load(sidecar, mmap_mode="r")
+            self._open[source] = (stamp, view)
+            self._open.move_to_end(source)
+            # Views already handed out stay valid; only the store's reference goes
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+            return view
+
+    def ingest(self, source: Path, decode: Callable[[Path], np.ndarray]) -> bool:
+        """
+        Write or refresh the sidecar for a tile without mapping it.
+
+        Args:
+            source: Source image path
+            decode: Function decoding the source into a uint8 array
+
+        Returns:
+            True if the sidecar was (re)written
+        """
+        stat = source.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        sidecar = self.sidecar_path(source)
+        with self._lock:
+            if self._is_fresh(source, sidecar, stamp):
+                return False
+            self._write(source, sidecar, stamp, decode(source))
+            self._open.pop(source, None)
+            return True
+
+    def _is_fresh(self, source: Path, sidecar: Path, stamp: Tuple[int, int]) -> bool:
+        meta_path = sidecar.with_suffix(".json")
+        if not sidecar.exists() or not meta_path.exists():
+            return False
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if (meta.get("mtime_ns"), meta.get("size")) == stamp:
+            return True
+        if not self.verify_hash or meta.get("sha256") is None:
+            return False
+        if file_sha256(source) != meta["sha256"]:
+            return False
+
+        # Same content under a new mtime: re-stamp instead of re-decoding
+        meta["mtime_ns"], meta["size"] = stamp
+        self._write_json(meta_path, meta)
+        return True
+
+    def _write(self, source: Path, sidecar: Path, stamp: Tuple[int, int], image: np.ndarray):
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        sidecar.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = sidecar.with_suffix(".npy.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, image)
+        os.replace(tmp_path, sidecar)
+
+        meta = {
+            "source": str(source),
+            "mtime_ns": stamp[0],
+            "size": stamp[1],
+            "shape": list(image.shape),
+            "sha256": file_sha256(source) if self.verify_hash else None,
+        }
+        self._write_json(sidecar.with_suffix(".json"), meta)
+
+    @staticmethod
+    def _write_json(path: Path, payload: Dict):
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Decode every tile under <data_dir>/imagery into the sidecar store."""
+    from satintel.imagery import ImageryManager
+
+    argv = sys.argv[1:] if argv is None else argv
+    data_dir = Path(argv[0]) if argv else Path("data")
+    store = DecodedTileStore(data_dir / "cache" / "tiles")
+
+    written = 0
+    for source in sorted((data_dir / "imagery").glob("*/*")):
+        if source.suffix.lower() in IMAGE_SUFFIXES and store.ingest(source, ImageryManager.decode_image):
+            written += 1
+            print(f"  ✓ {source}")
+    print(f"{written} sidecar(s) written to {store.store_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Time Series Module - Incremental building analytics over every date of an area.
+
+Responsibilities:
+- Compute building stats for each date and change for each consecutive pair
+- Persist per-date and per-pair results so a new acquisition only costs
+  one mask and one diff
+- Return the series in a compact columnar layout
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from satintel.pipeline import TaskPipeline
+from satintel.singleflight import SingleFlight
+
+STAT_COLUMNS = ("building_count", "built_area_km2", "density_per_km2", "avg_building_size_m2")
+CHANGE_COLUMNS = (
+    "new_buildings", "removed_buildings", "unchanged_buildings", "percent_change",
+    "net_built_area_change_km2", "activity_score",
+)
+
+
+class TimeSeriesAnalyzer:
+    """Builds per-area time series on top of the task pipeline's stages."""
+
+    def __init__(self, pipeline: TaskPipeline, store_dir: Optional[Path] = None):
+        """
+        Initialize time-series analyzer.
+
+        Args:
+            pipeline: Pipeline whose stats and change stages are reused
+            store_dir: Directory for persisted per-area entries (in-memory only if None)
+        """
+        self.pipeline = pipeline
+        self.store_dir = store_dir
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the model and settings the stored entries were computed with."""
+        return f"{self.pipeline.detector.model_version}:{self.pipeline.settings_hash}"
+
+    def series(self, area_id: str) -> Dict:
+        """
+        Stats for every date and change between consecutive dates.
+
+        Only dates and pairs missing from the stored entry are computed;
+        concurrent calls for one area share the work.
+
+        Args:
+            area_id: Area identifier
+
+        Returns:
+            Columnar dict: dates plus one list per stat column, and a change
+            block with from/to dates plus one list per change column
+
+        Raises:
+            LookupError: If the area has no imagery
+        """
+        return self._flights.do(area_id, lambda: self._compute(area_id))
+
+    def _compute(self, area_id: str) -> Dict:
+        dates = self.pipeline.imagery.get_available_dates(area_id)
+        if not dates:
+            raise LookupError(f"No imagery for area '{area_id}'")
+
+        entry = self._load(area_id)
+        stats, changes = entry["stats"], entry["changes"]
+        computed = 0
+        for date in dates:
+            if date not in stats:
+                stats[date] = self.pipeline.stats(area_id, date)
+                computed += 1
+
+        pairs = list(zip(dates, dates[1:]))
+        if self.pipeline.change_detector is not None:
+            for previous, date in pairs:
+                key = f"{previous}|{date}"
+                if key not in changes:
+                    changes[key] = self.pipeline.change(area_id, date, previous)
+                    computed += 1
+        if computed:
+            self._save(area_id, entry)
+
+        series = {"area_id": area_id, "dates": dates}
+        for column in STAT_COLUMNS:
+            series[column] = [stats[date].get(column) for date in dates]
+        change: Dict[str, List] = {"from": [], "to": []}
+        change.update({column: [] for column in CHANGE_COLUMNS})
+        for previous, date in pairs:
+            pair = changes.get(f"{previous}|{date}")
+            if pair is None:
+                continue
+            change["from"].append(previous)
+            change["to"].append(date)
+            for column in CHANGE_COLUMNS:
+                change[column].append(pair[column])
+        series["change"] = change
+        return series
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _path(self, area_id: str) -> Optional[Path]:
+        return self.store_dir / f"{area_id}.json" if self.store_dir is not None else None
+
+    def _load(self, area_id: str) -> Dict:
+        with self._lock:
+            entry = self._entries.get(area_id)
+        if entry is None and self._path(area_id) is not None:
+            try:
+                with open(self._path(area_id)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+        if entry is None or entry.get("fingerprint") != self.fingerprint:
+            entry = {"fingerprint": self.fingerprint, "stats": {}, "changes": {}}
+        with self._lock:
+            self._entries[area_id] = entry
+        return entry
+
+    def _save(self, area_id: str, entry: Dict):
+        path = self._path(area_id)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
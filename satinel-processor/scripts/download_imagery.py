@@ -6,9 +6,6 @@ Predownload satellite imagery from Sentinel-2 and USGS Landsat for specified AOI
 import os
 import sys
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Tuple
-import json
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
@@ -24,6 +21,11 @@ SENTINEL_CLIENT_ID = os.getenv('SENTINEL_CLIENT_ID')
 SENTINEL_CLIENT_SECRET = os.getenv('SENTINEL_CLIENT_SECRET')
 USGS_USERNAME = os.getenv('USGS_USERNAME', '')  # Optional
 USGS_PASSWORD = os.getenv('USGS_PASSWORD', '')  # Optional
+SENTINEL_HUB_URL = os.getenv('SENTINEL_HUB_URL', 'https://services.sentinel-hub.com')
+
+# Download parallelism
+DOWNLOAD_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', '8'))
+DOWNLOAD_RATE_LIMIT = float(os.getenv('DOWNLOAD_RATE_LIMIT', '5'))  # Requests per second per host
 
 DATA_DIR = Path(os.getenv('DATA_DIR', 'data'))
 IMAGERY_DIR = DATA_DIR / 'imagery'
@@ -95,120 +97,52 @@ def setup_directories():
 
 
 def download_sentinel2_imagery():
-    """Download Sentinel-2 imagery for all AOIs."""
+    """Download Sentinel-2 imagery for all AOIs in parallel, skipping tiles already on disk."""
     try:
-        from sentinelhub import SHConfig, SentinelHubRequest, MimeType, CRS, BBox, DataCollection
-        from PIL import Image
-        import numpy as np
+        import requests
+        from satintel.downloader import (
+            DownloadManifest, Downloader, MetadataLog, sentinel_jobs, sentinel_token
+        )
     except ImportError:
-        print("ERROR: sentinelhub or PIL not installed.")
-        print("Please install: pip install sentinelhub Pillow")
+        print("ERROR: requests not installed.")
+        print("Please install: pip install requests")
         return False
     
-    print("Configuring Sentinel Hub API...")
-    config = SHConfig()
-    
-    if not SENTINEL_INSTANCE_ID or not SENTINEL_CLIENT_ID or not SENTINEL_CLIENT_SECRET:
+    if not SENTINEL_CLIENT_ID or not SENTINEL_CLIENT_SECRET:
         print("ERROR: Sentinel Hub credentials not found in .env file")
-        print("Please set SENTINEL_INSTANCE_ID, SENTINEL_CLIENT_ID, SENTINEL_CLIENT_SECRET")
+        print("Please set SENTINEL_CLIENT_ID, SENTINEL_CLIENT_SECRET")
         return False
     
-    config.instance_id = SENTINEL_INSTANCE_ID
-    config.sh_client_id = SENTINEL_CLIENT_ID
-    config.sh_client_secret = SENTINEL_CLIENT_SECRET
-    
-    # Evalscript for true color RGB with enhancement
-    evalscript = """
-    //VERSION=3
-    function setup() {
-        return {
-            input: ["B02", "B03", "B04", "SCL"],
-            output: { bands: 3, sampleType: "AUTO" }
-        };
-    }
-
-    function evaluatePixel(sample) {
-        // Enhanced true color
-        return [sample.B04 * 2.5, sample.B03 * 2.5, sample.B02 * 2.5];
-    }
-    """
-    
-    metadata = []
-    
-    for aoi_id, aoi_data in AOIS.items():
-        print(f"\nProcessing AOI: {aoi_id} ({aoi_data['name']})")
-        
-        bbox = BBox(bbox=aoi_data['bbox'], crs=CRS.WGS84)
-        
-        for date_start, date_end in DATE_RANGES:
-            print(f"  Date range: {date_start} to {date_end}")
-            
-            try:
-                request = SentinelHubRequest(
-                    evalscript=evalscript,
-                    input_data=[{
-                        'type': DataCollection.SENTINEL2_L2A,
-                        'dataFilter': {
-                            'maxCloudCoverage': MAX_CLOUD_COVER
-                        },
-                        'time_interval': (date_start, date_end)
-                    }],
-                    responses=[{
-                        'identifier': 'default',
-                        'format': {'type': MimeType.PNG}
-                    }],
-                    bbox=bbox,
-                    size=IMAGE_SIZE,
-                    config=config
-                )
-                
-                # Get data
-                images = request.get_data()
-                
-                if images and len(images) > 0:
-                    # Save the first (most recent) cloud-free image
-                    image_array = images[0]
-                    
-                    # Convert to PIL Image
-                    if image_array.dtype == np.float32 or image_array.dtype == np.float64:
-                        image_array = (np.clip(image_array, 0, 1) * 255).astype(np.uint8)
-                    
-                    img = Image.fromarray(image_array)
-                    
-                    # Save with date in filename
-                    filename = f"{date_start}.png"
-                    output_path = IMAGERY_DIR / aoi_id / filename
-                    img.save(output_path)
-                    
-                    print(f"    ✓ Downloaded: {output_path}")
-                    
-                    # Store metadata
-                    metadata.append({
-                        'aoi_id': aoi_id,
-                        'aoi_name': aoi_data['name'],
-                        'bbox': aoi_data['bbox'],
-                        'date_range': [date_start, date_end],
-                        'filename': filename,
-                        'path': str(output_path),
-                        'source': 'Sentinel-2',
-                        'resolution': '10m',
-                        'downloaded_at': datetime.now().isoformat()
-                    })
-                else:
-                    print(f"    ✗ No cloud-free images found")
-                    
-            except Exception as e:
-                print(f"    ✗ Error: {str(e)}")
-                continue
-    
-    # Save metadata
-    if metadata:
-        metadata_file = METADATA_DIR / 'imagery_metadata.json'
-        with open(metadata_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
-        print(f"\n✓ Metadata saved to: {metadata_file}")
+    print("Authenticating with Sentinel Hub...")
+    try:
+        token = sentinel_token(SENTINEL_CLIENT_ID, SENTINEL_CLIENT_SECRET, SENTINEL_HUB_URL)
+    except requests.RequestException as e:
+        print(f"ERROR: Authentication failed: {e}")
+        return False
     
-    return True
+    jobs = sentinel_jobs(
+        AOIS, DATE_RANGES, IMAGERY_DIR, token,
+        image_size=IMAGE_SIZE, max_cloud_cover=MAX_CLOUD_COVER, base_url=SENTINEL_HUB_URL
+    )
+    downloader = Downloader(
+        DownloadManifest(METADATA_DIR / 'download_manifest.json'),
+        MetadataLog(METADATA_DIR / 'imagery_metadata.json'),
+        max_workers=DOWNLOAD_WORKERS,
+        requests_per_second=DOWNLOAD_RATE_LIMIT
+    )
+    print(f"Fetching {len(jobs)} tiles with {DOWNLOAD_WORKERS} workers...")
+    summary = downloader.download(jobs)
+    
+    for key, error in summary['errors'].items():
+        print(f"    ✗ {key}: {error}")
+    print(
+        f"\n✓ Downloaded {summary['downloaded']}, skipped {summary['skipped']} "
+        f"(already complete), failed {summary['failed']} "
+        f"({summary['bytes']/1024/1024:.2f} MB)"
+    )
+    print(f"✓ Metadata saved to: {METADATA_DIR / 'imagery_metadata.json'}")
+    
+    return summary['failed'] == 0
 
 
 def download_landsat_imagery():
@@ -0,0 +1,51 @@
+"""
+Map Tile Seeding Script for ASIP
+Pre-render imagery and building tiles around the priority locations in config/areas.py,
+so panning those places is served straight from the tile cache.
+
+Usage:
+    python scripts/seed_tiles.py [--zooms 12-16] [--radius 2]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.areas import AREAS
+from app.services import get_map_tiles
+
+
+def parse_zooms(value: str) -> list:
+    """Parse '14' or '12-16' into a list of zoom levels."""
+    low, _, high = value.partition('-')
+    return list(range(int(low), int(high or low) + 1))
+
+
+def main(argv=None) -> int:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Pre-render XYZ map tiles")
+    parser.add_argument('--zooms', default='12-16', help="Zoom level or range (default: 12-16)")
+    parser.add_argument('--radius', type=int, default=2, help="Tiles around each location (default: 2)")
+    args = parser.parse_args(argv)
+
+    points = [
+        (location['lat'], location['lon'])
+        for area in AREAS.values()
+        for location in area.get('priority_locations', [])
+    ]
+    renderer = get_map_tiles()
+
+    started = time.perf_counter()
+    count = renderer.seed(points, parse_zooms(args.zooms), radius=args.radius)
+    elapsed = time.perf_counter() - started
+    print(f"✓ Seeded {count} tiles for {len(points)} locations in {elapsed:.1f}s")
+    print(f"  Cache: {renderer.cache.stats()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,9 +9,10 @@ class APIClient {
     }
 
     /**
-     * Submit satellite analysis task
+     * Submit satellite analysis task and wait for its job to finish.
+     * onProgress (optional) receives each job status update.
      */
-    async submitTask(lat, lon, date = null, areaId = null) {
+    async submitTask(lat, lon, date = null, areaId = null, onProgress = null) {
         const payload = {
             lat,
             lon,
@@ -32,14 +33,70 @@ class APIClient {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
-            const data = await response.json();
-            return { success: true, data };
+            const job = await this.waitForJob(await response.json(), onProgress);
+            if (job.status !== 'done') {
+                throw new Error(job.error || 'Task failed');
+            }
+            return { success: true, data: job.result };
         } catch (error) {
             console.error('Task submission failed:', error);
             return { success: false, error: error.message };
         }
     }
 
+    /**
+     * Get the status of a background job
+     */
+    async getJob(jobId) {
+        const response = await fetch(`${this.baseURL}/api/jobs/${jobId}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    }
+
+    /**
+     * Wait for a job to finish, following server-sent events when the
+     * browser supports them and polling otherwise.
+     */
+    async waitForJob(job, onProgress = null, pollIntervalMs = 500) {
+        if (job.status === 'done' || job.status === 'failed') {
+            return job;
+        }
+
+        if (window.EventSource) {
+            try {
+                return await new Promise((resolve, reject) => {
+                    const source = new EventSource(`${this.baseURL}/api/jobs/${job.job_id}/events`);
+                    source.addEventListener('progress', (event) => {
+                        if (onProgress) onProgress(JSON.parse(event.data));
+                    });
+                    const finish = (event) => {
+                        source.close();
+                        resolve(JSON.parse(event.data));
+                    };
+                    source.addEventListener('done', finish);
+                    source.addEventListener('failed', finish);
+                    source.onerror = () => {
+                        source.close();
+                        reject(new Error('Event stream interrupted'));
+                    };
+                });
+            } catch (error) {
+                console.warn('Falling back to polling:', error);
+            }
+        }
+
+        while (true) {
+            job = await this.getJob(job.job_id);
+            if (onProgress) onProgress(job);
+            if (job.status === 'done' || job.status === 'failed') {
+                return job;
+            }
+            await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+        }
+    }
+
     /**
      * Get cached task result
      */
@@ -29,6 +29,18 @@ class MapManager {
             maxZoom: 19
         }).addTo(this.map);
 
+        // Satellite imagery and detected buildings, rendered by /api/tiles
+        const imagery = L.tileLayer('/api/tiles/imagery/{z}/{x}/{y}.png', {
+            attribution: 'Sentinel-2',
+            maxZoom: 19
+        });
+        const buildings = L.tileLayer('/api/tiles/buildings/{z}/{x}/{y}.png', {
+            maxZoom: 19
+        });
+        imagery.addTo(this.map);
+        buildings.addTo(this.map);
+        L.control.layers(null, { 'Imagery': imagery, 'Buildings': buildings }).addTo(this.map);
+
         // Add area markers
         this.addAreaMarkers();
 
@@ -18,12 +18,158 @@ def test_health_check():
     data = response.json()
     assert "status" in data
     assert "version" in data
+    assert {"hits", "misses", "evictions"} <= set(data["cache"])
+    assert {"coalescing_ratio", "jobs_deduplicated", "total_coalescing_ratio"} <= set(data["coalescing"])
 
 
-def test_submit_task():
-    """Test task submission endpoint."""
-    # TODO: Implement with mock data
-    pass
+class _StubPipeline:
+    """Minimal stand-in for satintel.pipeline.TaskPipeline."""
+
+    def snap(self, lat, lon, area_id=None):
+        from satintel.pipeline import TileNotFoundError
+
+        if lat < 0:
+            raise TileNotFoundError("No imagery available")
+        return {"area_id": "new_york", "date": "2023-01-01", "center_lat": lat, "center_lon": lon}
+
+    def analyze_points(self, points, radius_m=None, area_id=None, max_workers=4):
+        for index, point in enumerate(points):
+            yield {"index": index, "id": point["id"], "lat": point["lat"], "lon": point["lon"],
+                   "area_id": "new_york", "date": "2023-01-01", "stats": {"building_count": 2}}
+
+    def process(self, tile, progress=None, fresh=False):
+        progress("detect")
+        return {
+            "area_id": tile["area_id"],
+            "date": tile["date"],
+            "lat": tile["center_lat"],
+            "lon": tile["center_lon"],
+            "image_url": "/api/imagery/new_york/2023-01-01",
+            "overlay_url": "/static/overlays/new_york/2023-01-01.png",
+            "stats": {"building_count": 2, "built_area_km2": 0.03, "density_per_km2": 48.8},
+            "tile_size_km": 40.96,
+            "resolution_m": 10.0,
+            "processing_time_ms": 1,
+        }
+
+
+def test_submit_task(monkeypatch):
+    """Test task submission returns a job that can be polled and streamed."""
+    from app.routes import jobs, task
+    from satintel.jobs import JobManager
+
+    manager = JobManager(max_workers=1)
+    monkeypatch.setattr(task, "get_pipeline", lambda: _StubPipeline())
+    monkeypatch.setattr(task, "get_job_manager", lambda: manager)
+    monkeypatch.setattr(jobs, "get_job_manager", lambda: manager)
+
+    response = client.post("/api/task", json={"lat": 40.71, "lon": -74.0})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    events = client.get(f"/api/jobs/{job_id}/events").text
+    assert '"stage": "detect"' in events
+    assert "event: done" in events
+
+    job = client.get(f"/api/jobs/{job_id}").json()
+    assert job["status"] == "done"
+    assert job["result"]["stats"]["building_count"] == 2
+
+    assert client.post("/api/task", json={"lat": -10.0, "lon": -74.0}).status_code == 404
+    assert client.get("/api/jobs/unknown").status_code == 404
+
+
+def test_submit_profiled_task(monkeypatch, tmp_path):
+    """Test a profiled task writes collapsed stacks and stats, and requires debug."""
+    from app.routes import jobs, task
+    from config.settings import settings
+    from satintel.jobs import JobManager
+
+    manager = JobManager(max_workers=1)
+    monkeypatch.setattr(task, "get_pipeline", lambda: _StubPipeline())
+    monkeypatch.setattr(task, "get_job_manager", lambda: manager)
+    monkeypatch.setattr(jobs, "get_job_manager", lambda: manager)
+    monkeypatch.setattr(settings, "profile_dir", tmp_path)
+    monkeypatch.setattr(settings, "debug", True)
+
+    response = client.post("/api/task?profile=1", json={"lat": 40.71, "lon": -74.0})
+    job_id = response.json()["job_id"]
+    client.get(f"/api/jobs/{job_id}/events")
+    profile = client.get(f"/api/jobs/{job_id}").json()["result"]["profile"]
+
+    assert "process" in (tmp_path / profile["summary"]).read_text()
+    assert (tmp_path / profile["stats"]).stat().st_size > 0
+    assert (tmp_path / profile["collapsed"]).exists()
+
+    monkeypatch.setattr(settings, "debug", False)
+    response = client.post("/api/task", json={"lat": 40.71, "lon": -74.0}, headers={"X-Profile": "1"})
+    assert response.status_code == 403
+
+
+def test_submit_batch(monkeypatch):
+    """Test batch analysis streams one NDJSON line per point and caps the batch size."""
+    import json
+    from app.routes import task
+    from config.settings import settings
+
+    monkeypatch.setattr(task, "get_pipeline", lambda: _StubPipeline())
+    points = [{"lat": 40.71, "lon": -74.0, "id": str(i)} for i in range(3)]
+
+    response = client.post("/api/task/batch", json={"points": points})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == ["0", "1", "2"]
+
+    monkeypatch.setattr(settings, "batch_max_points", 2)
+    assert client.post("/api/task/batch", json={"points": points}).status_code == 413
+
+
+def test_prometheus_metrics():
+    """Test /metrics serves the Prometheus text format."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE satintel_stage_seconds histogram" in response.text
+    assert "satintel_stage_cache_entries " in response.text
+
+
+class _StubFootprintPipeline:
+    """Pipeline stand-in serving one square footprint."""
+
+    analyzer = type("Analyzer", (), {"pixel_resolution": 10.0})()
+
+    def transform(self, area_id, date):
+        from satintel.pipeline import TileNotFoundError
+        from satintel.table import transform_from_bbox
+
+        if area_id != "new_york":
+            raise TileNotFoundError("No imagery")
+        return transform_from_bbox([-74.05, 40.68, -73.95, 40.76], 64, 64)
+
+    def footprints(self, area_id, date):
+        from satintel.table import BuildingTable
+
+        return BuildingTable.from_polygons([{
+            "id": 1, "area_px": 100, "bbox": [4, 4, 14, 14], "centroid": [8.5, 8.5],
+            "coordinates": [[4, 4], [4, 13], [13, 13], [13, 4]],
+        }])
+
+
+def test_get_buildings(monkeypatch):
+    """Test streaming footprint export and bbox filtering."""
+    from app.routes import buildings
+
+    monkeypatch.setattr(buildings, "get_pipeline", lambda: _StubFootprintPipeline())
+    response = client.get("/api/buildings/new_york/2023-01-01")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/geo+json"
+    assert len(response.json()["features"]) == 1
+
+    response = client.get("/api/buildings/new_york/2023-01-01?bbox=-73.96,40.68,-73.95,40.69")
+    assert response.json()["features"] == []
+    assert client.get("/api/buildings/new_york/2023-01-01?bbox=1,2").status_code == 400
+    assert client.get("/api/buildings/tehran/2023-01-01").status_code == 404
 
 
 def test_get_areas():
@@ -34,5 +180,33 @@ def test_get_areas():
 
 def test_get_available_dates():
     """Test available dates endpoint."""
-    # TODO: Implement
-    pass
+    response = client.get("/api/dates/unknown_area")
+    assert response.status_code == 404
+
+
+def test_get_timeseries_unknown_area():
+    """Test time series for an area without imagery."""
+    assert client.get("/api/timeseries/unknown_area").status_code == 404
+
+
+def test_get_map_tile(monkeypatch):
+    """Test map tiles carry an ETag and revalidate with 304."""
+    from app.routes import tiles
+
+    class _StubRenderer:
+        def tile(self, layer, z, x, y, date=None):
+            if layer != "imagery":
+                raise ValueError(f"Unknown layer '{layer}'")
+            return b"\x89PNG-stub", "abc123"
+
+    monkeypatch.setattr(tiles, "get_map_tiles", lambda: _StubRenderer())
+    response = client.get("/api/tiles/imagery/12/1205/1539.png")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == '"abc123"'
+    assert "max-age" in response.headers["cache-control"]
+
+    cached = client.get("/api/tiles/imagery/12/1205/1539.png", headers={"If-None-Match": '"abc123"'})
+    assert cached.status_code == 304
+    assert client.get("/api/tiles/terrain/12/1205/1539.png").status_code == 404
+    assert client.get("/api/tiles/imagery/12/1205/1539.png?date=../../x").status_code == 422
@@ -2,70 +2,1106 @@
 Test suite for satintel core modules
 """
 
+import os
 import pytest
 import numpy as np
 from pathlib import Path
 
 
-# TODO: Implement tests for imagery module
-def test_imagery_manager_init():
+from satintel.imagery import ImageryManager
+from satintel.tile_index import TileIndex, haversine_km
+
+
+def _write_tile(data_dir: Path, area_id: str, date: str):
+    area_dir = data_dir / "imagery" / area_id
+    area_dir.mkdir(parents=True, exist_ok=True)
+    path = area_dir / f"{date}.png"
+    path.write_bytes(b"")
+    return path
+
+
+def test_imagery_manager_init(tmp_path):
     """Test ImageryManager initialization."""
-    pass
+    manager = ImageryManager(tmp_path)
+    assert manager.imagery_dir == tmp_path / "imagery"
+    assert manager.metadata_dir == tmp_path / "metadata"
+    assert len(manager.index) == 0
 
 
-def test_snap_to_tile():
+def test_snap_to_tile(tmp_path):
     """Test coordinate snapping to nearest tile."""
-    pass
+    _write_tile(tmp_path, "new_york", "2023-01-01")
+    _write_tile(tmp_path, "new_york", "2023-06-01")
+    bboxes = {"new_york": [-74.05, 40.68, -73.95, 40.76]}
+    manager = ImageryManager(tmp_path, area_bboxes=bboxes)
+
+    inside = manager.snap_to_tile(40.7128, -74.0060)
+    assert inside["area_id"] == "new_york"
+    assert inside["date"] == "2023-06-01"
+    assert inside["distance_km"] == 0.0
+
+    nearby = manager.snap_to_tile(40.80, -74.00)
+    assert nearby["area_id"] == "new_york"
+    assert 0 < nearby["distance_km"] < 10
 
+    assert manager.snap_to_tile(35.69, 51.39) is None
+    assert manager.get_available_dates("new_york") == ["2023-01-01", "2023-06-01"]
 
-def test_load_image():
+
+def test_tile_index_incremental_and_persistent(tmp_path):
+    """Test tile index picks up new tiles and survives a reload."""
+    index_path = tmp_path / "metadata" / "tile_index.json"
+    bboxes = {"tehran": [51.35, 35.68, 51.45, 35.75]}
+    index = TileIndex(index_path)
+    _write_tile(tmp_path, "tehran", "2023-01-01")
+    assert index.sync(tmp_path / "imagery", default_bboxes=bboxes) == 1
+    assert index.sync(tmp_path / "imagery", default_bboxes=bboxes) == 0
+
+    reloaded = TileIndex(index_path)
+    assert reloaded.dates("tehran") == ["2023-01-01"]
+    footprint, distance = reloaded.nearest(35.60, 51.40)
+    assert footprint["area_id"] == "tehran"
+    assert distance == pytest.approx(haversine_km(35.60, 51.40, 35.68, 51.40))
+
+
+def test_load_image(tmp_path):
     """Test image loading."""
-    pass
+    from PIL import Image
+    from satintel.tile_store import DecodedTileStore
+
+    path = _write_tile(tmp_path, "new_york", "2023-01-01")
+    pixels = np.random.default_rng(0).integers(0, 255, (16, 24, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+
+    store = DecodedTileStore(tmp_path / "cache" / "tiles")
+    manager = ImageryManager(tmp_path, tile_store=store)
+    image = manager.load_image("new_york", "2023-01-01")
+    assert isinstance(image, np.memmap)
+    np.testing.assert_array_equal(image, pixels)
+    assert manager.load_image("new_york", "2023-01-01") is image
+
+    Image.fromarray(pixels[::-1]).save(path)
+    os.utime(path, ns=(0, 0))
+    np.testing.assert_array_equal(manager.load_image("new_york", "2023-01-01"), pixels[::-1])
+
+    with pytest.raises(FileNotFoundError):
+        manager.load_image("new_york", "1999-01-01")
+
+    store.max_open = 1
+    second = _write_tile(tmp_path, "new_york", "2023-02-01")
+    Image.fromarray(pixels).save(second)
+    manager.load_image("new_york", "2023-02-01")
+    assert list(store._open) == [second]
+
+
+
+def test_load_image_window_and_overview_from_cog(tmp_path):
+    """Test windowed and overview reads come from a tiled COG with overviews."""
+    rasterio = pytest.importorskip("rasterio")
+    from PIL import Image
+    from satintel.cog import CogStore
+
+    path = _write_tile(tmp_path, "tehran", "2023-01-01")
+    pixels = np.random.default_rng(1).integers(0, 255, (300, 260, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+
+    store = CogStore(tmp_path / "cog", blocksize=128)
+    manager = ImageryManager(tmp_path, area_bboxes={"tehran": [51.3, 35.6, 51.5, 35.8]}, cog_store=store)
+    crop = manager.load_image("tehran", "2023-01-01", window=(100, 50, 40, 30))
+    np.testing.assert_array_equal(crop, pixels[50:80, 100:140])
+    preview = manager.load_image("tehran", "2023-01-01", overview=2)
+    assert preview.shape == (75, 65, 3)
+    assert abs(preview.astype(float).mean() - pixels.mean()) < 2
+
+    with rasterio.open(store.path("tehran", "2023-01-01")) as cog:
+        assert cog.crs.to_epsg() == 4326
+        assert cog.block_shapes[0] == (128, 128)
+        assert cog.overviews(1) == [2, 4]
+        assert list(cog.bounds) == pytest.approx([51.3, 35.6, 51.5, 35.8])
+
+    # Without a COG store the same window is cut from the decoded tile
+    plain = ImageryManager(tmp_path, area_bboxes={"tehran": [51.3, 35.6, 51.5, 35.8]})
+    np.testing.assert_array_equal(plain.load_image("tehran", "2023-01-01", window=(100, 50, 40, 30)), crop)
+    assert plain.load_image("tehran", "2023-01-01", overview=2).shape == preview.shape
+
+from satintel.models import BuildingDetector, PrecomputedMaskLoader
+from satintel.analysis import BuildingAnalyzer
+
+
+def _sample_mask():
+    mask = np.zeros((64, 64), dtype=np.uint8)
+    mask[4:14, 4:14] = 1      # 100 px
+    mask[30:50, 20:30] = 1    # 200 px
+    mask[60:62, 60:62] = 1    # 4 px, below min size
+    return mask
 
 
-# TODO: Implement tests for models module
 def test_building_detector_init():
     """Test BuildingDetector initialization."""
-    pass
+    detector = BuildingDetector(min_building_size=10)
+    assert detector.model is None
+    assert detector.min_building_size == 10
 
 
 def test_detect_buildings():
     """Test building detection."""
-    pass
+    detector = BuildingDetector()
+    with pytest.raises(RuntimeError):
+        detector.detect_buildings(np.zeros((8, 8, 3), dtype=np.float32))
+
+    detector.model = lambda batch: batch[:, :1] - 0.5
+    image = np.zeros((8, 8, 3), dtype=np.float32)
+    image[2:4, 2:4] = 1.0
+    mask = detector.detect_buildings(image)
+    assert mask.shape == (8, 8)
+    assert mask.sum() == 4
+
+
+def test_detect_buildings_tiled_matches_whole_image():
+    """Test sliding-window inference is seam-free and bounded per window."""
+    seen_shapes = set()
+
+    def model(batch):
+        seen_shapes.add(batch.shape[1:])
+        return batch[:, :1] - 0.5
+
+    image = np.random.default_rng(1).integers(0, 255, (150, 230, 3), dtype=np.uint8)
+    whole = BuildingDetector()
+    whole.model = model
+    tiled = BuildingDetector(tile_size=64, tile_overlap=16, batch_size=3)
+    tiled.model = model
+
+    expected = whole.detect_buildings(image)
+    seen_shapes.clear()
+    np.testing.assert_array_equal(tiled.detect_buildings(image), expected)
+    assert seen_shapes == {(3, 64, 64)}
+
+
+def test_batching_engine_merges_concurrent_requests():
+    """Test concurrent callers share forward passes and get their own rows."""
+    from concurrent.futures import ThreadPoolExecutor
+    from satintel.batching import BatchingEngine
+
+    engine = BatchingEngine(lambda batch: batch * 2, max_batch_size=8, max_wait_ms=50)
+    inputs = [np.full((1, 4, 4), i, dtype=np.float32) for i in range(16)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outputs = list(pool.map(lambda x: engine.infer(x[None])[0], inputs))
+
+    for i, output in enumerate(outputs):
+        np.testing.assert_array_equal(output, inputs[i] * 2)
+    stats = engine.stats()
+    assert stats["items"] == 16
+    assert stats["batches"] < 16
+    assert max(stats["batch_size_histogram"]) <= 8
+
+
+def test_runtime_selects_fastest_accurate_onnx_variant(tmp_path):
+    """Test ONNX artifacts are quantized, reported and selected."""
+    onnx = pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    from onnx import TensorProto, helper, numpy_helper
+    from satintel import runtime
+
+    model_path = tmp_path / "detector.pth"
+    model_path.write_bytes(b"weights")
+    weight = np.full((1, 3, 3, 3), 1 / 27, dtype=np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("Conv", ["image", "w"], ["logits"], pads=[1, 1, 1, 1])],
+        "detector",
+        [helper.make_tensor_value_info("image", TensorProto.FLOAT, ["batch", 3, 16, 16])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", 1, 16, 16])],
+        [numpy_helper.from_array(weight, "w")]
+    )
+    onnx_model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    onnx_model.ir_version = 8
+    onnx.save(onnx_model, runtime.artifact_path(model_path, "onnx"))
+
+    runtime.quantize_onnx(runtime.artifact_path(model_path, "onnx"), model_path)
+    assert runtime.available_artifacts(model_path) in ([], ["pytorch"])  # not tied to these weights yet
+    runtime.write_manifest(model_path, {"source_sha256": runtime.source_sha256(model_path)})
+    assert "onnx-int8-dynamic" in runtime.available_artifacts(model_path)
+    assert runtime.select_artifact(model_path) == "onnx"  # int8 is unchecked until reported
+
+    tiles = [np.random.default_rng(i).random((3, 16, 16), dtype=np.float32) - 0.5 for i in range(2)]
+    results = runtime.report(model_path, tiles, repeats=1)
+    assert results["onnx"]["iou"] == 1.0
+    assert runtime.select_artifact(model_path, min_iou=0.0) in results
+
+    detector = BuildingDetector(model_path)
+    detector.load_model("onnx", intra_op_threads=1)
+    assert detector.detect_buildings(np.zeros((16, 16, 3), dtype=np.float32)).shape == (16, 16)
+
+    # Replacing the weights does not change the version of the loaded model
+    loaded_version = detector.model_version
+    model_path.write_bytes(b"new weights")
+    assert detector.model_version == loaded_version
+    assert BuildingDetector(model_path).model_version != loaded_version
+    # ...but exports and report of the old weights are no longer served
+    assert runtime.available_artifacts(model_path) in ([], ["pytorch"])
+    assert not runtime.manifest_is_current(model_path)
 
 
 def test_mask_to_polygons():
     """Test mask to polygon conversion."""
-    pass
+    table = BuildingDetector(min_building_size=10).mask_to_polygons(_sample_mask())
+    assert len(table) == 2
+    np.testing.assert_array_equal(table.bbox, [[4, 4, 14, 14], [20, 30, 30, 50]])
+    np.testing.assert_array_equal(table.ring(0), [[4, 4], [4, 13], [13, 13], [13, 4]])
+    assert table.ring_offsets[-1] == len(table.vertices)
+
+
+def test_label_buildings_structure_of_arrays():
+    """Test single-pass labelling returns filtered, renumbered arrays."""
+    buildings = BuildingDetector(min_building_size=10).label_buildings(_sample_mask())
+    assert len(buildings) == 2
+    assert not buildings.has_rings
+    np.testing.assert_array_equal(buildings.area_px, [100, 200])
+    np.testing.assert_array_equal(buildings.bbox, [[4, 4, 14, 14], [20, 30, 30, 50]])
+    np.testing.assert_allclose(buildings.centroid[0], [8.5, 8.5])
+    assert set(np.unique(buildings.labels)) == {0, 1, 2}
+
+
+def test_building_table_slicing_and_export():
+    """Test zero-copy slicing, filtering and GeoJSON/Arrow export."""
+    from satintel.table import transform_from_bbox
+
+    table = BuildingDetector(min_building_size=10).mask_to_polygons(_sample_mask())
+    head = table[:1]
+    assert np.shares_memory(head.vertices, table.vertices)
+    assert np.shares_memory(head.area_px, table.area_px)
+
+    large = table.filter(table.area_px > 150)
+    assert large.id.tolist() == [2]
+    np.testing.assert_array_equal(large.ring(0), table.ring(1))
+
+    transform = transform_from_bbox([-74.05, 40.68, -73.95, 40.76], 64, 64)
+    geojson = table.to_geojson(transform)
+    ring = geojson["features"][0]["geometry"]["coordinates"][0]
+    assert ring[0] == ring[-1]
+    assert -74.05 <= ring[0][0] <= -73.95 and 40.68 <= ring[0][1] <= 40.76
+
+    pa = pytest.importorskip("pyarrow")
+    arrow = table.to_arrow(transform)
+    assert arrow.num_rows == 2
+    assert len(arrow.column("ring")[1]) == len(table.ring(1))
+
+
+def test_footprint_export_streams_geojson_and_flatgeobuf(tmp_path):
+    """Test chunked GeoJSON, FlatGeobuf layout and bbox selection."""
+    import json
+    from satintel.export import FGB_MAGIC, iter_flatgeobuf, iter_geojson, select_bbox
+    from satintel.table import transform_from_bbox
+
+    table = BuildingDetector(min_building_size=10).mask_to_polygons(_sample_mask())
+    transform = transform_from_bbox([-74.05, 40.68, -73.95, 40.76], 64, 64)
+
+    chunks = list(iter_geojson(table, transform, 100.0, chunk_size=1))
+    assert len(chunks) == 4
+    features = json.loads(b"".join(chunks))["features"]
+    assert [f["properties"]["area_m2"] for f in features] == [10000.0, 20000.0]
+
+    # Second building spans pixel columns 20-29 and rows 30-49
+    window = [-74.05 + 22 * 0.1 / 64, 40.76 - 45 * 0.08 / 64, -74.05 + 25 * 0.1 / 64, 40.75]
+    assert select_bbox(table, transform, window).id.tolist() == [2]
+
+    pytest.importorskip("flatbuffers")
+    data = b"".join(iter_flatgeobuf(table, transform, 100.0))
+    assert data.startswith(FGB_MAGIC)
+    path = tmp_path / "buildings.fgb"
+    path.write_bytes(data)
+
+    raw = pytest.importorskip("pyogrio.raw")
+    _, _, geometry, fields = raw.read(path)
+    assert sorted(fields[0].tolist()) == [1, 2]
+    _, _, geometry, fields = raw.read(path, bbox=tuple(window))
+    assert fields[0].tolist() == [2]
+
+
+def test_precomputed_mask_roundtrip(tmp_path):
+    """Test saving and loading a precomputed mask."""
+    loader = PrecomputedMaskLoader(tmp_path)
+    assert not loader.has_mask("tehran", "2023-01-01")
+    loader.save_mask(_sample_mask(), "tehran", "2023-01-01")
+    np.testing.assert_array_equal(loader.load_mask("tehran", "2023-01-01"), _sample_mask())
+
+
+def test_mask_file_encodings_checksum_and_legacy_fallback(tmp_path):
+    """Test packed-bit/RLE/label mask files round-trip, detect corruption and coexist with .npy masks."""
+    from satintel import maskfile
+    from satintel.labeling import label_buildings
+
+    rng = np.random.default_rng(0)
+    noisy = (rng.random((37, 53)) > 0.5).astype(np.uint8)
+    sparse = np.zeros((256, 256), dtype=np.uint8)
+    sparse[40:60, 100:130] = 1
+    for mask, encoding in ((noisy, "bits"), (sparse, "rle")):
+        path = maskfile.write_mask(tmp_path / f"{encoding}.mask", mask, transform=(1, 0, 2, 0, -1, 3), model_version="abc")
+        header = maskfile.read_header(path)
+        assert header["encoding"] == encoding and header["shape"] == mask.shape
+        assert header["model_version"] == "abc" and header["transform"] == [1, 0, 2, 0, -1, 3]
+        np.testing.assert_array_equal(maskfile.read_mask(path), mask)
+    assert (tmp_path / "bits.mask").stat().st_size < noisy.nbytes / 4
+
+    labels = label_buildings(_sample_mask()).labels
+    path = maskfile.write_labels(tmp_path / "labels.mask", labels)
+    assert isinstance(maskfile.read_labels(path), np.memmap)
+    np.testing.assert_array_equal(maskfile.read_labels(path), labels)
+    np.testing.assert_array_equal(maskfile.read_mask(path), labels > 0)
+
+    data = bytearray((tmp_path / "bits.mask").read_bytes())
+    data[-1] ^= 0xFF
+    (tmp_path / "bits.mask").write_bytes(bytes(data))
+    with pytest.raises(maskfile.MaskFileError):
+        maskfile.read_mask(tmp_path / "bits.mask")
+
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+    legacy = loader.legacy_mask_path("tehran", "2023-01-01")
+    legacy.parent.mkdir(parents=True)
+    np.save(legacy, _sample_mask())
+    assert loader.has_mask("tehran", "2023-01-01")
+    np.testing.assert_array_equal(loader.load_mask("tehran", "2023-01-01"), _sample_mask())
+    loader.save_mask(_sample_mask(), "tehran", "2023-01-01")
+    assert not legacy.exists() and loader.find_mask("tehran", "2023-01-01").suffix == ".mask"
 
 
-# TODO: Implement tests for analysis module
 def test_building_analyzer_init():
     """Test BuildingAnalyzer initialization."""
-    pass
+    assert BuildingAnalyzer().pixel_resolution == 10.0
+    assert BuildingAnalyzer(pixel_resolution=3.0).pixel_resolution == 3.0
 
 
 def test_calculate_built_area():
     """Test area calculation."""
-    pass
+    analyzer = BuildingAnalyzer(pixel_resolution=10.0)
+    assert analyzer.calculate_built_area(_sample_mask()) == pytest.approx(304 * 100 / 1e6)
+
+    table = BuildingDetector().label_buildings(_sample_mask())
+    stats = analyzer.summarize_buildings(_sample_mask(), table)
+    assert stats["building_count"] == 2
+    assert stats["density_per_km2"] == pytest.approx(2 / (64 * 64 * 100 / 1e6))
 
 
 def test_create_overlay():
     """Test overlay generation."""
-    pass
+    base = np.full((64, 64, 3), 100, dtype=np.uint8)
+    overlay = BuildingAnalyzer().create_overlay(base, _sample_mask(), alpha=0.5)
+    assert overlay.dtype == np.uint8
+    assert tuple(overlay[5, 5]) == (177, 50, 50)
+    assert tuple(overlay[0, 0]) == (100, 100, 100)
+
+
+def test_overlay_outline_buffers_and_encoders(tmp_path):
+    """Test outline mode, preallocated output and size-budgeted encoding."""
+    from satintel.overlay import encode_within, sniff_format
+
+    analyzer = BuildingAnalyzer()
+    base = np.full((64, 64, 3), 100, dtype=np.uint8)
+    mask = _sample_mask()
+    labels = BuildingDetector().label_buildings(mask).labels
+    out = np.empty_like(base)
+    outlined = analyzer.create_overlay(base, mask, alpha=1.0, mode="outline", labels=labels, out=out)
+    assert outlined is out
+    assert tuple(out[4, 8]) == (255, 0, 0)  # building edge
+    assert tuple(out[8, 8]) == (100, 100, 100)  # building interior
+    assert tuple(out[0, 0]) == (100, 100, 100)
+
+    format, data = encode_within(outlined, max_bytes=None)
+    assert format == "jpeg" and sniff_format(data) == "jpeg"
+    format, data = encode_within(outlined, max_bytes=1, candidates=[("png", 9), ("webp", 101)])
+    assert sniff_format(data) == format
+
+    png = BuildingAnalyzer(overlay_format="png", overlay_level=9)
+    path = png.save_overlay(outlined, "new_york", "2023-01-01", tmp_path)
+    assert path.name == "2023-01-01.png" and sniff_format(path.read_bytes()) == "png"
+
+    # Concurrent writers of the same overlay each use their own temp file
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        saved = list(pool.map(lambda _: png.save_overlay(outlined, "new_york", "2023-01-01", tmp_path), range(32)))
+    assert set(saved) == {path} and [p.name for p in path.parent.iterdir()] == [path.name]
+
+
+from satintel.cache import LRUCache
+from satintel.pipeline import TaskPipeline
+
+
+def test_lru_cache_evicts_by_bytes():
+    """Test byte-bounded LRU eviction and counters."""
+    cache = LRUCache(max_bytes=250)
+    cache.put(("a", "d", "mask"), np.zeros(100, dtype=np.uint8))
+    cache.put(("b", "d", "mask"), np.zeros(100, dtype=np.uint8))
+    assert cache.get(("a", "d", "mask")) is not None
+    cache.put(("c", "d", "mask"), np.zeros(100, dtype=np.uint8))
+
+    assert ("b", "d", "mask") not in cache
+    assert ("a", "d", "mask") in cache
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 1
+    assert stats["bytes"] <= 250
+
+
+def test_pipeline_caches_stages(tmp_path):
+    """Test the pipeline reuses cached stages across runs."""
+    from PIL import Image
+
+    path = _write_tile(tmp_path, "new_york", "2023-01-01")
+    Image.fromarray(np.zeros((64, 64, 3), dtype=np.uint8)).save(path)
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+    loader.save_mask(_sample_mask(), "new_york", "2023-01-01")
+
+    cache = LRUCache(max_bytes=1 << 20)
+    pipeline = TaskPipeline(
+        ImageryManager(tmp_path, area_bboxes={"new_york": [-74.05, 40.68, -73.95, 40.76]}),
+        BuildingDetector(),
+        loader,
+        BuildingAnalyzer(),
+        cache=cache,
+        overlay_dir=tmp_path / "overlays"
+    )
+    first = pipeline.run(40.71, -74.0)
+    misses = cache.stats()["misses"]
+    second = pipeline.run(40.72, -74.01)
+
+    assert first["stats"] == second["stats"]
+    assert first["stats"]["building_count"] == 2
+    assert cache.stats()["misses"] == misses
+    assert (tmp_path / "overlays" / "new_york" / Path(first["overlay_url"]).name).exists()
+
+    # A fresh (profiled) run recomputes every stage without touching the cache
+    loads = []
+    load_mask = loader.load_mask
+    loader.load_mask = lambda *args: loads.append(args) or load_mask(*args)
+    fresh = pipeline.process(pipeline.snap(40.71, -74.0), fresh=True)
+    assert fresh["stats"] == first["stats"]
+    assert len(loads) == 1 and cache.stats()["misses"] == misses
+
+
+def test_metrics_stage_breakdown_and_prometheus_text(tmp_path):
+    """Test stage timers feed per-request breakdowns and the Prometheus histograms."""
+    from PIL import Image
+    from satintel import metrics
+    from satintel.executor import StageExecutor
+
+    path = _write_tile(tmp_path, "new_york", "2023-01-01")
+    Image.fromarray(np.zeros((64, 64, 3), dtype=np.uint8)).save(path)
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+    loader.save_mask(_sample_mask(), "new_york", "2023-01-01")
+
+    pipeline = TaskPipeline(
+        ImageryManager(tmp_path, area_bboxes={"new_york": [-74.05, 40.68, -73.95, 40.76]}),
+        BuildingDetector(), loader, BuildingAnalyzer(),
+        cache=LRUCache(1 << 20), executor=StageExecutor(thread_workers=2, process_workers=0),
+        overlay_dir=tmp_path / "overlays", stage_timings=True
+    )
+    try:
+        result = pipeline.run(40.71, -74.0)
+    finally:
+        pipeline.executor.shutdown()
+
+    # decode and label ran on executor threads, which inherit the request context
+    assert {"decode", "label", "summarize", "blend", "encode"} <= set(result["stages_ms"])
+    assert all(ms >= 0 for ms in result["stages_ms"].values())
+
+    text = metrics.render()
+    assert '# TYPE satintel_stage_seconds histogram' in text
+    assert 'satintel_stage_seconds_bucket{stage="decode",le="+Inf"}' in text
+    assert 'satintel_bytes_decoded_total{source="image"}' in text
+    assert 'satintel_cache_requests_total{cache="stage",result="miss"}' in text
+
+    registry = metrics.MetricsRegistry()
+    registry.observe(metrics.MODEL_BATCH_SIZE, 3)
+    registry.observe(metrics.MODEL_BATCH_SIZE, 100)
+    text = registry.render()
+    assert 'satintel_model_batch_size_bucket{le="2.0"} 0' in text
+    assert 'satintel_model_batch_size_bucket{le="4.0"} 1' in text
+    assert 'satintel_model_batch_size_bucket{le="+Inf"} 2' in text
+    assert 'satintel_model_batch_size_sum 103' in text
+
+
+def test_pipeline_analyzes_points_grouped_by_tile(tmp_path):
+    """Test batch analysis loads a tile once and summarizes the window around each point."""
+    from PIL import Image
+
+    path = _write_tile(tmp_path, "new_york", "2023-01-01")
+    Image.fromarray(np.zeros((64, 64, 3), dtype=np.uint8)).save(path)
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+    loader.save_mask(_sample_mask(), "new_york", "2023-01-01")
+    cache = LRUCache(1 << 20)
+    pipeline = TaskPipeline(
+        ImageryManager(tmp_path, area_bboxes={"new_york": [-74.05, 40.68, -73.95, 40.76]}),
+        BuildingDetector(), loader, BuildingAnalyzer(), cache=cache,
+        overlay_dir=tmp_path / "overlays"
+    )
+
+    points = [
+        {"lat": 40.748125, "lon": -74.035156, "id": "on"},   # pixel (9, 9), first building
+        {"lat": 40.709375, "lon": -73.971094},               # pixel (40, 50), empty
+        {"lat": -10.0, "lon": 0.0},
+    ]
+    rows = sorted(pipeline.analyze_points(points, radius_m=50), key=lambda row: row["index"])
+
+    assert rows[0]["id"] == "on" and rows[0]["stats"]["building_count"] == 2
+    assert rows[0]["local"]["building_count"] == 1
+    assert rows[0]["local"]["built_area_km2"] == pytest.approx(0.01)
+    assert rows[0]["local"]["on_building"] is True
+    assert rows[1]["local"]["building_count"] == 0
+    assert rows[1]["local"]["window_area_km2"] == pytest.approx(121 * 100 / 1e6)
+    assert "error" in rows[2]
+    assert cache.stats()["entries"] == 3  # mask, buildings and stats, once for both points
+    assert not (tmp_path / "overlays").exists()
+
+
+def test_batch_precomputes_summary_and_skips_up_to_date_tiles(tmp_path):
+    """Test the offline batch run writes a columnar summary and only redoes stale tiles."""
+    import json
+    import os
+    from PIL import Image
+    from satintel.batch import build_config, read_summary, run_batch
+
+    bboxes = {"new_york": [-74.05, 40.68, -73.95, 40.76]}
+    manager = ImageryManager(tmp_path, area_bboxes=bboxes)
+    for date in ("2023-01-01", "2023-02-01"):
+        Image.fromarray(np.zeros((64, 64, 3), dtype=np.uint8)).save(_write_tile(tmp_path, "new_york", date))
+        manager.register_tile("new_york", date, bboxes["new_york"])
+    manager.index.save()
+    PrecomputedMaskLoader(tmp_path / "masks").save_mask(_sample_mask(), "new_york", "2023-01-01")
+
+    summary_path = tmp_path / "summary.json"
+    config = build_config(tmp_path, masks_dir=tmp_path / "masks")
+    first = run_batch(tmp_path, summary_path, config, workers=1)
+    # No stored mask and no model for the second date
+    assert (first["processed"], first["failed"]) == (1, 1)
+    with open(summary_path) as f:
+        columns = json.load(f)
+    assert columns["area_id"] == ["new_york"] and columns["building_count"] == [2]
+
+    assert run_batch(tmp_path, summary_path, config, workers=1)["skipped"] == 1
+
+    source = manager.get_image_path("new_york", "2023-01-01")
+    os.utime(source, ns=(source.stat().st_atime_ns, source.stat().st_mtime_ns + 10**9))
+    rerun = run_batch(tmp_path, summary_path, config, areas=["new_york"], until="2023-01-31", workers=1)
+    # The stored mask is now older than the image, so it cannot be reused without a model
+    assert (rerun["processed"], rerun["failed"]) == (0, 1)
+    assert read_summary(summary_path)[("new_york", "2023-01-01")]["mask_source"] == "precomputed"
+
+
+def test_batch_reuses_only_masks_of_the_current_model(tmp_path, monkeypatch):
+    """Test batch workers redetect, and the skip check reruns, masks of another detector setup."""
+    from PIL import Image
+    from config.settings import settings
+    from satintel import batch
+
+    monkeypatch.setattr(settings, "masks_dir", tmp_path / "shared_masks")
+    monkeypatch.setattr(settings, "model_path", None)
+    assert batch.current_mask_version(batch.build_config(tmp_path)) is None
+    assert batch.build_config(tmp_path)["masks_dir"] == str(tmp_path / "shared_masks")
+    assert batch.build_config(tmp_path, masks_dir=tmp_path / "m")["masks_dir"] == str(tmp_path / "m")
+
+    source = _write_tile(tmp_path, "new_york", "2023-01-01")
+    Image.fromarray(np.zeros((64, 64, 3), dtype=np.uint8)).save(source)
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+    loader.save_mask(_sample_mask(), "new_york", "2023-01-01", model_version="old-model")
+    calls = []
+    detector = BuildingDetector(tile_size=32, tile_overlap=8)
+    detector.model = lambda batch: calls.append(1) or batch[:, :1] - 0.5
+    monkeypatch.setattr(batch, "_worker", {
+        "detector": detector, "loader": loader, "analyzer": BuildingAnalyzer(), "reuse_masks": True,
+    })
+
+    row = batch.process_tile("new_york", "2023-01-01", str(source))
+    assert calls and row["mask_source"] == "detected"
+    assert loader.mask_version("new_york", "2023-01-01") == detector.mask_version
+
+    calls.clear()
+    row = batch.process_tile("new_york", "2023-01-01", str(source))
+    # Reused, but still tied to the detector so changing it invalidates the row
+    assert not calls and row["mask_source"] == "detected"
+    mask_path = loader.find_mask("new_york", "2023-01-01")
+    assert batch.is_up_to_date(row, source, mask_path, detector.mask_version)
+
+    detector.tile_size = 64
+    assert not batch.is_up_to_date(row, source, mask_path, detector.mask_version)
+    row = batch.process_tile("new_york", "2023-01-01", str(source))
+    assert calls and row["mask_version"] == detector.mask_version
+
+
+def test_pipeline_persists_detected_masks(tmp_path):
+    """Test detected masks are saved with the detector version and reused only by that version."""
+    from PIL import Image
+
+    path = _write_tile(tmp_path, "new_york", "2023-01-01")
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    image[8:24, 8:24] = 255
+    Image.fromarray(image).save(path)
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+    calls = []
+
+    def make_pipeline(threshold):
+        detector = BuildingDetector(tile_size=32, tile_overlap=8, threshold=threshold)
+        detector.model = lambda batch: calls.append(1) or batch[:, :1] - 0.5
+        return TaskPipeline(
+            ImageryManager(tmp_path, area_bboxes={"new_york": [-74.05, 40.68, -73.95, 40.76]}),
+            detector, loader, BuildingAnalyzer(), cache=LRUCache(1 << 20)
+        )
+
+    first = make_pipeline(0.0)
+    mask = first.mask("new_york", "2023-01-01")
+    assert calls and loader.mask_version("new_york", "2023-01-01") == first.detector.mask_version
+
+    calls.clear()
+    np.testing.assert_array_equal(make_pipeline(0.0).mask("new_york", "2023-01-01"), mask)
+    assert not calls
+    make_pipeline(0.25).mask("new_york", "2023-01-01")
+    assert calls
+
+
+def test_pipeline_serves_results_from_store(tmp_path):
+    """Test a repeat query is served from the persistent result store."""
+    from PIL import Image
+    from satintel.result_store import ResultStore
+
+    path = _write_tile(tmp_path, "new_york", "2023-01-01")
+    Image.fromarray(np.zeros((64, 64, 3), dtype=np.uint8)).save(path)
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+    loader.save_mask(_sample_mask(), "new_york", "2023-01-01")
+
+    def make_pipeline():
+        return TaskPipeline(
+            ImageryManager(tmp_path, area_bboxes={"new_york": [-74.05, 40.68, -73.95, 40.76]}),
+            BuildingDetector(),
+            loader,
+            BuildingAnalyzer(),
+            result_store=ResultStore(tmp_path / "results"),
+            overlay_dir=tmp_path / "overlays"
+        )
+
+    first = make_pipeline().run(40.71, -74.0)
+    assert first["overlay_url"] == "/api/task/new_york/2023-01-01/overlay.png"
+
+    restarted = make_pipeline()
+    restarted.mask_loader = None  # any recompute would now fail
+    assert restarted.run(40.71, -74.0)["stats"] == first["stats"]
+    assert restarted.cached_overlay("new_york", "2023-01-01").exists()
+
+    # Results of another artifact or window geometry are stored separately
+    key = restarted.result_key("new_york", "2023-01-01")
+    restarted.detector.artifact = "onnx-int8-static"
+    assert restarted.result_key("new_york", "2023-01-01") != key
+
+
+def test_stage_executor_process_pool_uses_shared_memory():
+    """Test process-placed stages match inline results and ship arrays via shared memory."""
+    from satintel.executor import SharedArray, StageExecutor, share, unshare
+    from satintel.labeling import label_buildings, trace_rings
+
+    mask = np.zeros((512, 512), dtype=np.uint8)
+    mask[:64, :64] = _sample_mask()
+    assert isinstance(share(mask), SharedArray)
+    np.testing.assert_array_equal(unshare(share(mask)), mask)
+
+    executor = StageExecutor(thread_workers=1, process_workers=1,
+                             placement={"label": "process", "trace": "process"})
+    try:
+        table = executor.run("label", label_buildings, mask, 10)
+        traced = executor.run("trace", trace_rings, table)
+    finally:
+        executor.shutdown()
+    expected = trace_rings(label_buildings(mask, 10))
+    np.testing.assert_array_equal(table.labels, expected.labels)
+    np.testing.assert_array_equal(traced.vertices, expected.vertices)
+
+    with pytest.raises(ValueError):
+        StageExecutor(placement={"detect": "process"})
+
+    # Concurrent first calls share one lazily created pool
+    from concurrent.futures import ThreadPoolExecutor
+
+    executor = StageExecutor(thread_workers=2)
+    with ThreadPoolExecutor(8) as callers:
+        pools = set(callers.map(lambda _: executor._thread_pool(), range(64)))
+    assert len(pools) == 1
+    executor.shutdown()
+
+
+def test_pipeline_coalesces_concurrent_requests_for_a_tile(tmp_path):
+    """Test concurrent requests for one tile share a single computation."""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from PIL import Image
+
+    path = _write_tile(tmp_path, "new_york", "2023-01-01")
+    Image.fromarray(np.zeros((64, 64, 3), dtype=np.uint8)).save(path)
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+    loader.save_mask(_sample_mask(), "new_york", "2023-01-01")
+    pipeline = TaskPipeline(
+        ImageryManager(tmp_path, area_bboxes={"new_york": [-74.05, 40.68, -73.95, 40.76]}),
+        BuildingDetector(), loader, BuildingAnalyzer(), cache=LRUCache(1 << 20),
+        overlay_dir=tmp_path / "overlays"
+    )
+
+    gate = threading.Event()
+    loads = []
+    load_mask = loader.load_mask
+
+    def slow_load(area_id, date):
+        loads.append(1)
+        gate.wait(5)
+        return load_mask(area_id, date)
+
+    loader.load_mask = slow_load
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(pipeline.run, 40.71, -74.0) for _ in range(8)]
+        deadline = time.monotonic() + 5
+        while pipeline.flights.stats()["calls"] < 8:
+            if time.monotonic() > deadline:
+                gate.set()
+                pytest.fail("requests never reached the single-flight")
+            time.sleep(0.001)
+        gate.set()
+        results = [f.result() for f in futures]
+
+    assert len(loads) == 1
+    assert all(r["stats"] == results[0]["stats"] for r in results)
+    stats = pipeline.flights.stats()
+    assert stats["executions"] == 1 and stats["coalescing_ratio"] == pytest.approx(7 / 8)
+
+
+def test_job_manager_deduplicates_in_flight_work():
+    """Test identical in-flight submissions share one job and computation."""
+    import asyncio
+    import threading
+    from satintel.jobs import Job, JobManager
+
+    release = threading.Event()
+    calls = []
+
+    def work(progress):
+        calls.append(1)
+        progress("detect")
+        release.wait(5)
+        return {"ok": True}
+
+    manager = JobManager(max_workers=2)
+    first, first_dup = manager.submit(("tehran", "2023-01-01"), work)
+    second, second_dup = manager.submit(("tehran", "2023-01-01"), work)
+    assert second is first and not first_dup and second_dup
+
+    release.set()
+    while not first.is_finished:
+        first.wait(after=len(first.events), timeout=5)
+    assert first.result == {"ok": True}
+    assert [e["stage"] for e in first.events if e["stage"]][0] == "detect"
+    assert len(calls) == 1
+
+    third, third_dup = manager.submit(("tehran", "2023-01-01"), work)
+    assert third is not first and not third_dup
+    manager.shutdown()
+
+    async def watch(job):
+        threading.Timer(0.05, job.progress, ("overlay",)).start()
+        return await job.wait_async(after=len(job.events), timeout=5)
+
+    # Async waiters are woken by the emitting thread, without a thread of their own
+    pending = Job(("tehran", "2023-02-01"))
+    assert [event["stage"] for event in asyncio.run(watch(pending))] == ["overlay"]
+
+
+def test_result_store_persists_and_evicts(tmp_path):
+    """Test result store survives restart, evicts LRU and drops old models."""
+    from satintel.result_store import ResultStore
+
+    store = ResultStore(tmp_path, max_bytes=200)
+    key_a = ResultStore.make_key("new_york", "2023-01-01", "v1", "s")
+    key_b = ResultStore.make_key("tehran", "2023-01-01", "v1", "s")
+    store.put(key_a, {"pad": "x" * 80}, model_version="v1")
+    store.put(key_b, {"pad": "y" * 80}, model_version="v2")
+    assert store.get(key_a) == {"pad": "x" * 80}
+    store.flush()
+
+    reopened = ResultStore(tmp_path, max_bytes=200)
+    assert key_a in reopened and key_b in reopened
+    reopened.put(ResultStore.make_key("tehran", "2023-06-01", "v2", "s"), {"pad": "z" * 80},
+                 model_version="v2")
+    assert len(reopened) == 2
+    assert reopened.get(key_b) is None
+
+    assert reopened.invalidate(keep_model_version="v2") == 1
+    assert reopened.get(key_a) is None
+
+    # A lost index is rebuilt with each entry's model version
+    (tmp_path / "index.json").unlink()
+    recovered = ResultStore(tmp_path, max_bytes=200)
+    assert len(recovered) == 1
+    assert recovered.invalidate(keep_model_version="v2") == 0
+
+    # Overlays keep their real suffix, also across index recovery
+    overlay = tmp_path / "overlay.jpg"
+    overlay.write_bytes(b"\xff\xd8jpeg")
+    store = ResultStore(tmp_path / "overlays")
+    store.put(key_a, {}, overlay, model_version="v1")
+    assert store.overlay_path(key_a).suffix == ".jpg"
+    (tmp_path / "overlays" / "index.json").unlink()
+    assert ResultStore(tmp_path / "overlays").overlay_path(key_a).read_bytes() == b"\xff\xd8jpeg"
+
+    # An unreadable payload is dropped, also from the index on disk
+    store.payload_path(key_a).write_text("{truncated")
+    assert store.get(key_a) is None
+    assert key_a not in ResultStore(tmp_path / "overlays")
+
+
+from satintel.change import ChangeDetector, DEMOLISHED, NEW, UNCHANGED
+
+
+def _later_mask():
+    # First building kept (shifted by one pixel), second demolished, one new
+    mask = np.zeros((64, 64), dtype=np.uint8)
+    mask[5:15, 4:14] = 1
+    mask[40:55, 40:55] = 1
+    return mask
 
 
-# TODO: Implement tests for change detection module
 def test_change_detector_init():
     """Test ChangeDetector initialization."""
-    pass
+    detector = ChangeDetector()
+    assert detector.pixel_resolution == 10.0
+    assert detector.iou_threshold == 0.3
+    assert ChangeDetector(iou_threshold=0.5).iou_threshold == 0.5
 
 
 def test_compare_masks():
     """Test mask comparison."""
-    pass
+    result = ChangeDetector().compare_masks(_sample_mask(), _later_mask())
+    change_map = result["change_map"]
+    assert change_map[4, 4] == DEMOLISHED
+    assert change_map[10, 10] == UNCHANGED
+    assert change_map[45, 45] == NEW
+    assert result["unchanged_px"] == 90
+    assert result["new_px"] == 10 + 225
+    assert result["demolished_px"] == 10 + 200 + 4
+
+    with pytest.raises(ValueError):
+        ChangeDetector().compare_masks(_sample_mask(), np.zeros((8, 8)))
 
 
 def test_calculate_change_stats():
     """Test change statistics calculation."""
-    pass
+    detector = ChangeDetector(pixel_resolution=10.0, min_building_size=10)
+    stats, change_map = detector.detect_changes(_sample_mask(), _later_mask(), compared_to="2021-01-01")
+    assert stats["compared_to"] == "2021-01-01"
+    assert (stats["buildings_before"], stats["buildings_after"]) == (2, 2)
+    assert stats["new_buildings"] == 1
+    assert stats["removed_buildings"] == 1
+    assert stats["unchanged_buildings"] == 1
+    assert stats["mean_match_iou"] == pytest.approx(90 / 110)
+    assert stats["new_built_area_km2"] == pytest.approx(235 * 100 / 1e6)
+    assert stats["activity_score"] == pytest.approx(100 * 449 / 539)
+
+    overlay = detector.create_change_overlay(np.full((64, 64, 3), 100, np.uint8), change_map, alpha=0.5)
+    assert tuple(overlay[45, 45]) == (50, 150, 50)
+    assert tuple(overlay[4, 4]) == (160, 50, 50)  # demolished
+    assert tuple(overlay[10, 10]) == (100, 100, 100)
+
+
+def test_pipeline_reports_change_since_previous_date(tmp_path):
+    """Test the task result includes change against the previous date."""
+    from PIL import Image
+
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+    for date, mask in (("2021-01-01", _sample_mask()), ("2023-01-01", _later_mask())):
+        path = _write_tile(tmp_path, "new_york", date)
+        Image.fromarray(np.zeros((64, 64, 3), dtype=np.uint8)).save(path)
+        loader.save_mask(mask, "new_york", date)
+
+    pipeline = TaskPipeline(
+        ImageryManager(tmp_path, area_bboxes={"new_york": [-74.05, 40.68, -73.95, 40.76]}),
+        BuildingDetector(), loader, BuildingAnalyzer(),
+        change_detector=ChangeDetector(min_building_size=10),
+        overlay_dir=tmp_path / "overlays"
+    )
+    result = pipeline.run(40.71, -74.0)
+    assert result["date"] == "2023-01-01"
+    assert result["change"]["compared_to"] == "2021-01-01"
+    assert result["change"]["new_buildings"] == 1
+    assert Path(result["change"]["overlay_url"]).name.startswith("2023-01-01_change_2021-01-01.")
+    assert (tmp_path / "overlays" / "new_york" / Path(result["change"]["overlay_url"]).name).exists()
+
+    # A previous date at another resolution is resampled instead of failing the task
+    loader.save_mask(np.kron(_sample_mask(), np.ones((2, 2), dtype=np.uint8)), "new_york", "2021-01-01")
+    assert pipeline.run(40.71, -74.0)["change"]["new_buildings"] == 1
+
+
+def test_timeseries_is_incremental(tmp_path):
+    """Test a new date only costs one new mask and one new diff."""
+    from PIL import Image
+    from satintel.timeseries import TimeSeriesAnalyzer
+
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+
+    def add_date(date, mask):
+        path = _write_tile(tmp_path, "tehran", date)
+        Image.fromarray(np.zeros((64, 64, 3), dtype=np.uint8)).save(path)
+        loader.save_mask(mask, "tehran", date)
+
+    def make_analyzer():
+        pipeline = TaskPipeline(
+            ImageryManager(tmp_path, area_bboxes={"tehran": [51.2, 35.6, 51.3, 35.7]}),
+            BuildingDetector(), loader, BuildingAnalyzer(), cache=LRUCache(1 << 20),
+            change_detector=ChangeDetector(min_building_size=10)
+        )
+        return TimeSeriesAnalyzer(pipeline, tmp_path / "timeseries")
+
+    add_date("2021-01-01", _sample_mask())
+    add_date("2022-01-01", _later_mask())
+    series = make_analyzer().series("tehran")
+    assert series["dates"] == ["2021-01-01", "2022-01-01"]
+    assert series["building_count"] == [2, 2]
+    assert series["change"]["new_buildings"] == [1]
+
+    add_date("2023-01-01", np.zeros((64, 64), dtype=np.uint8))
+    loaded = []
+    load_mask = loader.load_mask
+    loader.load_mask = lambda area_id, date: loaded.append(date) or load_mask(area_id, date)
+
+    series = make_analyzer().series("tehran")
+    assert series["building_count"] == [2, 2, 0]
+    assert series["change"]["to"] == ["2022-01-01", "2023-01-01"]
+    assert series["change"]["removed_buildings"][-1] == 2
+    # The new date's mask plus the previous one it is diffed against
+    assert sorted(set(loaded)) == ["2022-01-01", "2023-01-01"]
+
+
+def test_downloader_retries_resumes_and_skips_verified_tiles(tmp_path):
+    """Test downloader retries server errors, skips verified tiles, refetches corrupt ones and restarts on 416."""
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from satintel.downloader import DownloadManifest, Downloader, MetadataLog
+
+    payloads = {f"/tile{i}.png": bytes([i]) * 5000 for i in range(4)}
+    hits = {path: 0 for path in payloads}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits[self.path] += 1
+            if self.path == "/tile0.png" and hits[self.path] == 1:
+                self.send_response(503)
+                self.send_header("Retry-After", "3600")  # capped at backoff_max
+                self.end_headers()
+                return
+            if self.headers.get("Range"):
+                self.send_response(416)
+                self.end_headers()
+                return
+            body = payloads[self.path]
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    jobs = [
+        {"key": path, "url": base + path, "dest": tmp_path / "imagery" / path.lstrip("/"),
+         "metadata": {"aoi_id": "test", "filename": path.lstrip("/")}}
+        for path in payloads
+    ]
+
+    def downloader():
+        return Downloader(
+            DownloadManifest(tmp_path / "manifest.json"), MetadataLog(tmp_path / "metadata.json"),
+            max_workers=4, requests_per_second=0, backoff_base=0.01, backoff_max=0.05
+        )
+
+    try:
+        summary = downloader().download(jobs)
+        assert summary["downloaded"] == 4 and summary["failed"] == 0
+        assert hits["/tile0.png"] == 2
+        assert (tmp_path / "imagery" / "tile3.png").read_bytes() == payloads["/tile3.png"]
+        assert len(json.loads((tmp_path / "metadata.json").read_text())) == 4
+
+        # Re-run skips everything; a corrupted tile is fetched again
+        (tmp_path / "imagery" / "tile1.png").write_bytes(b"\x00" * 5000)
+        summary = downloader().download(jobs)
+        assert summary["skipped"] == 3 and summary["downloaded"] == 1
+        assert hits["/tile1.png"] == 2 and hits["/tile2.png"] == 1
+        assert (tmp_path / "imagery" / "tile1.png").read_bytes() == payloads["/tile1.png"]
+        assert len(json.loads((tmp_path / "metadata.json").read_text())) == 4
+
+        # A complete .part left by a crash before the rename gets 416 and is refetched whole
+        dest = tmp_path / "imagery" / "tile2.png"
+        os.replace(dest, dest.with_name("tile2.png.part"))
+        summary = downloader().download(jobs)
+        assert summary["downloaded"] == 1 and summary["failed"] == 0
+        assert hits["/tile2.png"] == 3 and dest.read_bytes() == payloads["/tile2.png"]
+        assert not dest.with_name("tile2.png.part").exists()
+    finally:
+        server.shutdown()
+
+
+def test_map_tiles_render_and_cache(tmp_path):
+    """Test XYZ tiles resample the stored rasters and are served from cache."""
+    pytest.importorskip("rasterio")
+    from PIL import Image
+    from satintel.cog import CogStore
+    from satintel.maptiles import MapTileCache, MapTileRenderer, lonlat_to_tile, tile_bounds
+
+    bbox = [-74.05, 40.68, -73.95, 40.76]
+    path = _write_tile(tmp_path, "new_york", "2023-01-01")
+    image = np.zeros((256, 256, 3), dtype=np.uint8)
+    image[:, :128, 0] = 200  # west half red
+    image[:, 128:, 2] = 200  # east half blue
+    Image.fromarray(image).save(path)
+    mask = np.zeros((256, 256), dtype=np.uint8)
+    mask[100:160, 100:160] = 1
+    loader = PrecomputedMaskLoader(tmp_path / "masks")
+    loader.save_mask(mask, "new_york", "2023-01-01")
+
+    pipeline = TaskPipeline(
+        ImageryManager(tmp_path, area_bboxes={"new_york": bbox}, cog_store=CogStore(tmp_path / "cog")),
+        BuildingDetector(), loader, BuildingAnalyzer(), cache=LRUCache(1 << 24)
+    )
+    renderer = MapTileRenderer(pipeline, MapTileCache(tmp_path / "maptiles", max_bytes=1 << 20))
+
+    z = 11
+    x, y = lonlat_to_tile(40.72, -74.0, z)
+    bounds = tile_bounds(z, x, y)
+    assert bounds[0] <= -74.0 <= bounds[2] and bounds[1] <= 40.72 <= bounds[3]
+
+    tile = renderer.render("imagery", z, x, y)
+    covered = tile[..., 3] == 255
+    assert covered.any() and not covered.all()
+    assert (tile[covered][:, 0] == 200).any() and (tile[covered][:, 2] == 200).any()
+    overlay = renderer.render("buildings", z, x, y)
+    assert (overlay[..., 3] > 0).sum() > 0
+    assert np.all(overlay[overlay[..., 3] > 0][:, 0] == 255)
+
+    renders = []
+    original = renderer.render
+    renderer.render = lambda *args: renders.append(args) or original(*args)
+    data, etag = renderer.tile("imagery", z, x, y)
+    assert data.startswith(b"\x89PNG") and renderer.tile("imagery", z, x, y) == (data, etag)
+    assert len(renders) == 1
+
+    # A fresh cache instance finds the tile on disk
+    reopened = MapTileRenderer(pipeline, MapTileCache(tmp_path / "maptiles", max_bytes=1 << 20))
+    reopened.render = lambda *args: pytest.fail("tile should come from disk")
+    assert reopened.tile("imagery", z, x, y) == (data, etag)
+
+    # Dates are validated before they become cache path components
+    assert renderer.tile("imagery", z, x, y, "2023-01-01")[0].startswith(b"\x89PNG")
+    for bad in ("../../../../escaped", "2023-13-01", "2022-01-01"):
+        with pytest.raises(ValueError):
+            renderer.tile("imagery", z, x, y, bad)
+    assert not list((tmp_path / "maptiles").rglob("escaped*"))
+
+    # Seeding renders the neighbourhood; a tiny budget evicts old tiles
+    small = MapTileRenderer(pipeline, MapTileCache(tmp_path / "small", max_bytes=3 * len(data)))
+    assert small.seed([(40.72, -74.0)], [z], radius=1, layers=["imagery"]) == 9
+    assert small.cache.stats()["evictions"] > 0
+    assert small.cache.stats()["bytes"] <= 3 * len(data)